@@ -1,10 +1,11 @@
 """
 Health check and monitoring endpoints.
 """
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from datetime import datetime
+import asyncio
 
-from app.schemas.schemas import HealthResponse
+from app.schemas.schemas import HealthResponse, ReadinessResponse
 from app.db.session import get_db
 from app.db.redis import get_redis_client
 from app.services.embedding_service import get_embedding_service
@@ -33,13 +34,16 @@ async def health_check(db=Depends(get_db)):
     except Exception as e:
         redis_status = f"unhealthy: {str(e)}"
 
-    # Check Qdrant
+    # Check the vector store, without waiting on a model load in progress
     try:
         embedding_service = get_embedding_service()
-        embedding_service._initialize()
-        if embedding_service.client:
-            embedding_service.client.get_collections()
-            qdrant_status = "healthy"
+        vector_store = embedding_service.vector_store
+        if vector_store is not None:
+            await vector_store.check()
+            # Serving from the local store means Qdrant is down or not configured
+            qdrant_status = "healthy" if vector_store.name == "qdrant" else vector_store.name
+        elif embedding_service.readiness == "warming":
+            qdrant_status = "starting"
         else:
             qdrant_status = "unavailable"
     except Exception as e:
@@ -60,6 +64,32 @@ async def health_check(db=Depends(get_db)):
     )
 
 
+@router.get("/ready", response_model=ReadinessResponse)
+async def readiness_check(response: Response) -> ReadinessResponse:
+    """
+    Readiness probe: 200 once the embedding model is loaded and warm, else 503.
+
+    Without ``EMBEDDING_WARMUP`` the model loads on first use, so the instance
+    is ready unless loading it failed. A failed load is retried in the
+    background, so an instance recovers once the model can load. Route traffic
+    to this instance only while it returns 200.
+    """
+    embedding_service = get_embedding_service()
+    if embedding_service.readiness == "failed":
+        asyncio.get_running_loop().run_in_executor(None, embedding_service._initialize)
+    ready = embedding_service.readiness == "ready" or (
+        not settings.embedding_warmup and embedding_service.readiness != "failed"
+    )
+    if not ready:
+        response.status_code = 503
+
+    return ReadinessResponse(
+        ready=ready,
+        embedding=embedding_service.readiness,
+        cold_start_seconds=embedding_service.cold_start_seconds,
+    )
+
+
 @router.get("/metrics")
 async def metrics():
     """
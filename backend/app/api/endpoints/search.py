@@ -1,10 +1,12 @@
 """
 Search endpoints for semantic and filtered book search.
 """
+from typing import Any, Dict
+
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
-from app.schemas.schemas import SearchRequest, SearchResponse, BookResponse
+from app.schemas.schemas import SearchRequest, SearchResponse, BookResponse, PassageMatch
 from app.db.session import get_db
 from app.services.embedding_service import get_embedding_service
 from app.models.models import Book
@@ -22,30 +24,40 @@ async def search_books(
     """
     embedding_service = get_embedding_service()
 
-    # Perform semantic search
-    search_results = embedding_service.search_similar(
-        query=request.query,
+    # Encode on the inference thread, batched with concurrent queries
+    query_embedding = await embedding_service.embed_query(request.query)
+
+    # Perform semantic search over passages, one hit per book
+    search_results = await embedding_service.search_books_async(
+        query_embedding,
         limit=request.limit,
         filters=request.filters,
     )
 
     # Get book details from database
-    book_ids = [result["metadata"].get("book_id") for result in search_results]
+    book_ids = [result["book_id"] for result in search_results]
     books = db.query(Book).filter(Book.id.in_(book_ids)).all()
 
     # Create response maintaining search order
     book_map = {book.id: book for book in books}
-    ordered_books = [
-        BookResponse.from_orm(book_map[book_id]) for book_id in book_ids if book_id in book_map
-    ]
+    found = [result for result in search_results if result["book_id"] in book_map]
 
     return SearchResponse(
-        results=ordered_books,
-        total=len(ordered_books),
+        results=[BookResponse.from_orm(book_map[result["book_id"]]) for result in found],
+        total=len(found),
         query=request.query,
+        matches=[PassageMatch(**result) for result in found],
     )
 
 
+@router.get("/cache/stats")
+async def query_embedding_cache_stats() -> Dict[str, Any]:
+    """
+    Hit/miss counters and size of the query embedding cache.
+    """
+    return get_embedding_service().query_cache.metrics()
+
+
 @router.get("/search/suggestions")
 async def search_suggestions(
     query: str = Query(..., min_length=2),
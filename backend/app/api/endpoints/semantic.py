@@ -1,13 +1,38 @@
 """
 Semantic analysis endpoints for hermetic text analysis.
 """
-from fastapi import APIRouter
+from typing import Any, Dict, List, Optional, Sequence
 
-from app.schemas.schemas import SemanticAnalysisRequest, SemanticAnalysisResponse
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.models.models import Book
+from app.schemas.schemas import (
+    CooccurrencePassage,
+    CooccurrenceResponse,
+    EnergyProfileResponse,
+    HermeticSymbolDetail,
+    SemanticAnalysisRequest,
+    SemanticAnalysisResponse,
+    SemanticBatchAnalysisRequest,
+)
 from app.services.semantic_analysis.analyzer import get_semantic_analyzer
+from app.services.semantic_analysis.cache import analyze_text_cached, get_analysis_cache
+from app.services.semantic_analysis.context import AnalysisContext
+from app.services.semantic_analysis.cooccurrence import find_cooccurrences
+from app.services.semantic_analysis.energy_profile import energy_timeline
+from app.services.semantic_analysis.lexicon_store import publish_lexicon, refresh_lexicon
+from app.services.semantic_analysis.parallel import iter_batch_analysis
+from app.services.semantic_analysis.postings import load_symbol_positions
 
 router = APIRouter()
 
+# Characters of context shown around a co-occurrence passage
+EXCERPT_CONTEXT_CHARS = 80
+
 
 @router.post("/analyze", response_model=SemanticAnalysisResponse)
 async def analyze_text(request: SemanticAnalysisRequest):
@@ -15,30 +40,172 @@ async def analyze_text(request: SemanticAnalysisRequest):
     Perform semantic analysis on text to detect hermetic symbols,
     elemental energy, and correspondences.
     """
+    if not request.profile:
+        results = await analyze_text_cached(
+            text=request.text,
+            analyze_symbols=request.analyze_symbols,
+            analyze_energy=request.analyze_energy,
+            analyze_correspondences=request.analyze_correspondences,
+        )
+        return SemanticAnalysisResponse(**results)
+
+    # Profiling always runs the analysis so the timings are real
+    await refresh_lexicon()
     analyzer = get_semantic_analyzer()
+    context = AnalysisContext(request.text)
 
     results = analyzer.analyze_text(
         text=request.text,
         analyze_symbols=request.analyze_symbols,
         analyze_energy=request.analyze_energy,
         analyze_correspondences=request.analyze_correspondences,
+        context=context,
     )
+    results["timings"] = context.timings
 
     return SemanticAnalysisResponse(**results)
 
 
+@router.post("/analyze/batch")
+async def analyze_batch(request: SemanticBatchAnalysisRequest) -> StreamingResponse:
+    """
+    Analyze many texts in one request.
+
+    Results stream back as NDJSON, one object per input text and in input
+    order, each with the input's ``index`` and the fields of /analyze.
+    """
+    await refresh_lexicon()
+    return StreamingResponse(
+        iter_batch_analysis(
+            request.texts,
+            analyze_symbols=request.analyze_symbols,
+            analyze_energy=request.analyze_energy,
+            analyze_correspondences=request.analyze_correspondences,
+        ),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.get("/cache/stats")
+async def analysis_cache_stats() -> Dict[str, Any]:
+    """
+    Hit/miss counters and size of the analysis result cache.
+    """
+    return get_analysis_cache().metrics()
+
+
+@router.get("/books/{book_id}/positions", response_model=List[HermeticSymbolDetail])
+async def get_symbol_positions(
+    book_id: int,
+    symbols: Optional[List[str]] = Query(None),
+    db: Session = Depends(get_db),
+) -> List[Dict[str, Any]]:
+    """
+    Positions of the hermetic symbols detected in a book, optionally
+    restricted to the given symbols.
+    """
+    if db.query(Book.id).filter(Book.id == book_id).first() is None:
+        raise HTTPException(status_code=404, detail=f"Book {book_id} not found")
+
+    return load_symbol_positions(db, book_id, symbols)
+
+
+@router.get("/books/{book_id}/cooccurrence", response_model=CooccurrenceResponse)
+def get_symbol_cooccurrence(
+    book_id: int,
+    a: str,
+    b: str,
+    also: Optional[List[str]] = Query(None),
+    window: int = Query(200, ge=1, le=100_000),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+) -> CooccurrenceResponse:
+    """
+    Passages of a book in which symbols ``a``, ``b`` and any ``also`` symbols
+    all appear within ``window`` characters of each other.
+
+    A plain function, so FastAPI runs the join and its queries in its threadpool,
+    off the event loop.
+    """
+    if db.query(Book.id).filter(Book.id == book_id).first() is None:
+        raise HTTPException(status_code=404, detail=f"Book {book_id} not found")
+
+    symbols = list(dict.fromkeys([a, b, *(also or [])]))
+    postings: Dict[str, Sequence[int]] = {symbol: [] for symbol in symbols}
+    for posting in load_symbol_positions(db, book_id, symbols):
+        postings[posting["symbol"]] = posting["positions"]
+
+    passages = find_cooccurrences(postings, window)
+    shown = passages[:limit]
+
+    # Fetch only the excerpts, never the whole content
+    excerpts = []
+    if shown:
+        bounds = [
+            (max(p["start"] - EXCERPT_CONTEXT_CHARS, 0), p["end"] + EXCERPT_CONTEXT_CHARS)
+            for p in shown
+        ]
+        excerpts = (
+            db.query(*[func.substr(Book.content, start + 1, end - start) for start, end in bounds])
+            .filter(Book.id == book_id)
+            .one()
+        )
+
+    return CooccurrenceResponse(
+        book_id=book_id,
+        symbols=symbols,
+        window=window,
+        total=len(passages),
+        passages=[
+            CooccurrencePassage(**passage, excerpt=excerpt or "")
+            for passage, excerpt in zip(shown, excerpts)
+        ],
+    )
+
+
+@router.get("/books/{book_id}/energy-profile", response_model=EnergyProfileResponse)
+async def get_energy_profile(
+    book_id: int,
+    buckets: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+) -> EnergyProfileResponse:
+    """
+    Elemental energy of a book split into equal token buckets, read from the
+    profile precomputed at ingest.
+    """
+    row = db.query(Book.energy_profile).filter(Book.id == book_id).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Book {book_id} not found")
+    if row.energy_profile is None:
+        raise HTTPException(
+            status_code=404, detail=f"Energy profile of book {book_id} has not been computed"
+        )
+
+    return EnergyProfileResponse(book_id=book_id, **energy_timeline(row.energy_profile, buckets))
+
+
 @router.get("/symbols")
 async def list_symbols():
     """
     List all known hermetic symbols in the database.
     """
+    await refresh_lexicon()
     analyzer = get_semantic_analyzer()
 
-    return {
-        "alchemical": list(analyzer.ALCHEMICAL_SYMBOLS.keys()),
-        "masonic": list(analyzer.MASONIC_SYMBOLS.keys()),
-        "kabbalistic": list(analyzer.KABBALISTIC_SYMBOLS.keys()),
-    }
+    return {category: list(symbols.keys()) for category, symbols in analyzer.all_symbols.items()}
+
+
+@router.post("/lexicon/publish")
+async def publish_symbol_lexicon(db: Session = Depends(get_db)) -> Dict[str, Any]:
+    """
+    Compile the hermetic_symbols table and hot-swap every worker to it.
+    """
+    try:
+        lexicon = await publish_lexicon(db)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to publish lexicon: {str(e)}")
+
+    return {"version": lexicon.version, "symbols": len(lexicon)}
 
 
 @router.get("/elements")
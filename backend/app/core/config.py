@@ -32,6 +32,26 @@ class Settings(BaseSettings):
     qdrant_host: str = Field(default="localhost", env="QDRANT_HOST")
     qdrant_port: int = Field(default=6333, env="QDRANT_PORT")
     qdrant_collection_name: str = Field(default="hermetic_texts", env="QDRANT_COLLECTION")
+    qdrant_grpc_port: int = Field(default=6334, env="QDRANT_GRPC_PORT")
+    qdrant_prefer_grpc: bool = Field(default=False, env="QDRANT_PREFER_GRPC")
+    qdrant_timeout: int = Field(default=10, env="QDRANT_TIMEOUT")  # seconds
+    # float32, float16, int8 (quantized, originals on disk) or on_disk
+    qdrant_collection_profile: str = Field(default="float32", env="QDRANT_COLLECTION_PROFILE")
+    qdrant_quantization_oversampling: float = Field(
+        default=2.0, env="QDRANT_QUANTIZATION_OVERSAMPLING"
+    )
+
+    # Store only filterable fields and text offsets in point payloads, not the text
+    lean_payloads: bool = Field(default=True, env="LEAN_PAYLOADS")
+    # Vector store: qdrant, or local (in-process NumPy, for development and tests)
+    vector_store_backend: str = Field(default="qdrant", env="VECTOR_STORE_BACKEND")
+    # Serve from the local store when Qdrant is unreachable at startup
+    vector_store_fallback: bool = Field(default=True, env="VECTOR_STORE_FALLBACK")
+    # Directory persisting the local store, in memory when unset
+    local_vector_store_path: Optional[str] = Field(default=None, env="LOCAL_VECTOR_STORE_PATH")
+    # Re-embedding job (app.services.reindex): books per batch and batches in flight
+    reindex_batch_books: int = Field(default=16, env="REINDEX_BATCH_BOOKS")
+    reindex_concurrency: int = Field(default=2, env="REINDEX_CONCURRENCY")
 
     # OpenAI API
     openai_api_key: Optional[str] = Field(default=None, env="OPENAI_API_KEY")
@@ -46,6 +66,42 @@ class Settings(BaseSettings):
         default="sentence-transformers/all-MiniLM-L6-v2", env="EMBEDDING_MODEL"
     )
     embedding_dimension: int = Field(default=384, env="EMBEDDING_DIMENSION")
+    # Inference backend: torch, or onnx (exported graph on ONNX Runtime, int8 quantized)
+    embedding_backend: str = Field(default="torch", env="EMBEDDING_BACKEND")
+    # Directory of exported ONNX encoders, written on the first load of a model
+    embedding_onnx_path: str = Field(default="./data/onnx", env="EMBEDDING_ONNX_PATH")
+    embedding_onnx_quantize: bool = Field(default=True, env="EMBEDDING_ONNX_QUANTIZE")
+    # Lowest cosine similarity to PyTorch's vectors an exported graph must keep
+    embedding_onnx_min_cosine: float = Field(default=0.99, env="EMBEDDING_ONNX_MIN_COSINE")
+    # Intra-op threads of each worker's model, all cores when unset
+    embedding_threads: Optional[int] = Field(default=None, env="EMBEDDING_THREADS")
+    # Load the model and run a first encode at startup, before /ready succeeds
+    embedding_warmup: bool = Field(default=True, env="EMBEDDING_WARMUP")
+    embedding_batch_size: int = Field(default=64, env="EMBEDDING_BATCH_SIZE")
+    qdrant_upsert_batch_size: int = Field(default=256, env="QDRANT_UPSERT_BATCH_SIZE")
+    query_batch_max_size: int = Field(default=32, env="QUERY_BATCH_MAX_SIZE")
+    query_batch_window_ms: float = Field(default=5.0, env="QUERY_BATCH_WINDOW_MS")
+    query_embedding_cache_size: int = Field(default=4096, env="QUERY_EMBEDDING_CACHE_SIZE")
+    query_embedding_cache_ttl: int = Field(default=30 * 24 * 3600, env="QUERY_EMBEDDING_CACHE_TTL")
+    query_embedding_cache_redis: bool = Field(default=True, env="QUERY_EMBEDDING_CACHE_REDIS")
+    # Defaults to the model's max sequence length
+    passage_chunk_tokens: Optional[int] = Field(default=None, env="PASSAGE_CHUNK_TOKENS")
+    passage_overlap_tokens: int = Field(default=32, env="PASSAGE_OVERLAP_TOKENS")
+    # Directory of the content-addressed store of document vectors, disabled when unset
+    embedding_store_path: Optional[str] = Field(default=None, env="EMBEDDING_STORE_PATH")
+    embedding_store_dtype: str = Field(default="float32", env="EMBEDDING_STORE_DTYPE")
+
+    # Semantic analysis
+    analysis_workers: int = Field(default=4, env="ANALYSIS_WORKERS")
+    analysis_shard_min_chars: int = Field(default=262144, env="ANALYSIS_SHARD_MIN_CHARS")
+    # Limits of one /analyze/batch request
+    analysis_batch_max_texts: int = Field(default=1000, env="ANALYSIS_BATCH_MAX_TEXTS")
+    analysis_batch_max_text_chars: int = Field(default=100_000, env="ANALYSIS_BATCH_MAX_TEXT_CHARS")
+    symbol_proximity_max_tokens: int = Field(default=12, env="SYMBOL_PROXIMITY_MAX_TOKENS")
+    analysis_cache_max_bytes: int = Field(default=64 * 1024 * 1024, env="ANALYSIS_CACHE_MAX_BYTES")
+    analysis_cache_ttl: int = Field(default=7 * 24 * 3600, env="ANALYSIS_CACHE_TTL")
+    analysis_cache_redis: bool = Field(default=True, env="ANALYSIS_CACHE_REDIS")
+    lexicon_refresh_seconds: float = Field(default=5.0, env="LEXICON_REFRESH_SECONDS")
 
     # CORS
     cors_origins: list[str] = Field(
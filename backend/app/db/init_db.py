@@ -8,6 +8,7 @@ from app.db.session import engine, Base
 from app.models.models import (  # noqa: F401
     User,
     Book,
+    SymbolPosting,
     LibraryItem,
     SearchHistory,
     Annotation,
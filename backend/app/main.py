@@ -4,9 +4,13 @@ Main FastAPI application for El Fuego del Conocimiento Real backend.
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 
 from app.core.config import settings
 from app.db.redis import close_redis_client
+from app.services.embedding_service import get_embedding_service
+from app.services.semantic_analysis.lexicon_store import refresh_lexicon
+from app.services.semantic_analysis.parallel import shutdown_analysis_executor
 from app.api.endpoints import health, search, semantic, synthesis, state_sync, ingest, auth
 
 
@@ -17,12 +21,22 @@ async def lifespan(app: FastAPI):
     """
     # Startup
     print(f"Starting {settings.app_name} v{settings.app_version}")
+    # Start on the published symbol lexicon, if one has been published
+    await refresh_lexicon(force=True)
+    # Load the embedding model in the background; /ready reports when it is hot
+    warmup = None
+    if settings.embedding_warmup:
+        warmup = asyncio.create_task(asyncio.to_thread(get_embedding_service().warmup))
 
     yield
 
     # Shutdown
     print("Shutting down...")
+    if warmup is not None and not warmup.done():
+        warmup.cancel()
     await close_redis_client()
+    shutdown_analysis_executor()
+    await get_embedding_service().shutdown()
 
 
 # Create FastAPI application
@@ -13,8 +13,10 @@ from sqlalchemy import (
     JSON,
     Float,
     BigInteger,
+    LargeBinary,
+    UniqueConstraint,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 
 from app.db.session import Base
 
@@ -72,10 +74,13 @@ class Book(Base):
     content = Column(Text)
 
     # Hermetic metadata
-    hermetic_symbols = Column(JSON, default=list)  # List of detected symbols
+    hermetic_symbols = Column(JSON, default=list)  # [{symbol, category, count}, ...]
     elemental_energy = Column(JSON, default=dict)  # {fire: 0.3, water: 0.2, ...}
     correspondences = Column(JSON, default=list)  # List of detected correspondences
 
+    # Cumulative elemental counts for the energy timeline, loaded on demand
+    energy_profile = deferred(Column(LargeBinary))
+
     # Vector embeddings stored in Qdrant, reference ID here
     embedding_id = Column(String, index=True)
 
@@ -85,6 +90,31 @@ class Book(Base):
     # Relationships
     library_items = relationship("LibraryItem", back_populates="book")
     annotations = relationship("Annotation", back_populates="book")
+    symbol_postings = relationship(
+        "SymbolPosting", back_populates="book", cascade="all, delete-orphan"
+    )
+
+
+class SymbolPosting(Base):
+    """Positions of one hermetic symbol in one book, loaded on demand."""
+
+    __tablename__ = "symbol_postings"
+    __table_args__ = (UniqueConstraint("book_id", "symbol", name="uq_symbol_postings_book_symbol"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    book_id = Column(Integer, ForeignKey("books.id"), nullable=False, index=True)
+
+    symbol = Column(String, nullable=False)
+    category = Column(String, nullable=False)
+    count = Column(Integer, nullable=False)
+
+    # Delta-encoded little-endian uint32 character positions
+    positions = Column(LargeBinary, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    book = relationship("Book", back_populates="symbol_postings")
 
 
 class LibraryItem(Base):
@@ -2,9 +2,11 @@
 Pydantic schemas for API request/response validation.
 """
 from datetime import datetime
-from typing import Optional, Dict, List, Any
+from typing import Annotated, Optional, Dict, List, Any
 from pydantic import BaseModel, Field, EmailStr
 
+from app.core.config import settings
+
 
 # User schemas
 class UserBase(BaseModel):
@@ -70,9 +72,15 @@ class BookCreate(BookBase):
     content: str
 
 
+class SymbolCount(BaseModel):
+    symbol: str
+    category: str
+    count: int
+
+
 class BookResponse(BookBase):
     id: int
-    hermetic_symbols: List[str] = []
+    hermetic_symbols: List[SymbolCount] = []
     elemental_energy: Dict[str, float] = {}
     correspondences: List[str] = []
     created_at: datetime
@@ -93,10 +101,20 @@ class SearchRequest(BaseModel):
     offset: int = Field(default=0, ge=0)
 
 
+class PassageMatch(BaseModel):
+    book_id: int
+    score: float
+    chunk_index: Optional[int] = None
+    start: Optional[int] = None
+    end: Optional[int] = None
+
+
 class SearchResponse(BaseModel):
     results: List[BookResponse]
     total: int
     query: str
+    # Best matching passage of each result, in result order
+    matches: List[PassageMatch] = []
 
 
 # Library schemas
@@ -165,6 +183,16 @@ class SemanticAnalysisRequest(BaseModel):
     analyze_symbols: bool = True
     analyze_energy: bool = True
     analyze_correspondences: bool = True
+    profile: bool = Field(default=False, description="Include per-stage timings in seconds")
+
+
+class SemanticBatchAnalysisRequest(BaseModel):
+    texts: List[Annotated[str, Field(max_length=settings.analysis_batch_max_text_chars)]] = Field(
+        ..., min_length=1, max_length=settings.analysis_batch_max_texts
+    )
+    analyze_symbols: bool = True
+    analyze_energy: bool = True
+    analyze_correspondences: bool = True
 
 
 class HermeticSymbolDetail(BaseModel):
@@ -180,11 +208,39 @@ class CorrespondenceDetail(BaseModel):
     correspondences: List[str]
 
 
+class CooccurrencePassage(BaseModel):
+    start: int
+    end: int
+    positions: Dict[str, List[int]]
+    excerpt: str
+
+
+class CooccurrenceResponse(BaseModel):
+    book_id: int
+    symbols: List[str]
+    window: int
+    total: int
+    passages: List[CooccurrencePassage]
+
+
+class EnergyBucket(BaseModel):
+    start: int
+    end: int
+    energy: Dict[str, float]
+
+
+class EnergyProfileResponse(BaseModel):
+    book_id: int
+    token_count: int
+    buckets: List[EnergyBucket]
+
+
 class SemanticAnalysisResponse(BaseModel):
     hermetic_symbols: List[HermeticSymbolDetail]
     elemental_energy: Dict[str, float]
     correspondences: List[CorrespondenceDetail]
     summary: str
+    timings: Optional[Dict[str, float]] = None
 
 
 # Health check schema
@@ -195,3 +251,9 @@ class HealthResponse(BaseModel):
     redis: str
     qdrant: str
     timestamp: datetime
+
+
+class ReadinessResponse(BaseModel):
+    ready: bool
+    embedding: str
+    cold_start_seconds: Optional[float] = None
@@ -0,0 +1,260 @@
+"""
+Storage profiles of the Qdrant passage collection.
+
+A profile trades search recall and latency for memory:
+
+- ``float32``: full vectors in RAM (the original layout)
+- ``float16``: half-precision vectors in RAM, half the memory
+- ``int8``: int8 scalar-quantized vectors in RAM, a quarter of the memory,
+  with float32 originals memory-mapped from disk to rescore the top hits
+- ``on_disk``: float32 vectors memory-mapped from disk, RAM is only page cache
+
+The profile is chosen with ``QDRANT_COLLECTION_PROFILE``. New collections are
+created with it, and ``migrate_collection`` converts the collection behind
+the alias, switching the alias to a rebuilt copy when the datatype changes.
+"""
+from typing import Any, Dict, List, Optional, cast
+import re
+
+from qdrant_client import QdrantClient
+from qdrant_client import models
+
+COLLECTION_PROFILES: Dict[str, Dict[str, Any]] = {
+    "float32": {"datatype": "float32", "on_disk": False, "quantized": False},
+    "float16": {"datatype": "float16", "on_disk": False, "quantized": False},
+    "int8": {"datatype": "float32", "on_disk": True, "quantized": True},
+    "on_disk": {"datatype": "float32", "on_disk": True, "quantized": False},
+}
+
+# Points copied per scroll page when a collection has to be rebuilt
+MIGRATION_BATCH_SIZE = 512
+
+
+def get_profile(name: str) -> Dict[str, Any]:
+    """
+    Look up a collection profile.
+
+    Args:
+        name: Profile name
+
+    Returns:
+        The profile's ``datatype``, ``on_disk`` and ``quantized`` settings
+    """
+    if name not in COLLECTION_PROFILES:
+        raise ValueError(
+            f"Unknown collection profile {name!r}; expected one of {', '.join(COLLECTION_PROFILES)}"
+        )
+
+    return COLLECTION_PROFILES[name]
+
+
+def vector_params(name: str, size: int) -> models.VectorParams:
+    """Vector configuration of a new collection under a profile."""
+    profile = get_profile(name)
+    params: Dict[str, Any] = {
+        "size": size,
+        "distance": models.Distance.COSINE,
+        "on_disk": profile["on_disk"],
+    }
+    if profile["datatype"] == "float16":
+        params["datatype"] = models.Datatype.FLOAT16
+    return models.VectorParams(**params)
+
+
+def quantization_config(name: str) -> Optional[models.ScalarQuantization]:
+    """int8 scalar quantization kept in RAM, for quantized profiles."""
+    if not get_profile(name)["quantized"]:
+        return None
+
+    return models.ScalarQuantization(
+        scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8,
+            quantile=0.99,
+            always_ram=True,
+        )
+    )
+
+
+def search_params(name: str, oversampling: float) -> Optional[models.SearchParams]:
+    """
+    Search parameters of a profile.
+
+    Quantized profiles search the int8 vectors for ``oversampling`` times the
+    requested hits, then rescore those with the original vectors.
+    """
+    if not get_profile(name)["quantized"]:
+        return None
+
+    return models.SearchParams(
+        quantization=models.QuantizationSearchParams(rescore=True, oversampling=oversampling)
+    )
+
+
+def _stored_datatype(info: models.CollectionInfo) -> str:
+    datatype = getattr(info.config.params.vectors, "datatype", None)
+    return getattr(datatype, "value", datatype) or "float32"
+
+
+def _copy_pass(client: QdrantClient, source: str, target: str, missing_only: bool) -> int:
+    """Copy the points of ``source``, or only those missing from ``target``, once over."""
+    copied = 0
+    offset = None
+    while True:
+        # Catch-up passes scroll ids only and fetch vectors of the missing points
+        records, offset = client.scroll(
+            source,
+            limit=MIGRATION_BATCH_SIZE,
+            offset=offset,
+            with_payload=not missing_only,
+            with_vectors=not missing_only,
+        )
+        if missing_only and records:
+            ids = [record.id for record in records]
+            present = {
+                record.id
+                for record in client.retrieve(target, ids, with_payload=False, with_vectors=False)
+            }
+            missing = [point_id for point_id in ids if point_id not in present]
+            records = (
+                client.retrieve(source, missing, with_payload=True, with_vectors=True)
+                if missing
+                else []
+            )
+        if records:
+            client.upsert(
+                target,
+                points=models.Batch(
+                    ids=[record.id for record in records],
+                    vectors=cast(List[List[float]], [record.vector for record in records]),
+                    payloads=[record.payload or {} for record in records],
+                ),
+            )
+            copied += len(records)
+        if offset is None:
+            return copied
+
+
+def copy_points(client: QdrantClient, source: str, target: str) -> int:
+    """
+    Copy every point, vectors and payloads, from one collection into another.
+
+    Points added to ``source`` during the copy are caught up in further
+    passes over the points missing from ``target``, until one copies
+    nothing. Changes to points already copied, and deletions, are not.
+
+    Returns:
+        Number of points copied
+    """
+    copied = _copy_pass(client, source, target, missing_only=False)
+    while True:
+        caught_up = _copy_pass(client, source, target, missing_only=True)
+        if not caught_up:
+            return copied
+        copied += caught_up
+
+
+def _resolve(client: QdrantClient, alias: str) -> str:
+    """Collection an alias points to, or the name itself for an unaliased collection."""
+    for existing in client.get_aliases().aliases:
+        if existing.alias_name == alias:
+            return existing.collection_name
+    return alias
+
+
+def migrate_collection(client: QdrantClient, alias: str, name: str, size: int) -> str:
+    """
+    Convert the collection behind an alias to a profile.
+
+    Moving originals to or from disk and turning quantization on or off are
+    updated in place; Qdrant re-optimizes segments in the background. A
+    datatype change rebuilds: a new collection is created under the profile
+    beside the live one, with its payload indexes, the points are copied into
+    it and the alias is switched to it, so searches never see a partial
+    collection. Books ingested during the copy are caught up before the
+    switch, but workers keep writing to the collection they started on until
+    restarted, and re-ingested or deleted books are not carried over, so
+    pause ingestion from the migration until every worker has restarted;
+    then the previous collection can be deleted.
+
+    A collection left over under the target name by an earlier migration is
+    replaced, unless an alias still points to it. Workers pinned to it since
+    that migration must have been restarted.
+
+    Args:
+        client: Qdrant client
+        alias: Alias of the collection, e.g. ``QDRANT_COLLECTION_NAME``
+        name: Target profile name
+        size: Vector size
+
+    Returns:
+        ``updated``, ``rebuilt`` or ``unchanged``
+
+    Raises:
+        RuntimeError: If an alias points to the collection the rebuild would replace
+    """
+    # Imported here: the vector store builds its collections from these profiles
+    from app.services.vector_store.qdrant import QdrantVectorStore
+
+    profile = get_profile(name)
+    current = _resolve(client, alias)
+    info = client.get_collection(current)
+    vectors = info.config.params.vectors
+    if not isinstance(vectors, models.VectorParams):
+        raise ValueError(f"Collection {current} must have one unnamed vector")
+
+    if _stored_datatype(info) != profile["datatype"]:
+        base = re.sub(rf"__(?:{'|'.join(COLLECTION_PROFILES)})$", "", current)
+        target = QdrantVectorStore(f"{base}__{name}", client)
+        if client.collection_exists(target.collection_name):
+            served = [
+                alias_name
+                for alias_name, collection in target.aliases().items()
+                if collection == target.collection_name
+            ]
+            if served:
+                raise RuntimeError(
+                    f"Collection {target.collection_name} is still served by {', '.join(served)}"
+                )
+            # Left over from an earlier migration
+            client.delete_collection(target.collection_name)
+
+        client.create_collection(
+            target.collection_name,
+            vectors_config=vector_params(name, size),
+            quantization_config=quantization_config(name),
+        )
+        target.ensure_payload_indexes()
+        copy_points(client, current, target.collection_name)
+        target.switch_alias(alias)
+        return "rebuilt"
+
+    quantized = info.config.quantization_config is not None
+    if bool(vectors.on_disk) == profile["on_disk"] and quantized == profile["quantized"]:
+        return "unchanged"
+
+    client.update_collection(
+        current,
+        vectors_config={"": models.VectorParamsDiff(on_disk=profile["on_disk"])},
+        quantization_config=quantization_config(name) or models.Disabled.DISABLED,
+    )
+    return "updated"
+
+
+if __name__ == "__main__":
+    import sys
+
+    from app.core.config import settings
+
+    profile_name = sys.argv[1] if len(sys.argv) > 1 else settings.qdrant_collection_profile
+    qdrant = QdrantClient(
+        host=settings.qdrant_host,
+        port=settings.qdrant_port,
+        timeout=settings.qdrant_timeout,
+    )
+    previous = _resolve(qdrant, settings.qdrant_collection_name)
+    result = migrate_collection(
+        qdrant, settings.qdrant_collection_name, profile_name, settings.embedding_dimension
+    )
+    print(f"✅ Collection {settings.qdrant_collection_name} {result} ({profile_name} profile)")
+    if result == "rebuilt" and previous != settings.qdrant_collection_name:
+        print(f"Delete {previous} once every worker has restarted")
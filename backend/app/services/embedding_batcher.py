@@ -0,0 +1,89 @@
+"""
+Dynamic micro-batching of embedding requests.
+
+Concurrent callers each await one text. Texts that arrive within a short
+window, up to a maximum batch size, are encoded together in a single call on
+a dedicated inference thread, and every caller's future is resolved with its
+own vector. The event loop never runs the model itself.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import asyncio
+
+EncodeBatch = Callable[[List[str]], Sequence[List[float]]]
+
+
+class EmbeddingBatcher:
+    """Collects concurrent embedding requests into batched encode calls."""
+
+    def __init__(self, encode: EncodeBatch, max_batch_size: int, window_ms: float):
+        self.encode = encode
+        self.max_batch_size = max_batch_size
+        self.window = window_ms / 1000
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding")
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.stats = {"requests": 0, "batches": 0}
+
+    async def embed(self, text: str) -> List[float]:
+        """
+        Embed one text as part of the next batch.
+
+        Args:
+            text: Input text to embed
+
+        Returns:
+            The embedding vector of the text
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        self.stats["requests"] += 1
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        vector: List[float] = await future
+        return vector
+
+    def _flush(self) -> None:
+        """Send the pending texts to the inference thread as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        self.stats["batches"] += 1
+        loop = asyncio.get_running_loop()
+        done = loop.run_in_executor(self._executor, self.encode, [text for text, _ in batch])
+        done.add_done_callback(lambda result: self._resolve(batch, result))
+
+    @staticmethod
+    def _resolve(batch: List[Tuple[str, asyncio.Future]], result: asyncio.Future) -> None:
+        """Hand each caller its vector, or the batch's error."""
+        error = result.exception()
+        vectors = [] if error else result.result()
+        for index, (_, future) in enumerate(batch):
+            if future.done():
+                continue  # Caller went away
+            if error:
+                future.set_exception(error)
+            else:
+                future.set_result(vectors[index])
+
+    def metrics(self) -> Dict[str, Any]:
+        """Request and batch counters."""
+        batches = self.stats["batches"]
+        return {
+            **self.stats,
+            "mean_batch_size": round(self.stats["requests"] / batches, 2) if batches else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the inference thread after the running batch."""
+        self._executor.shutdown(wait=False)
@@ -1,68 +1,189 @@
 """
 Vector embeddings service for semantic search.
-Uses sentence-transformers for generating embeddings and Qdrant for storage.
+Uses sentence-transformers for generating embeddings and a vector store,
+Qdrant or the local NumPy store, for storage.
 """
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Sequence, Tuple
+from itertools import islice
+import asyncio
 from sentence_transformers import SentenceTransformer
-from qdrant_client import QdrantClient
-from qdrant_client.models import (
-    Distance,
-    VectorParams,
-    PointStruct,
-    Filter,
-    FieldCondition,
-    MatchValue,
-)
+import threading
+import torch
+import time
 import uuid
 
 from app.core.config import settings
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.embedding_store import EmbeddingStore
+from app.services.passages import iter_passages, regex_token_spans
+from app.services.query_embedding_cache import QueryEmbeddingCache, normalize_query
+from app.services.vector_store.base import PAYLOAD_INDEXES, VectorStore
+from app.services.vector_store.local import LocalVectorStore
+from app.services.vector_store.qdrant import QdrantVectorStore, versioned_collection_name
+
+# Payload kept with each point in lean mode: the filterable fields and the
+# book and character offsets that reference the embedded text
+LEAN_PAYLOAD_FIELDS = (*PAYLOAD_INDEXES, "chunk_index", "start", "end")
+
+# Namespace of the deterministic point IDs of book passages
+PASSAGE_ID_NAMESPACE = uuid.UUID("5b0e7c1e-2f4d-4c8e-9a51-0f1e2d3c4b5a")
 
 
 class EmbeddingService:
     """Service for generating and managing text embeddings."""
 
-    def __init__(self):
-        self.model = None
-        self.client = None
+    def __init__(self) -> None:
+        self.model: Any = None
+        self.vector_store: Optional[VectorStore] = None
         self.collection_name = settings.qdrant_collection_name
         self._initialized = False
+        self._init_lock = threading.Lock()
+        # cold, warming, ready or failed
+        self.readiness = "cold"
+        self.cold_start_seconds: Optional[float] = None
+        self._query_batcher: Optional[EmbeddingBatcher] = None
+        self.embedding_store: Optional[EmbeddingStore] = None
+        self.query_cache = QueryEmbeddingCache(
+            max_entries=settings.query_embedding_cache_size,
+            ttl=settings.query_embedding_cache_ttl,
+            use_redis=settings.query_embedding_cache_redis,
+        )
 
     def _initialize(self) -> None:
-        """Lazy initialization of the embedding service."""
+        """
+        Lazy initialization of the embedding service.
+
+        Single-flight: concurrent first callers wait for one load instead of
+        each loading the model. Sets ``readiness`` to ``warming`` while loading,
+        then ``ready``, or ``failed``; a failed load is retried by the next caller.
+        Under ``warmup`` the service is ready only after its first encode.
+        """
         if self._initialized:
             return
 
-        try:
-            self.model = SentenceTransformer(settings.embedding_model)
-            self.client = QdrantClient(
-                host=settings.qdrant_host,
-                port=settings.qdrant_port,
-            )
-            self._ensure_collection()
+        with self._init_lock:
+            if self._initialized:
+                return
+
+            for_warmup = self.readiness == "warming"
+            self.readiness = "warming"
+            try:
+                self.model = self._load_model()
+                self.vector_store = self._connect_vector_store()
+            except Exception as e:
+                print(f"Warning: Failed to initialize embedding service: {e}")
+                print("Embedding features will be disabled")
+                self.readiness = "failed"
+                return
+
+            if settings.embedding_store_path:
+                try:
+                    self.embedding_store = EmbeddingStore(
+                        settings.embedding_store_path,
+                        self.encoder_name,
+                        settings.embedding_dimension,
+                        settings.embedding_store_dtype,
+                    )
+                except Exception as e:
+                    print(f"Warning: Failed to open embedding store: {e}")
+
             self._initialized = True
+            if not for_warmup:
+                self.readiness = "ready"
+
+    def _load_model(self) -> Any:
+        """
+        Load the model on the configured inference backend.
+
+        The ONNX backend falls back to PyTorch when ONNX Runtime is missing or
+        no export of the model keeps its vectors close enough to PyTorch's.
+        """
+        if settings.embedding_backend == "onnx":
+            try:
+                from app.services.onnx_encoder import load_onnx_encoder
+
+                return load_onnx_encoder(
+                    settings.embedding_model,
+                    settings.embedding_onnx_path,
+                    quantize=settings.embedding_onnx_quantize,
+                    min_cosine=settings.embedding_onnx_min_cosine,
+                    threads=settings.embedding_threads,
+                )
+            except Exception as e:
+                print(f"Warning: ONNX embedding backend unavailable ({e}), using PyTorch")
+
+        if settings.embedding_threads:
+            torch.set_num_threads(settings.embedding_threads)
+        return SentenceTransformer(settings.embedding_model)
+
+    @property
+    def encoder_name(self) -> str:
+        """
+        The model, qualified by its inference backend unless that is PyTorch.
+
+        Backends produce slightly different vectors, so caches of vectors are
+        keyed by this rather than the model name alone.
+        """
+        backend = getattr(self.model, "backend", None)
+        return f"{settings.embedding_model}.{backend}" if backend else settings.embedding_model
+
+    def warmup(self) -> bool:
+        """
+        Load the model and run a first encode, so no request pays for either.
+
+        Blocking; run it off the event loop. Sets ``readiness`` to ``ready``,
+        or ``failed`` if the model could not be loaded.
+
+        Returns:
+            True if the service is ready
+        """
+        self.readiness = "warming"
+        started = time.perf_counter()
+        try:
+            self._initialize()
+            self.generate_embeddings(["warmup"])
         except Exception as e:
-            print(f"Warning: Failed to initialize embedding service: {e}")
-            print("Embedding features will be disabled")
+            print(f"Warning: Embedding warmup failed: {e}")
+            self.readiness = "failed"
+            return False
 
-    def _ensure_collection(self) -> None:
-        """Ensure the Qdrant collection exists."""
-        if not self.client:
-            return
+        self.cold_start_seconds = round(time.perf_counter() - started, 3)
+        self.readiness = "ready"
+        print(f"Embedding model {settings.embedding_model} ready in {self.cold_start_seconds}s")
+        return True
 
+    def _connect_vector_store(self) -> VectorStore:
+        """
+        Open the configured vector store and ensure its collection exists.
+
+        When Qdrant is unreachable and ``vector_store_fallback`` is set, the
+        service degrades to the local store instead of disabling search. A
+        collection of another dimension is a configuration error, not an outage,
+        and is never papered over with the local store.
+        """
+        local = LocalVectorStore(self.collection_name, settings.local_vector_store_path)
+        if settings.vector_store_backend == "local":
+            local.ensure_collection(settings.embedding_dimension)
+            return local
+
+        store = QdrantVectorStore.from_settings(
+            self.collection_name,
+            versioned_collection_name(
+                self.collection_name, settings.embedding_model, settings.embedding_dimension
+            ),
+        )
         try:
-            collections = self.client.get_collections()
-            collection_names = [col.name for col in collections.collections]
-
-            if self.collection_name not in collection_names:
-                self.client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=VectorParams(
-                        size=settings.embedding_dimension,
-                        distance=Distance.COSINE,
-                    ),
-                )
+            store.ensure_collection(settings.embedding_dimension)
+            return store
+        except ValueError:
+            raise
         except Exception as e:
-            print(f"Warning: Failed to ensure collection: {e}")
+            if not settings.vector_store_fallback:
+                raise
+            print(f"Warning: Qdrant unavailable ({e}), falling back to the local vector store")
+
+        local.ensure_collection(settings.embedding_dimension)
+        return local
 
     def generate_embedding(self, text: str) -> List[float]:
         """
@@ -78,8 +199,263 @@ class EmbeddingService:
         if not self.model:
             raise RuntimeError("Embedding service not initialized - model not available")
 
-        embedding = self.model.encode(text, convert_to_numpy=True)
-        return embedding.tolist()
+        embedding: List[float] = self.model.encode(text, convert_to_numpy=True).tolist()
+        return embedding
+
+    async def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a search query without blocking the event loop.
+
+        Queries are normalized and looked up in the query cache first. Misses
+        are micro-batched with concurrent queries into one encode call on the
+        inference thread.
+
+        Args:
+            text: Query text
+
+        Returns:
+            The query's embedding vector
+        """
+        # The cache key depends on the backend the model was loaded on
+        if not self._initialized:
+            await asyncio.to_thread(self._initialize)
+        query = normalize_query(text)
+        key = self.query_cache.make_key(query, self.encoder_name)
+
+        cached: Optional[List[float]] = await self.query_cache.get(key)
+        if cached is not None:
+            return cached
+
+        if self._query_batcher is None:
+            self._query_batcher = EmbeddingBatcher(
+                self.generate_embeddings,
+                max_batch_size=settings.query_batch_max_size,
+                window_ms=settings.query_batch_window_ms,
+            )
+        embedding: List[float] = await self._query_batcher.embed(query)
+        await self.query_cache.set(key, embedding)
+        return embedding
+
+    def generate_embeddings(
+        self,
+        texts: Sequence[str],
+        batch_size: Optional[int] = None,
+    ) -> List[List[float]]:
+        """
+        Generate embedding vectors for many texts in batched forward passes.
+
+        Args:
+            texts: Input texts to embed
+            batch_size: Texts per forward pass, defaults to ``embedding_batch_size``
+
+        Returns:
+            One embedding vector per text, in input order
+        """
+        self._initialize()
+        if not self.model:
+            raise RuntimeError("Embedding service not initialized - model not available")
+        if not texts:
+            return []
+
+        # sentence-transformers groups texts of similar length into each batch
+        embeddings: List[List[float]] = self.model.encode(
+            list(texts),
+            batch_size=batch_size or settings.embedding_batch_size,
+            convert_to_numpy=True,
+        ).tolist()
+        return embeddings
+
+    def embed_documents(self, texts: Sequence[str]) -> List[List[float]]:
+        """
+        Embed document texts, reusing vectors from the embedding store.
+
+        Only texts missing from the store are encoded, and their vectors are
+        added to it. Without a configured store this is generate_embeddings.
+
+        Args:
+            texts: Input texts to embed
+
+        Returns:
+            One embedding vector per text, in input order
+        """
+        self._initialize()
+        if self.embedding_store is None:
+            return self.generate_embeddings(texts)
+
+        stored = self.embedding_store.get_many(texts)
+        missing = [index for index, vector in enumerate(stored) if vector is None]
+        vectors = [[] if vector is None else vector.tolist() for vector in stored]
+        if missing:
+            encoded = self.generate_embeddings([texts[index] for index in missing])
+            self.embedding_store.put_many([texts[index] for index in missing], encoded)
+            for index, vector in zip(missing, encoded):
+                vectors[index] = vector
+
+        return vectors
+
+    def store_embeddings(
+        self,
+        items: Iterable[Dict[str, Any]],
+        batch_size: Optional[int] = None,
+    ) -> List[str]:
+        """
+        Generate and store many embeddings in the vector store with bulk upserts.
+
+        Vectors already in the embedding store are reused rather than encoded.
+        Items are consumed lazily, one upsert batch at a time, so a generator
+        of passages is stored in bounded memory.
+
+        Args:
+            items: Dicts with ``text``, ``metadata`` and an optional ``embedding_id``
+            batch_size: Points per upsert request, defaults to ``qdrant_upsert_batch_size``
+
+        Returns:
+            The IDs of the stored embeddings, in input order
+        """
+        batch_size = batch_size or settings.qdrant_upsert_batch_size
+        embedding_ids: List[str] = []
+        items = iter(items)
+
+        while True:
+            chunk = list(islice(items, batch_size))
+            if not chunk:
+                break
+
+            chunk_ids = [item.get("embedding_id") or str(uuid.uuid4()) for item in chunk]
+            vectors = self.embed_documents([item["text"] for item in chunk])
+
+            self._store().upsert(chunk_ids, vectors, self._payloads(chunk))
+            embedding_ids.extend(chunk_ids)
+
+        return embedding_ids
+
+    async def store_embeddings_async(
+        self,
+        items: Iterable[Dict[str, Any]],
+        batch_size: Optional[int] = None,
+        store: Optional[VectorStore] = None,
+    ) -> List[str]:
+        """
+        Awaitable store_embeddings.
+
+        Passage chunking and encoding run in a worker thread, and upserts are
+        awaited, so the event loop stays free throughout.
+
+        Args:
+            items: Dicts with ``text``, ``metadata`` and an optional ``embedding_id``
+            batch_size: Points per upsert request, defaults to ``qdrant_upsert_batch_size``
+            store: Store to write to instead of the service's, e.g. a reindex target
+
+        Returns:
+            The IDs of the stored embeddings, in input order
+        """
+        batch_size = batch_size or settings.qdrant_upsert_batch_size
+        embedding_ids: List[str] = []
+        items = iter(items)
+
+        while True:
+            chunk = await asyncio.to_thread(lambda: list(islice(items, batch_size)))
+            if not chunk:
+                break
+
+            chunk_ids = [item.get("embedding_id") or str(uuid.uuid4()) for item in chunk]
+            vectors = await asyncio.to_thread(
+                self.embed_documents, [item["text"] for item in chunk]
+            )
+
+            await (store or self._store()).upsert_async(chunk_ids, vectors, self._payloads(chunk))
+            embedding_ids.extend(chunk_ids)
+
+        return embedding_ids
+
+    def _store(self) -> VectorStore:
+        """The vector store, or an error if the service could not initialize."""
+        if self.vector_store is None:
+            raise RuntimeError("Embedding service not initialized - vector store not available")
+        return self.vector_store
+
+    @staticmethod
+    def _payloads(chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Payloads of stored items.
+
+        In lean mode only the filterable and reference fields of the metadata
+        are kept; the text itself stays in the database. Otherwise the text is
+        stored with all of the metadata.
+        """
+        if settings.lean_payloads:
+            return [
+                {
+                    key: value
+                    for key, value in item["metadata"].items()
+                    if key in LEAN_PAYLOAD_FIELDS
+                }
+                for item in chunk
+            ]
+        return [{"text": item["text"], **item["metadata"]} for item in chunk]
+
+    def token_spans(self, text: str) -> Sequence[Tuple[int, int]]:
+        """Character spans of the model's tokens in a text."""
+        tokenizer = getattr(self.model, "tokenizer", None)
+        if tokenizer is None or not getattr(tokenizer, "is_fast", False):
+            return regex_token_spans(text)
+
+        encoding = tokenizer(
+            text, add_special_tokens=False, return_offsets_mapping=True, verbose=False
+        )
+        spans: Sequence[Tuple[int, int]] = encoding["offset_mapping"]
+        return spans
+
+    def passage_chunk_tokens(self) -> int:
+        """Tokens per passage: the configured size, else the model's sequence length."""
+        if settings.passage_chunk_tokens:
+            return settings.passage_chunk_tokens
+
+        max_length = getattr(self.model, "max_seq_length", None) or 256
+        return max_length - 2  # Room for the [CLS] and [SEP] tokens
+
+    @staticmethod
+    def passage_id(book_id: int, chunk_index: int) -> str:
+        """Deterministic point ID of a book passage, so re-embedding overwrites it."""
+        return str(uuid.uuid5(PASSAGE_ID_NAMESPACE, f"{book_id}:{chunk_index}"))
+
+    def iter_passage_items(
+        self,
+        book_id: int,
+        text: str,
+        metadata: Dict[str, Any],
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Split a book into passages ready for store_embeddings.
+
+        Args:
+            book_id: Book ID
+            text: Full book text
+            metadata: Metadata stored with every passage
+
+        Yields:
+            Items whose metadata carries ``book_id``, ``chunk_index`` and the
+            passage's ``start`` / ``end`` character offsets
+        """
+        self._initialize()
+        passages = iter_passages(
+            text,
+            self.token_spans,
+            self.passage_chunk_tokens(),
+            settings.passage_overlap_tokens,
+        )
+        for passage in passages:
+            yield {
+                "text": passage["text"],
+                "metadata": {
+                    **metadata,
+                    "book_id": book_id,
+                    "chunk_index": passage["chunk_index"],
+                    "start": passage["start"],
+                    "end": passage["end"],
+                },
+                "embedding_id": self.passage_id(book_id, passage["chunk_index"]),
+            }
 
     def store_embedding(
         self,
@@ -88,7 +464,7 @@ class EmbeddingService:
         embedding_id: Optional[str] = None,
     ) -> str:
         """
-        Generate and store embedding in Qdrant.
+        Generate and store embedding in the vector store.
 
         Args:
             text: Text to embed and store
@@ -98,26 +474,8 @@ class EmbeddingService:
         Returns:
             The ID of the stored embedding
         """
-        if embedding_id is None:
-            embedding_id = str(uuid.uuid4())
-
-        embedding = self.generate_embedding(text)
-
-        point = PointStruct(
-            id=embedding_id,
-            vector=embedding,
-            payload={
-                "text": text,
-                **metadata,
-            },
-        )
-
-        self.client.upsert(
-            collection_name=self.collection_name,
-            points=[point],
-        )
-
-        return embedding_id
+        items = [{"text": text, "metadata": metadata, "embedding_id": embedding_id}]
+        return self.store_embeddings(items)[0]
 
     def search_similar(
         self,
@@ -138,42 +496,94 @@ class EmbeddingService:
         """
         query_embedding = self.generate_embedding(query)
 
-        # Build Qdrant filter if provided
-        qdrant_filter = None
-        if filters:
-            conditions = []
-            for key, value in filters.items():
-                conditions.append(
-                    FieldCondition(
-                        key=key,
-                        match=MatchValue(value=value),
-                    )
-                )
-            if conditions:
-                qdrant_filter = Filter(must=conditions)
-
-        results = self.client.search(
-            collection_name=self.collection_name,
-            query_vector=query_embedding,
-            limit=limit,
-            query_filter=qdrant_filter,
-        )
+        results = self._store().search(query_embedding, limit, filters)
 
         return [
             {
-                "id": result.id,
-                "score": result.score,
-                "metadata": result.payload,
+                "id": result["id"],
+                "score": result["score"],
+                "metadata": result["payload"],
             }
             for result in results
         ]
 
+    def search_books(
+        self,
+        query: str,
+        limit: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Search books by their best matching passage.
+
+        Passage hits are grouped by ``book_id`` in the vector store, so each book
+        appears once, ranked by its best passage.
+
+        Args:
+            query: Search query text
+            limit: Maximum number of books
+            filters: Optional filters for metadata
+            query_embedding: Precomputed embedding of the query, e.g. from embed_query
+
+        Returns:
+            List of book results with the score, chunk index and character
+            offsets of their best passage
+        """
+        if query_embedding is None:
+            query_embedding = self.generate_embedding(query)
+
+        groups = self._store().search_groups(query_embedding, "book_id", limit, filters)
+        return self._book_results(groups)
+
+    async def search_books_async(
+        self,
+        query_embedding: List[float],
+        limit: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Awaitable search_books.
+
+        Args:
+            query_embedding: Embedding of the query, e.g. from embed_query
+            limit: Maximum number of books
+            filters: Optional filters for metadata
+
+        Returns:
+            List of book results, as search_books
+        """
+        if not self._initialized:
+            # A cold start can take seconds, or wait on warmup's lock; keep it off the loop
+            await asyncio.to_thread(self._initialize)
+        groups = await self._store().search_groups_async(query_embedding, "book_id", limit, filters)
+        return self._book_results(groups)
+
+    @staticmethod
+    def _book_results(groups: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Book results from the best passage of each ``book_id`` group."""
+        return [
+            {
+                "book_id": best["group"],
+                "score": best["score"],
+                "chunk_index": best["payload"].get("chunk_index"),
+                "start": best["payload"].get("start"),
+                "end": best["payload"].get("end"),
+            }
+            for best in groups
+        ]
+
     def delete_embedding(self, embedding_id: str) -> None:
-        """Delete an embedding from Qdrant."""
-        self.client.delete(
-            collection_name=self.collection_name,
-            points_selector=[embedding_id],
-        )
+        """Delete an embedding from the vector store."""
+        self._store().delete([embedding_id])
+
+    async def shutdown(self) -> None:
+        """Stop the query inference thread and close the vector store."""
+        if self._query_batcher is not None:
+            self._query_batcher.shutdown()
+            self._query_batcher = None
+        if self.vector_store is not None:
+            await self.vector_store.close()
 
     def update_embedding(
         self,
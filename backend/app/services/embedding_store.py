@@ -0,0 +1,158 @@
+"""
+Persistent content-addressed store of computed embeddings.
+
+Every embedded text is kept under a hash of (model name, text), so
+re-ingesting a book or rebuilding Qdrant reads vectors from disk instead of
+running the model again. Backends' vectors differ slightly, so the name is
+qualified by the inference backend unless that is PyTorch, e.g.
+``all-MiniLM-L6-v2.onnx-int8``.
+
+On disk, one pair of append-only files per model and backend, dimension and dtype:
+
+- ``.vectors``: raw little-endian rows, memory-mapped for zero-copy reads
+- ``.index``: 28-byte records, a 20-byte blake2b key then the ``<Q`` row number
+
+Appends hold an exclusive ``flock`` and write vectors before their index
+records, so concurrent writers never clash. A crash leaves at most unindexed
+rows after the last indexed one, and the next append starts right after that
+indexed row, so it overwrites them.
+"""
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import fcntl
+import hashlib
+import os
+import re
+import struct
+
+import numpy as np
+
+_KEY_SIZE = 20
+_RECORD = struct.Struct(f"<{_KEY_SIZE}sQ")
+
+
+class EmbeddingStore:
+    """Memory-mapped, content-addressed vector store for one model."""
+
+    def __init__(self, path: str, model_name: str, dimension: int, dtype: str = "float32"):
+        self.model_name = model_name
+        self.dimension = dimension
+        self.dtype = np.dtype(dtype).newbyteorder("<")
+        self.row_bytes = self.dimension * self.dtype.itemsize
+
+        directory = Path(path)
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name)}-{dimension}-{self.dtype.name}"
+        self.vectors_path = directory / f"{stem}.vectors"
+        self.index_path = directory / f"{stem}.index"
+        self.vectors_path.touch(exist_ok=True)
+        self.index_path.touch(exist_ok=True)
+
+        self._rows: Dict[bytes, int] = {}
+        self._index_offset = 0
+        self._vectors: Optional[np.memmap] = None
+        self.stats = {"hits": 0, "misses": 0, "writes": 0}
+        self._read_index()
+
+    def make_key(self, text: str) -> bytes:
+        """Content address of a text under this store's model."""
+        digest = hashlib.blake2b(digest_size=_KEY_SIZE)
+        digest.update(self.model_name.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8", "surrogatepass"))
+        return digest.digest()
+
+    def _read_index(self) -> None:
+        """Load index records appended since the last read, by any process."""
+        with open(self.index_path, "rb") as index:
+            index.seek(self._index_offset)
+            data = index.read()
+
+        usable = len(data) - len(data) % _RECORD.size
+        for key, row in _RECORD.iter_unpack(data[:usable]):
+            self._rows[key] = row
+        self._index_offset += usable
+
+    def _mapped(self, row: int) -> np.memmap:
+        """Memory map of the vectors file, remapped when it no longer covers ``row``."""
+        if self._vectors is None or row >= len(self._vectors):
+            rows = os.path.getsize(self.vectors_path) // self.row_bytes
+            self._vectors = np.memmap(
+                self.vectors_path, dtype=self.dtype, mode="r", shape=(rows, self.dimension)
+            )
+        return self._vectors
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up stored vectors.
+
+        Args:
+            texts: Texts to look up
+
+        Returns:
+            Per text, a read-only view of its vector in the mapped file, or
+            None if it was never stored
+        """
+        keys = [self.make_key(text) for text in texts]
+        if any(key not in self._rows for key in keys):
+            self._read_index()
+
+        vectors: List[Optional[np.ndarray]] = []
+        for key in keys:
+            row = self._rows.get(key)
+            if row is None:
+                self.stats["misses"] += 1
+                vectors.append(None)
+            else:
+                self.stats["hits"] += 1
+                vectors.append(self._mapped(row)[row])
+        return vectors
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        """
+        Store vectors of texts not stored yet.
+
+        Args:
+            texts: Embedded texts
+            vectors: Their vectors, in the same order
+        """
+        new: Dict[bytes, Sequence[float]] = {}
+        for text, vector in zip(texts, vectors):
+            key = self.make_key(text)
+            if key not in self._rows:
+                new[key] = vector
+        if not new:
+            return
+
+        with open(self.index_path, "ab") as index, open(self.vectors_path, "r+b") as data:
+            fcntl.flock(index, fcntl.LOCK_EX)
+            try:
+                # Another process may have stored some of them meanwhile
+                self._read_index()
+                new = {key: vector for key, vector in new.items() if key not in self._rows}
+                if not new:
+                    return
+
+                # Rows past the last indexed one were orphaned by a crash; never
+                # shrink the file, other processes may have it mapped
+                first_row = max(self._rows.values(), default=-1) + 1
+                rows = np.asarray(list(new.values()), dtype=self.dtype)
+                data.seek(first_row * self.row_bytes)
+                data.write(rows.tobytes())
+                data.flush()
+                os.fsync(data.fileno())
+
+                index.write(b"".join(_RECORD.pack(key, first_row + i) for i, key in enumerate(new)))
+                index.flush()
+            finally:
+                fcntl.flock(index, fcntl.LOCK_UN)
+
+        self._read_index()
+        self.stats["writes"] += len(new)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def metrics(self) -> Dict[str, int]:
+        """Lookup and write counters and the number of stored vectors."""
+        return {**self.stats, "vectors": len(self)}
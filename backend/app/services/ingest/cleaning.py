@@ -0,0 +1,181 @@
+"""
+Streaming cleanup of Project Gutenberg plain-text files.
+
+Raw Gutenberg files wrap the book in a license header and footer, mix line
+endings and arrive in several encodings. The cleaner decodes the download
+chunk by chunk, keeps only the text between the START and END markers,
+normalizes it to NFC with ``\\n`` line endings and collapsed whitespace, and
+counts the bytes it removed. Files without a declared encoding are read as
+UTF-8, falling back to Windows-1252 from the first undecodable byte on.
+"""
+from typing import Iterable, List, Optional
+import codecs
+import re
+import unicodedata
+
+GUTENBERG_START_MARKER = re.compile(
+    r"^\*{3}\s*START OF (?:THE|THIS) PROJECT GUTENBERG E-?BOOK", re.IGNORECASE
+)
+GUTENBERG_END_MARKER = re.compile(
+    r"^(?:\*{3}\s*END OF (?:THE|THIS) PROJECT GUTENBERG E-?BOOK"
+    r"|End of (?:the |this )?Project Gutenberg'?s? E-?Book)",
+    re.IGNORECASE,
+)
+HORIZONTAL_SPACE = re.compile(r"[^\S\n]+")
+
+FALLBACK_ENCODING = "cp1252"
+
+# Header text buffered while looking for the START marker; past this the file
+# is assumed to have no header and everything is kept
+GUTENBERG_HEADER_MAX_CHARS = 64 * 1024
+
+
+class GutenbergTextCleaner:
+    """
+    Incremental cleaner for one Gutenberg file.
+
+    Feed raw chunks in order with ``feed`` and call ``finish`` once; the
+    concatenation of their return values is the cleaned text.
+    """
+
+    def __init__(self, encoding: Optional[str] = None):
+        # Undeclared files may still fall back to FALLBACK_ENCODING
+        self._can_fall_back = encoding is None
+        encoding = encoding or "utf-8"
+        if codecs.lookup(encoding).name == "utf-8":
+            encoding = "utf-8-sig"  # Also drops a leading byte order mark
+        errors = "strict" if self._can_fall_back else "replace"
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+        self._pending = ""
+        self._header: Optional[List[str]] = []
+        self._header_chars = 0
+        self._ended = False
+        self._started = False
+        self._blank_pending = False
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    @property
+    def bytes_saved(self) -> int:
+        """Bytes removed so far, comparing raw input with UTF-8 output."""
+        return self.bytes_in - self.bytes_out
+
+    def feed(self, chunk: bytes) -> str:
+        """
+        Clean the next raw chunk.
+
+        Args:
+            chunk: Raw bytes of the file, in order
+
+        Returns:
+            Cleaned text of the lines completed by this chunk
+        """
+        self.bytes_in += len(chunk)
+        return self._count(self._feed_text(self._decode(chunk)))
+
+    def finish(self) -> str:
+        """
+        Flush the remaining input.
+
+        Returns:
+            Cleaned text of the final line, plus any header that turned out
+            not to be followed by a START marker
+        """
+        text = self._decode(b"", final=True)
+        lines = (self._pending + text).splitlines()
+        self._pending = ""
+
+        cleaned = self._clean_lines(lines)
+        if self._header is not None:
+            # No START marker anywhere: the whole file is content
+            cleaned = self._release_header() + cleaned
+        return self._count(cleaned)
+
+    def _decode(self, chunk: bytes, final: bool = False) -> str:
+        """Decode a chunk, switching to the fallback encoding on invalid UTF-8."""
+        if not self._can_fall_back:
+            return self._decoder.decode(chunk, final)
+
+        try:
+            return self._decoder.decode(chunk, final)
+        except UnicodeDecodeError as err:
+            # err.object is the buffered bytes plus the chunk, past any byte order mark;
+            # the bytes before the bad one are valid UTF-8
+            self._can_fall_back = False
+            self._decoder = codecs.getincrementaldecoder(FALLBACK_ENCODING)(errors="replace")
+            valid = err.object[: err.start].decode("utf-8")
+            return valid + self._decoder.decode(err.object[err.start :], final)
+
+    def _count(self, cleaned: str) -> str:
+        """Account for emitted text in bytes_out."""
+        self.bytes_out += len(cleaned.encode("utf-8"))
+        return cleaned
+
+    def _feed_text(self, text: str) -> str:
+        """Split decoded text into complete lines and clean them."""
+        lines = (self._pending + text).splitlines(keepends=True)
+        # The last line may continue in the next chunk, and "\r" may be half of "\r\n"
+        if lines and not lines[-1].endswith("\n"):
+            self._pending = lines.pop()
+        else:
+            self._pending = ""
+
+        return self._clean_lines([line.splitlines()[0] for line in lines])
+
+    def _clean_lines(self, lines: Iterable[str]) -> str:
+        """Apply the marker state machine and normalization to whole lines."""
+        output: List[str] = []
+        for line in lines:
+            if self._ended:
+                break
+
+            if self._header is not None:
+                if GUTENBERG_START_MARKER.match(line):
+                    self._header = None
+                    continue
+
+                self._header.append(line)
+                self._header_chars += len(line)
+                if self._header_chars > GUTENBERG_HEADER_MAX_CHARS:
+                    output.append(self._release_header())
+                continue
+
+            if GUTENBERG_END_MARKER.match(line):
+                self._ended = True
+                break
+
+            output.append(self._normalize_line(line))
+
+        return "".join(output)
+
+    def _release_header(self) -> str:
+        """Emit buffered header lines as content."""
+        lines, self._header = self._header or [], None
+        return "".join(self._normalize_line(line) for line in lines)
+
+    def _normalize_line(self, line: str) -> str:
+        """Normalize one line; runs of blank lines become one, leading and trailing ones go."""
+        line = HORIZONTAL_SPACE.sub(" ", unicodedata.normalize("NFC", line)).strip()
+        if not line:
+            self._blank_pending = self._started
+            return ""
+
+        separator = "\n" if self._blank_pending else ""
+        self._started = True
+        self._blank_pending = False
+        return separator + line + "\n"
+
+
+def clean_gutenberg_text(raw: bytes, encoding: Optional[str] = None) -> str:
+    """
+    Clean a complete Gutenberg file held in memory.
+
+    Args:
+        raw: Raw bytes of the file
+        encoding: Declared encoding, defaults to UTF-8
+
+    Returns:
+        Cleaned book text
+    """
+    cleaner = GutenbergTextCleaner(encoding)
+    return cleaner.feed(raw) + cleaner.finish()
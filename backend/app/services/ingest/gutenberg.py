@@ -1,13 +1,46 @@
 """
 Book ingestion service for importing books from external sources.
 """
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable, Iterator, cast
+import asyncio
 import httpx
 from sqlalchemy.orm import Session
 
 from app.models.models import Book
-from app.services.embedding_service import get_embedding_service
+from app.services.embedding_service import EmbeddingService, get_embedding_service
+from app.services.ingest.cleaning import GutenbergTextCleaner
 from app.services.semantic_analysis.analyzer import get_semantic_analyzer
+from app.services.semantic_analysis.cache import analyze_text_cached
+from app.services.semantic_analysis.energy_profile import build_energy_profile
+from app.services.semantic_analysis.parallel import get_analysis_executor
+from app.services.semantic_analysis.postings import build_symbol_postings, symbol_counts
+
+
+def iter_book_passage_items(
+    books: Iterable[Book], embedding_service: Optional[EmbeddingService] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Passages of whole books, ready for store_embeddings.
+
+    Args:
+        books: Books to split
+        embedding_service: Service whose tokenizer splits them, the shared one by default
+
+    Yields:
+        Passage items of every book in turn, with the book's filterable metadata
+    """
+    embedding_service = embedding_service or get_embedding_service()
+    for book in books:
+        yield from embedding_service.iter_passage_items(
+            cast(int, book.id),
+            cast(str, book.content or book.description or book.title),
+            {
+                "title": book.title,
+                "author": book.author,
+                "source": book.source,
+                "language": book.language,
+            },
+        )
 
 
 class BookIngestService:
@@ -53,40 +86,70 @@ class BookIngestService:
         gutenberg_id: int,
     ) -> Optional[str]:
         """
-        Fetch full text of a book from Gutenberg.
+        Fetch the full text of a book from Gutenberg, cleaned while it streams in.
 
         Args:
             gutenberg_id: Gutenberg book ID
 
         Returns:
-            Full text content or None if not available
+            Cleaned text content or None if not available
         """
         # Try to fetch from Gutenberg's text format
         text_url = f"https://www.gutenberg.org/files/{gutenberg_id}/{gutenberg_id}-0.txt"
 
         async with httpx.AsyncClient() as client:
             try:
-                response = await client.get(text_url, timeout=60.0)
-                if response.status_code == 200:
-                    return response.text
+                text = await self._fetch_clean_text(client, text_url, gutenberg_id)
+                if text is not None:
+                    return text
             except Exception:
                 pass
 
             # Try alternative format
             alt_url = f"https://www.gutenberg.org/cache/epub/{gutenberg_id}/pg{gutenberg_id}.txt"
             try:
-                response = await client.get(alt_url, timeout=60.0)
-                if response.status_code == 200:
-                    return response.text
+                return await self._fetch_clean_text(client, alt_url, gutenberg_id)
             except Exception:
                 pass
 
         return None
 
+    async def _fetch_clean_text(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        gutenberg_id: int,
+    ) -> Optional[str]:
+        """
+        Stream one Gutenberg text file through the cleaner.
+
+        Args:
+            client: HTTP client
+            url: Text file URL
+            gutenberg_id: Gutenberg book ID, for reporting
+
+        Returns:
+            Cleaned text or None if the file is not available
+        """
+        async with client.stream("GET", url, timeout=60.0) as response:
+            if response.status_code != 200:
+                return None
+
+            cleaner = GutenbergTextCleaner(response.charset_encoding)
+            parts = [cleaner.feed(chunk) async for chunk in response.aiter_bytes()]
+            parts.append(cleaner.finish())
+
+        print(
+            f"Cleaned Gutenberg book {gutenberg_id}: saved {cleaner.bytes_saved} "
+            f"of {cleaner.bytes_in} bytes"
+        )
+        return "".join(parts)
+
     async def ingest_book_from_gutenberg(
         self,
         gutenberg_id: int,
         db: Session,
+        embed: bool = True,
     ) -> Optional[Book]:
         """
         Ingest a book from Project Gutenberg into the database.
@@ -94,6 +157,8 @@ class BookIngestService:
         Args:
             gutenberg_id: Gutenberg book ID
             db: Database session
+            embed: Whether to embed the book now; batch ingest embeds all
+                books together afterwards
 
         Returns:
             Created Book object or None if failed
@@ -128,7 +193,7 @@ class BookIngestService:
 
         if not content:
             # If we can't get content, still store metadata
-            content = metadata.get("description", "")
+            content = metadata.get("description") or ""
 
         # Extract metadata
         title = metadata.get("title", "Unknown Title")
@@ -137,10 +202,14 @@ class BookIngestService:
         languages = metadata.get("languages", [])
         language = languages[0] if languages else "en"
 
-        # Perform semantic analysis on content
-        analysis = self.semantic_analyzer.analyze_text(content)
+        # Perform semantic analysis on content in worker processes, memoized by content
+        analysis = await analyze_text_cached(content, parallel=True)
+        energy_profile = await asyncio.get_running_loop().run_in_executor(
+            get_analysis_executor(), build_energy_profile, content
+        )
 
-        # Create book record
+        # Create book record; symbol positions live in postings, loaded on demand
+        detected_symbols = analysis.get("hermetic_symbols", [])
         book = Book(
             title=title,
             author=author,
@@ -149,33 +218,43 @@ class BookIngestService:
             description=metadata.get("description"),
             language=language,
             content=content,
-            hermetic_symbols=analysis.get("hermetic_symbols", []),
+            hermetic_symbols=symbol_counts(detected_symbols),
             elemental_energy=analysis.get("elemental_energy", {}),
             correspondences=analysis.get("correspondences", []),
+            energy_profile=energy_profile,
+            symbol_postings=build_symbol_postings(detected_symbols),
         )
 
         db.add(book)
         db.commit()
         db.refresh(book)
 
-        # Generate and store embedding
-        try:
-            embedding_id = self.embedding_service.store_embedding(
-                text=f"{title} by {author}. {content[:1000]}",  # Use title, author, and excerpt
-                metadata={
-                    "book_id": book.id,
-                    "title": title,
-                    "author": author,
-                    "source": "gutenberg",
-                },
-            )
+        if embed:
+            await self.embed_books([book], db)
+
+        return book
+
+    async def embed_books(self, books: List[Book], db: Session) -> None:
+        """
+        Embed the passages of whole books, streamed to Qdrant in batches.
 
-            book.embedding_id = embedding_id
-            db.commit()
+        Args:
+            books: Books to embed
+            db: Database session
+        """
+        if not books:
+            return
+
+        try:
+            await self.embedding_service.store_embeddings_async(iter_book_passage_items(books))
         except Exception as e:
             print(f"Failed to generate embedding: {e}")
+            return
 
-        return book
+        # A book's embedding reference is its first passage
+        for book in books:
+            book.embedding_id = self.embedding_service.passage_id(book.id, 0)
+        db.commit()
 
     async def ingest_multiple_books(
         self,
@@ -195,13 +274,16 @@ class BookIngestService:
         books = []
         for gutenberg_id in gutenberg_ids:
             try:
-                book = await self.ingest_book_from_gutenberg(gutenberg_id, db)
+                book = await self.ingest_book_from_gutenberg(gutenberg_id, db, embed=False)
                 if book:
                     books.append(book)
                     print(f"✅ Ingested: {book.title}")
             except Exception as e:
                 print(f"❌ Failed to ingest book {gutenberg_id}: {e}")
 
+        # One batched embedding pass for every book that still lacks one
+        await self.embed_books([book for book in books if book.embedding_id is None], db)
+
         return books
 
 
@@ -0,0 +1,322 @@
+"""
+ONNX Runtime encoder for sentence-transformer models on CPU.
+
+The first load exports the model's transformer to an ONNX graph and
+quantizes its weights to int8 with dynamic quantization. It then encodes
+sample texts with both, and keeps the int8 graph only if every vector is
+within ``min_cosine`` of the PyTorch one, otherwise the float32 graph. The
+graph, the tokenizer and the pooling configuration are saved under
+``path``, so later loads, by any worker, skip PyTorch entirely.
+
+``OnnxEncoder.encode`` mirrors ``SentenceTransformer.encode`` and the encoder
+has the model's ``tokenizer`` and ``max_seq_length``, so the embedding
+service uses it in place of the model. Models made of a transformer,
+pooling (CLS, mean, max or mean-sqrt-len) and optional normalization, like
+``all-MiniLM-L6-v2``, are supported.
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+import fcntl
+import inspect
+import json
+import re
+
+import numpy as np
+import onnxruntime
+from transformers import AutoTokenizer
+
+# Pooling modes, by their Pooling config key, in the order SentenceTransformer concatenates them
+POOLING_MODES = {
+    "cls": "pooling_mode_cls_token",
+    "max": "pooling_mode_max_tokens",
+    "mean": "pooling_mode_mean_tokens",
+    "mean_sqrt_len": "pooling_mode_mean_sqrt_len_tokens",
+}
+
+# Texts compared between the PyTorch model and the quantized graph at export
+CALIBRATION_TEXTS = [
+    "As above, so below.",
+    "The philosopher's stone represents the perfect union of mercury, sulfur, and salt.",
+    "Through the process of alchemical transformation, the prima materia is purified by the "
+    "sacred fire, ascending through the elemental stages from earth to ether.",
+    "Solve et coagula",
+    "The Emerald Tablet of Hermes Trismegistus",
+    "Water flows down to the sea, and the vapour rises again to the heavens as rain.",
+    "All is Mind; the Universe is Mental.",
+    "fire",
+]
+
+CONFIG_FILE = "encoder.json"
+
+
+def pool_token_embeddings(
+    token_embeddings: np.ndarray, attention_mask: np.ndarray, modes: Sequence[str]
+) -> np.ndarray:
+    """
+    Pool token embeddings into one vector per text, as SentenceTransformer's Pooling does.
+
+    Args:
+        token_embeddings: Array of shape (batch, tokens, dimension)
+        attention_mask: Array of shape (batch, tokens), 0 at padding
+        modes: Pooling modes, concatenated in the order given
+
+    Returns:
+        Array of shape (batch, dimension * len(modes))
+    """
+    mask = attention_mask[..., None].astype(token_embeddings.dtype)
+    lengths = np.maximum(mask.sum(axis=1), 1e-9)
+    pooled = []
+    for mode in modes:
+        if mode == "cls":
+            pooled.append(token_embeddings[:, 0])
+        elif mode == "max":
+            pooled.append(np.where(mask > 0, token_embeddings, -1e9).max(axis=1))
+        elif mode == "mean":
+            pooled.append((token_embeddings * mask).sum(axis=1) / lengths)
+        elif mode == "mean_sqrt_len":
+            pooled.append((token_embeddings * mask).sum(axis=1) / np.sqrt(lengths))
+        else:
+            raise ValueError(f"Unsupported pooling mode {mode!r}")
+    return np.concatenate(pooled, axis=1)
+
+
+def cosine_similarities(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Row-wise cosine similarity of two equally shaped matrices."""
+    a = a / np.maximum(np.linalg.norm(a, axis=1, keepdims=True), 1e-12)
+    b = b / np.maximum(np.linalg.norm(b, axis=1, keepdims=True), 1e-12)
+    similarities: np.ndarray = (a * b).sum(axis=1)
+    return similarities
+
+
+class OnnxEncoder:
+    """Sentence encoder running an exported transformer graph on ONNX Runtime."""
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        threads: Optional[int] = None,
+        config: Optional[Dict[str, Any]] = None,
+    ):
+        self.path = Path(path)
+        self.config: Dict[str, Any] = config or json.loads((self.path / CONFIG_FILE).read_text())
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        # Batches run one at a time, so parallelism is within operators only
+        options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(
+            str(self.path / self.config["graph"]), options, providers=["CPUExecutionProvider"]
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(str(self.path))
+        self.max_seq_length: int = self.config["max_seq_length"]
+
+    @property
+    def quantized(self) -> bool:
+        return bool(self.config["graph"] == "model.int8.onnx")
+
+    @property
+    def backend(self) -> str:
+        """Inference backend, which caches of this encoder's vectors are keyed by."""
+        return "onnx-int8" if self.quantized else "onnx-float32"
+
+    def encode(
+        self,
+        texts: Union[str, Sequence[str]],
+        batch_size: int = 32,
+        convert_to_numpy: bool = True,
+    ) -> np.ndarray:
+        """
+        Encode texts like SentenceTransformer.encode.
+
+        Texts are batched longest first, so each batch pads to similar lengths.
+
+        Args:
+            texts: A text, or a list of texts
+            batch_size: Texts per forward pass
+            convert_to_numpy: Accepted for compatibility; vectors are always NumPy
+
+        Returns:
+            One vector for a text, or a matrix with a row per text
+        """
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        order = np.argsort([-len(text) for text in batch], kind="stable")
+
+        pooled: List[np.ndarray] = []
+        for start in range(0, len(batch), batch_size):
+            encoded = self.tokenizer(
+                [batch[i] for i in order[start : start + batch_size]],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+            feeds = {name: encoded[name].astype(np.int64) for name in self.config["input_names"]}
+            token_embeddings = self.session.run(None, feeds)[0]
+            pooled.append(
+                pool_token_embeddings(
+                    token_embeddings, encoded["attention_mask"], self.config["pooling"]
+                )
+            )
+
+        if not pooled:
+            return np.zeros((0, self.session.get_outputs()[0].shape[-1]), dtype=np.float32)
+
+        vectors = np.empty((len(batch), pooled[0].shape[1]), dtype=np.float32)
+        vectors[order] = np.concatenate(pooled)
+        if self.config["normalize"]:
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        if single:
+            vector: np.ndarray = vectors[0]
+            return vector
+        return vectors
+
+
+def _pipeline_config(model: Any) -> Dict[str, Any]:
+    """Pooling and normalization of a SentenceTransformer, or an error if unsupported."""
+    names = [type(module).__name__ for module in model]
+    if names not in (["Transformer", "Pooling"], ["Transformer", "Pooling", "Normalize"]):
+        raise ValueError(f"Unsupported sentence-transformer modules: {', '.join(names)}")
+
+    pooling = model[1].get_config_dict()
+    modes = [mode for mode, key in POOLING_MODES.items() if pooling.get(key)]
+    unsupported = [
+        key
+        for key, enabled in pooling.items()
+        if key.startswith("pooling_mode_") and enabled and key not in POOLING_MODES.values()
+    ]
+    if unsupported or not modes:
+        raise ValueError(f"Unsupported pooling: {', '.join(unsupported) or 'none'}")
+
+    return {
+        "pooling": modes,
+        "normalize": names[-1] == "Normalize",
+        "max_seq_length": model.max_seq_length,
+    }
+
+
+def export_model(
+    model_name: str, path: Union[str, Path], quantize: bool = True, min_cosine: float = 0.99
+) -> Dict[str, Any]:
+    """
+    Export a sentence-transformer model to ONNX, quantized to int8 if accurate enough.
+
+    Args:
+        model_name: SentenceTransformer model name or path
+        path: Directory of the exported encoder
+        quantize: Try the int8 dynamically quantized graph
+        min_cosine: Lowest cosine similarity to the PyTorch vectors on the calibration texts
+
+    Returns:
+        The saved encoder configuration
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    model = SentenceTransformer(model_name, device="cpu")
+    config = {
+        "model": model_name,
+        "quantize": quantize,
+        "required_cosine": min_cosine,
+        **_pipeline_config(model),
+    }
+
+    transformer = model[0]
+    tokenizer = transformer.tokenizer
+    sample = tokenizer(["export"], return_tensors="pt")
+    input_names = [
+        name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample
+    ]
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self, auto_model: torch.nn.Module) -> None:
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, *inputs: torch.Tensor) -> torch.Tensor:
+            outputs = self.auto_model(**dict(zip(input_names, inputs)), return_dict=False)
+            token_embeddings: torch.Tensor = outputs[0]
+            return token_embeddings
+
+    # The TorchScript exporter handles dynamic axes without onnxscript
+    options: Dict[str, Any] = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        options["dynamo"] = False
+    axes = {0: "batch", 1: "sequence"}
+    torch.onnx.export(
+        TokenEmbeddings(transformer.auto_model.eval()),
+        tuple(sample[name] for name in input_names),
+        str(path / "model.onnx"),
+        input_names=input_names,
+        output_names=["token_embeddings"],
+        dynamic_axes={name: axes for name in [*input_names, "token_embeddings"]},
+        opset_version=14,
+        **options,
+    )
+    tokenizer.save_pretrained(str(path))
+    config["input_names"] = input_names
+
+    expected = model.encode(CALIBRATION_TEXTS, convert_to_numpy=True)
+    graphs = ["model.onnx"]
+    if quantize:
+        quantize_dynamic(
+            str(path / "model.onnx"), str(path / "model.int8.onnx"), weight_type=QuantType.QInt8
+        )
+        graphs.insert(0, "model.int8.onnx")
+
+    # The configuration is saved only once a graph passes, so a crash re-exports
+    (path / CONFIG_FILE).unlink(missing_ok=True)
+    for graph in graphs:
+        config["graph"] = graph
+        encoded = OnnxEncoder(path, config=config).encode(CALIBRATION_TEXTS)
+        config["min_cosine"] = round(float(cosine_similarities(expected, encoded).min()), 6)
+        if config["min_cosine"] >= min_cosine:
+            (path / CONFIG_FILE).write_text(json.dumps(config, indent=2))
+            return config
+        print(
+            f"Warning: {graph} vectors of {model_name} are {config['min_cosine']} cosine "
+            f"from PyTorch's, below {min_cosine}"
+        )
+
+    raise RuntimeError(f"No ONNX export of {model_name} is within {min_cosine} cosine of PyTorch")
+
+
+def load_onnx_encoder(
+    model_name: str,
+    path: Union[str, Path],
+    quantize: bool = True,
+    min_cosine: float = 0.99,
+    threads: Optional[int] = None,
+) -> OnnxEncoder:
+    """
+    Load the exported encoder of a model, exporting it on first use.
+
+    Workers starting together wait on a lock file, so only one exports.
+
+    Args:
+        model_name: SentenceTransformer model name or path
+        path: Directory of exported encoders, one subdirectory per model
+        quantize: Prefer the int8 quantized graph
+        min_cosine: Lowest cosine similarity to the PyTorch vectors accepted
+        threads: Intra-op threads of the inference session, all cores when unset
+
+    Returns:
+        The encoder
+    """
+    directory = Path(path) / re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    with open(directory / ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        config_path = directory / CONFIG_FILE
+        config = json.loads(config_path.read_text()) if config_path.exists() else {}
+        wanted = {"model": model_name, "quantize": quantize, "required_cosine": min_cosine}
+        if any(config.get(key) != value for key, value in wanted.items()):
+            export_model(model_name, directory, quantize, min_cosine)
+
+    return OnnxEncoder(directory, threads)
@@ -0,0 +1,85 @@
+"""
+Passage chunking of whole books for embedding.
+
+Books are split into passages of a fixed number of model tokens, with a
+configurable overlap between consecutive passages. The text is tokenized
+segment by segment, so memory stays bounded by one segment plus one passage
+however long the book is.
+"""
+from typing import Callable, Iterator, List, Sequence, Tuple, Dict, Any
+import re
+
+# Characters tokenized at a time
+PASSAGE_SEGMENT_CHARS = 64 * 1024
+
+# Fallback tokenization when the model has no tokenizer with offsets
+FALLBACK_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+TokenSpans = Callable[[str], Sequence[Tuple[int, int]]]
+
+
+def regex_token_spans(text: str) -> List[Tuple[int, int]]:
+    """Character spans of word and punctuation tokens."""
+    return [match.span() for match in FALLBACK_TOKEN_PATTERN.finditer(text)]
+
+
+def _segment_end(text: str, start: int, size: int) -> int:
+    """End a segment at whitespace so no token straddles two segments."""
+    end = start + size
+    if end >= len(text):
+        return len(text)
+
+    cut = end
+    while cut > start and not text[cut - 1].isspace():
+        cut -= 1
+    return cut if cut > start else end
+
+
+def iter_passages(
+    text: str,
+    token_spans: TokenSpans,
+    chunk_tokens: int,
+    overlap_tokens: int = 0,
+    segment_chars: int = PASSAGE_SEGMENT_CHARS,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Split a text into overlapping passages of ``chunk_tokens`` tokens.
+
+    Args:
+        text: Text to split
+        token_spans: Returns the (start, end) character span of every token of a string
+        chunk_tokens: Tokens per passage
+        overlap_tokens: Tokens shared by consecutive passages
+        segment_chars: Characters tokenized at a time
+
+    Yields:
+        Passages with their ``chunk_index``, ``start`` and ``end`` character
+        offsets in the text, and ``text``
+    """
+    if chunk_tokens <= overlap_tokens:
+        raise ValueError("chunk_tokens must be greater than overlap_tokens")
+
+    step = chunk_tokens - overlap_tokens
+    window: List[Tuple[int, int]] = []
+    # Tokens at the head of the window already emitted in the previous passage
+    emitted = 0
+    chunk_index = 0
+
+    def passage(spans: Sequence[Tuple[int, int]]) -> Dict[str, Any]:
+        start, end = spans[0][0], spans[-1][1]
+        return {"chunk_index": chunk_index, "start": start, "end": end, "text": text[start:end]}
+
+    position = 0
+    while position < len(text):
+        end = _segment_end(text, position, segment_chars)
+        window.extend((position + s, position + e) for s, e in token_spans(text[position:end]))
+        position = end
+
+        while len(window) >= chunk_tokens:
+            yield passage(window[:chunk_tokens])
+            chunk_index += 1
+            del window[:step]
+            emitted = overlap_tokens
+
+    if len(window) > emitted:
+        yield passage(window)
@@ -0,0 +1,70 @@
+"""
+Cache of search query embeddings.
+
+Popular queries are encoded once. Vectors are kept as float32 arrays in a
+bounded in-process LRU and, optionally, mirrored to Redis so every worker
+shares them. Keys combine the embedding model, qualified by its inference
+backend, and a hash of the normalized query, so neither a model change nor
+workers on another backend ever serve vectors of another encoder.
+"""
+from typing import Any, Dict, List
+import base64
+import hashlib
+import unicodedata
+
+import numpy as np
+
+from app.services.two_tier_cache import TwoTierCache
+
+_VECTOR_DTYPE = np.dtype("<f4")
+
+
+def normalize_query(text: str) -> str:
+    """Normalize a query so trivially different spellings share an embedding."""
+    return " ".join(unicodedata.normalize("NFC", text).casefold().split())
+
+
+class QueryEmbeddingCache(TwoTierCache[np.ndarray]):
+    """Two-tier LRU of query embeddings: in-process first, then Redis."""
+
+    def __init__(self, max_entries: int, ttl: int, use_redis: bool = True):
+        super().__init__(ttl, use_redis)
+        self.max_entries = max_entries
+
+    @staticmethod
+    def make_key(normalized_query: str, model: str) -> str:
+        """
+        Build the cache key for a query.
+
+        Args:
+            normalized_query: Output of normalize_query
+            model: Embedding model name, qualified by its inference backend
+
+        Returns:
+            Cache key
+        """
+        digest = hashlib.blake2b(normalized_query.encode("utf-8"), digest_size=20).hexdigest()
+        return f"embedding:query:{model}:{digest}"
+
+    def _to_entry(self, value: List[float]) -> np.ndarray:
+        return np.asarray(value, dtype=_VECTOR_DTYPE)
+
+    def _from_entry(self, entry: np.ndarray) -> List[float]:
+        values: List[float] = entry.tolist()
+        return values
+
+    # The shared client decodes responses, so raw bytes travel as base64
+    def _dumps(self, entry: np.ndarray) -> str:
+        return base64.b64encode(entry.tobytes()).decode("ascii")
+
+    def _loads(self, payload: str) -> np.ndarray:
+        return np.frombuffer(base64.b64decode(payload), dtype=_VECTOR_DTYPE)
+
+    def _sizeof(self, entry: np.ndarray) -> int:
+        return entry.nbytes
+
+    def _over_capacity(self) -> bool:
+        return len(self._entries) > self.max_entries
+
+    def metrics(self) -> Dict[str, Any]:
+        return {**super().metrics(), "max_entries": self.max_entries}
@@ -0,0 +1,254 @@
+"""
+Zero-downtime re-embedding of the library.
+
+After ``EMBEDDING_MODEL`` or ``EMBEDDING_DIMENSION`` changes, run this job
+with the new settings while the API keeps serving the old index:
+
+    python -m app.services.reindex
+
+Books are streamed from the database with a server-side cursor, in id order,
+and re-embedded a batch at a time, with a bounded number of batches in
+flight, into a new collection versioned by model and dimension. After every
+batch the highest finished book id is checkpointed in Redis, so an
+interrupted job resumes where it stopped. Books ingested meanwhile are
+caught up in further passes until one finds none; then the collection alias
+is switched to the new collection in one atomic update. The checkpoint of
+the collection switched away from is cleared, as that collection stops
+receiving new books.
+
+Workers pin the collection the alias pointed to when they started, so each
+keeps searching an index built by its own model; roll the API to the new
+settings after the switch, then run the job again to embed the books the
+old workers ingested in the meantime, and delete the previous collection.
+
+A collection from before aliases must first be moved behind one, with the
+model that built it still configured, in a maintenance step:
+
+    python -m app.services.reindex --version-legacy
+"""
+from collections import deque
+from itertools import islice
+from typing import Any, Awaitable, Deque, Dict, List, Optional, Tuple, cast
+import asyncio
+
+from qdrant_client import QdrantClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.redis import get_redis_client
+from app.models.models import Book
+from app.services.collection_profiles import copy_points
+from app.services.embedding_service import EmbeddingService, get_embedding_service
+from app.services.ingest.gutenberg import iter_book_passage_items
+from app.services.vector_store.qdrant import QdrantVectorStore, versioned_collection_name
+
+REINDEX_KEY_PREFIX = "embedding:reindex:"
+
+
+async def _load_checkpoint(key: str) -> Dict[str, str]:
+    try:
+        redis = await get_redis_client()
+        # redis-py types hash commands for both its sync and async clients
+        return await cast(Awaitable[Dict[str, str]], redis.hgetall(key)) or {}
+    except Exception as e:
+        print(f"Warning: Failed to read reindex checkpoint, starting over: {e}")
+        return {}
+
+
+async def _save_checkpoint(key: str, **fields: Any) -> None:
+    try:
+        redis = await get_redis_client()
+        mapping = {name: str(value) for name, value in fields.items()}
+        await cast(Awaitable[int], redis.hset(key, mapping=mapping))
+    except Exception as e:
+        print(f"Warning: Failed to save reindex checkpoint: {e}")
+
+
+async def _clear_checkpoint(key: str) -> None:
+    try:
+        redis = await get_redis_client()
+        await redis.delete(key)
+    except Exception as e:
+        print(f"Warning: Failed to clear reindex checkpoint: {e}")
+
+
+async def reindex_books(
+    db: Session,
+    service: Optional[EmbeddingService] = None,
+    batch_books: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    restart: bool = False,
+) -> Dict[str, Any]:
+    """
+    Re-embed every book into the collection of the configured model, then switch the alias.
+
+    Runs resume after the checkpointed book, including finished runs, which
+    embed only the books ingested since.
+
+    Args:
+        db: Database session
+        service: Embedding service whose model embeds the books
+        batch_books: Books per batch, defaults to ``reindex_batch_books``
+        concurrency: Batches embedded at once, defaults to ``reindex_concurrency``
+        restart: Ignore any checkpoint and embed every book again
+
+    Returns:
+        The new ``collection``, the ``previous`` one the alias pointed to, and
+        the number of ``books`` and ``passages`` embedded by this run
+    """
+    service = service or get_embedding_service()
+    service._initialize()
+    current = service.vector_store
+    if not isinstance(current, QdrantVectorStore):
+        raise RuntimeError("Reindexing needs the Qdrant vector store")
+
+    batch_books = batch_books or settings.reindex_batch_books
+    concurrency = concurrency or settings.reindex_concurrency
+    alias = service.collection_name
+    # Checked up front rather than failing at the switch, after embedding the library
+    if current.is_unversioned(alias):
+        raise RuntimeError(
+            f"{alias} is a collection from before aliases; run "
+            "python -m app.services.reindex --version-legacy with the old model first"
+        )
+    target = QdrantVectorStore(
+        versioned_collection_name(alias, settings.embedding_model, settings.embedding_dimension),
+        current.client,
+        current.async_client,
+    )
+    target.ensure_collection(settings.embedding_dimension)
+
+    key = REINDEX_KEY_PREFIX + target.collection_name
+    checkpoint = {} if restart else await _load_checkpoint(key)
+    last_book_id = int(checkpoint.get("last_book_id", 0))
+    stats: Dict[str, Any] = {"collection": target.collection_name, "books": 0, "passages": 0}
+    await _save_checkpoint(key, status="running", model=settings.embedding_model)
+
+    async def embed_books_after(after: int) -> int:
+        """Embed the books with ids above ``after``; return the highest id embedded."""
+        # yield_per streams rows through a server-side cursor instead of loading them all
+        books = (
+            db.query(Book)
+            .filter(Book.id > after)
+            .order_by(Book.id)
+            .execution_options(stream_results=True)
+            .yield_per(batch_books)
+        )
+        rows = iter(books)
+        reached = after
+
+        async def embed_batch(batch: List[Book]) -> Tuple[int, int, int]:
+            ids = await service.store_embeddings_async(
+                iter_book_passage_items(batch, service), store=target
+            )
+            return int(batch[-1].id), len(batch), len(ids)
+
+        # Batches finish in any order; checkpoints advance in book order only
+        in_flight: Deque[asyncio.Task] = deque()
+
+        async def finish_oldest() -> None:
+            nonlocal reached
+            reached, book_count, passage_count = await in_flight.popleft()
+            stats["books"] += book_count
+            stats["passages"] += passage_count
+            await _save_checkpoint(key, last_book_id=reached)
+
+        try:
+            while True:
+                batch = await asyncio.to_thread(lambda: list(islice(rows, batch_books)))
+                if not batch:
+                    break
+                in_flight.append(asyncio.create_task(embed_batch(batch)))
+                if len(in_flight) >= concurrency:
+                    await finish_oldest()
+
+            while in_flight:
+                await finish_oldest()
+        finally:
+            for task in in_flight:
+                task.cancel()
+        return reached
+
+    # Books ingested during a pass land in the old collection only; catch them up
+    # until a pass finds none, so the switch loses none of them
+    while True:
+        reached = await embed_books_after(last_book_id)
+        if reached == last_book_id:
+            break
+        last_book_id = reached
+
+    stats["previous"] = target.switch_alias(alias)
+    await _save_checkpoint(key, status="complete")
+    if stats["previous"] and stats["previous"] != target.collection_name:
+        # The previous collection misses every book ingested from now on, so a
+        # switch back to its model must embed the whole library again
+        await _clear_checkpoint(REINDEX_KEY_PREFIX + stats["previous"])
+    return stats
+
+
+def version_legacy_collection(client: QdrantClient, alias: str, dimension: int) -> Optional[str]:
+    """
+    Move a collection from before aliases behind an alias.
+
+    A maintenance step, run with the model that built the collection still
+    configured: its points are copied into that model's versioned collection,
+    then the old collection is deleted and an alias of the copy created in its
+    place. Searches fail for the moment between the two, so pause ingestion
+    and run it in a quiet window, then restart the workers so they pin the
+    versioned collection before any reindex switches the alias.
+
+    Args:
+        client: Qdrant client
+        alias: Name of the collection, which becomes the alias
+        dimension: Vector size of the configured model
+
+    Returns:
+        The versioned collection, or None if ``alias`` already is an alias
+    """
+    legacy = QdrantVectorStore(alias, client)
+    if not legacy.is_unversioned(alias):
+        return None
+    # Refuses a collection built by a model of another dimension
+    legacy.ensure_collection(dimension)
+
+    target = QdrantVectorStore(
+        versioned_collection_name(alias, settings.embedding_model, dimension), client
+    )
+    target.ensure_collection(dimension)
+    copy_points(client, alias, target.collection_name)
+    client.delete_collection(alias)
+    target.switch_alias(alias)
+    return target.collection_name
+
+
+if __name__ == "__main__":
+    import sys
+
+    from app.db.session import SessionLocal
+
+    if "--version-legacy" in sys.argv[1:]:
+        versioned = version_legacy_collection(
+            QdrantVectorStore.from_settings(settings.qdrant_collection_name).client,
+            settings.qdrant_collection_name,
+            settings.embedding_dimension,
+        )
+        if versioned:
+            print(f"✅ {settings.qdrant_collection_name} now points to {versioned}; restart the API")
+        else:
+            print(f"{settings.qdrant_collection_name} already is an alias")
+        sys.exit(0)
+
+    session = SessionLocal()
+    try:
+        result = asyncio.run(reindex_books(session, restart="--restart" in sys.argv[1:]))
+        print(
+            f"✅ Embedded {result['books']} books ({result['passages']} passages) into "
+            f"{result['collection']}; {settings.qdrant_collection_name} now points to it"
+        )
+        if result["previous"] and result["previous"] != result["collection"]:
+            print(
+                f"Once every worker runs {settings.embedding_model}, run this again to embed "
+                f"the books they ingested meanwhile, then delete {result['previous']}"
+            )
+    finally:
+        session.close()
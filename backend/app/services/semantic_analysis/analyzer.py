@@ -1,12 +1,66 @@
 """
 Semantic analysis service for hermetic symbol detection and text energy analysis.
 """
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Sequence, Iterable, Iterator, Tuple
+from collections import Counter
+import hashlib
+import json
 import re
 
+from app.core.config import settings
+from app.services.semantic_analysis.context import AnalysisContext
+from app.services.semantic_analysis.lexicon import Lexicon
+from app.services.semantic_analysis.matcher import (
+    Hit,
+    SymbolAccumulator,
+    proximity_pattern,
+)
+
+# Bump when a change to the analysis code alters results for the same tables
+ANALYZER_VERSION = 1
+
+# Maximum tokens between the parts of proximity symbols such as "serpent ... tail"
+PROXIMITY_MAX_TOKENS = settings.symbol_proximity_max_tokens
+
+WORD_PATTERN = re.compile(r"\b\w+\b")
+WORD_CHAR_PATTERN = re.compile(r"\w")
+
+# Characters carried across chunk boundaries in streaming analysis;
+# any match up to this length is found even when a boundary splits it
+STREAM_OVERLAP_CHARS = 4096
+STREAM_CHUNK_CHARS = 1 << 20
+
+
+def iter_text_chunks(text: str, chunk_size: int = STREAM_CHUNK_CHARS) -> Iterator[str]:
+    """Yield consecutive chunks of a text for streaming analysis."""
+    for start in range(0, len(text), chunk_size):
+        yield text[start : start + chunk_size]
+
+
+def find_safe_cut(text: str, position: int, lowest: int = 0) -> int:
+    """
+    Move a cut position back until the character before it is not a word character.
+
+    Cutting there means no token straddles the cut and word boundaries read
+    the same on both sides of it. The cut moves back no further than
+    ``lowest``; above 0, a run of word characters reaching past it is split
+    at ``position`` instead.
+    """
+    cut = position
+    while cut > lowest and WORD_CHAR_PATTERN.match(text, cut - 1):
+        cut -= 1
+    if lowest > 0 and cut == lowest and WORD_CHAR_PATTERN.match(text, cut - 1):
+        return position
+    return cut
+
 
 class SemanticAnalyzer:
-    """Analyzes text for hermetic symbols, elemental energy, and correspondences."""
+    """
+    Analyzes text for hermetic symbols, elemental energy, and correspondences.
+
+    Symbols and correspondences come from a Lexicon snapshot, by default the
+    built-in tables below; they also seed the ``hermetic_symbols`` table.
+    """
 
     # Hermetic symbol patterns
     ALCHEMICAL_SYMBOLS = {
@@ -17,13 +71,19 @@ class SemanticAnalyzer:
         "silver": r"\b(silver|moon|luna|argentum)\b",
         "philosopher_stone": r"\b(philosopher'?s?\s+stone|lapis\s+philosophorum)\b",
         "prima_materia": r"\b(prima\s+materia|first\s+matter)\b",
-        "ouroboros": r"\b(ouroboros|serpent.*tail)\b",
+        "ouroboros": (
+            r"\b(ouroboros|" + proximity_pattern("serpent", "tail", PROXIMITY_MAX_TOKENS) + r")\b"
+        ),
     }
 
     MASONIC_SYMBOLS = {
         "square_compass": r"\b(square\s+and\s+compass|compass\s+and\s+square)\b",
         "all_seeing_eye": r"\b(all[- ]seeing\s+eye|eye\s+of\s+providence)\b",
-        "pillars": r"\b(boaz|jachin|pillars?\s+of.*temple)\b",
+        "pillars": (
+            r"\b(boaz|jachin|"
+            + proximity_pattern(r"(?:pillar\s+of|pillars\s+of)", "temple", PROXIMITY_MAX_TOKENS)
+            + r")\b"
+        ),
         "letter_g": r"\b(letter\s+g|geometry|gnosis)\b",
         "degree": (
             r"\b(\d{1,2}°|\d{1,2}\s+degree|entered\s+apprentice"
@@ -79,12 +139,57 @@ class SemanticAnalyzer:
         "ether": ["ether", "spirit", "divine", "cosmic", "quintessence", "void", "space", "unity"],
     }
 
-    def __init__(self):
-        self.all_symbols = {
-            "alchemical": self.ALCHEMICAL_SYMBOLS,
-            "masonic": self.MASONIC_SYMBOLS,
-            "kabbalistic": self.KABBALISTIC_SYMBOLS,
+    # Hermetic correspondences of the principal alchemical symbols
+    CORRESPONDENCE_MAP = {
+        "mercury": ["air", "communication", "transformation"],
+        "sulfur": ["fire", "passion", "spirit"],
+        "salt": ["earth", "body", "material"],
+        "gold": ["sun", "fire", "divine"],
+        "silver": ["moon", "water", "reflection"],
+    }
+
+    def __init__(self, lexicon: Optional[Lexicon] = None):
+        self.lexicon = lexicon or self.builtin_lexicon()
+        self.all_symbols = self.lexicon.symbol_tables
+        self.correspondence_map = self.lexicon.correspondences
+        # Compiled once per snapshot so detection is a single pass over the text
+        self.symbol_matcher = self.lexicon.matcher
+
+        # Inverted keyword table: keyword -> elements it contributes to
+        self.keyword_elements: Dict[str, List[str]] = {}
+        for element, keywords in self.ELEMENTAL_KEYWORDS.items():
+            for keyword in keywords:
+                self.keyword_elements.setdefault(keyword, []).append(element)
+
+        # Identifies what this analyzer produces; cached results are keyed by it
+        self.lexicon_version = self._compute_lexicon_version()
+
+    def _compute_lexicon_version(self) -> str:
+        """Hash the analyzer version and every table that shapes its results."""
+        tables = {
+            "analyzer": ANALYZER_VERSION,
+            "lexicon": self.lexicon.version,
+            "elements": self.ELEMENTAL_KEYWORDS,
         }
+        encoded = json.dumps(tables, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()[:16]
+
+    @classmethod
+    def builtin_lexicon(cls) -> Lexicon:
+        """Compile the built-in symbol and correspondence tables."""
+        return Lexicon(
+            {
+                "alchemical": cls.ALCHEMICAL_SYMBOLS,
+                "masonic": cls.MASONIC_SYMBOLS,
+                "kabbalistic": cls.KABBALISTIC_SYMBOLS,
+            },
+            cls.CORRESPONDENCE_MAP,
+        )
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """Split text into lowercased word tokens."""
+        return WORD_PATTERN.findall(text.lower())
 
     def detect_symbols(self, text: str) -> List[Dict[str, Any]]:
         """
@@ -96,81 +201,103 @@ class SemanticAnalyzer:
         Returns:
             List of detected symbols with their categories and positions
         """
-        text_lower = text.lower()
-        detected = []
-
-        for category, symbols in self.all_symbols.items():
-            for symbol_name, pattern in symbols.items():
-                matches = list(re.finditer(pattern, text_lower, re.IGNORECASE))
-                if matches:
-                    detected.append(
-                        {
-                            "symbol": symbol_name,
-                            "category": category,
-                            "count": len(matches),
-                            "positions": [match.start() for match in matches],
-                        }
-                    )
-
-        return detected
-
-    def analyze_elemental_energy(self, text: str) -> Dict[str, float]:
+        return self._context_symbols(AnalysisContext(text))
+
+    def _context_symbols(self, context: AnalysisContext) -> List[Dict[str, Any]]:
+        """Detect symbols once per context, capturing its tokens on the way."""
+        if context.symbols is None:
+            text = context.normalized_text
+            tokens: Optional[List[str]] = [] if context.tokens is None else None
+            with context.stage("symbols"):
+                context.symbols = self.symbol_matcher.detect(text, tokens)
+            if tokens is not None:
+                context.tokens = tokens
+        return context.symbols
+
+    def _context_tokens(self, context: AnalysisContext) -> List[str]:
+        """Tokenize once per context."""
+        if context.tokens is None:
+            text = context.normalized_text
+            with context.stage("tokenize"):
+                context.tokens = WORD_PATTERN.findall(text)
+        return context.tokens
+
+    def analyze_elemental_energy(
+        self,
+        text: str = "",
+        tokens: Optional[Sequence[str]] = None,
+    ) -> Dict[str, float]:
         """
         Analyze the elemental energy composition of text.
 
         Args:
             text: Input text to analyze
+            tokens: Optional lowercased tokens of the text, skips tokenization
 
         Returns:
             Dictionary mapping elements to their relative presence (0-1)
         """
-        text_lower = text.lower()
-        words = re.findall(r"\b\w+\b", text_lower)
+        if tokens is None:
+            tokens = self.tokenize(text)
 
-        element_counts = {element: 0 for element in self.ELEMENTAL_KEYWORDS}
-
-        for word in words:
-            for element, keywords in self.ELEMENTAL_KEYWORDS.items():
-                if word in keywords:
-                    element_counts[element] += 1
+        return self._element_distribution(self.count_elements(Counter(tokens)))
 
-        # Normalize to percentages
+    def _element_distribution(self, element_counts: Dict[str, int]) -> Dict[str, float]:
+        """Normalize elemental keyword counts to a distribution."""
         total = sum(element_counts.values())
         if total == 0:
             return {element: 0.0 for element in self.ELEMENTAL_KEYWORDS}
 
         return {element: round(count / total, 3) for element, count in element_counts.items()}
 
-    def find_correspondences(self, text: str) -> List[Dict[str, Any]]:
+    def count_elements(self, token_counts: Dict[str, int]) -> Dict[str, int]:
+        """
+        Count elemental keyword occurrences from token frequencies.
+
+        Args:
+            token_counts: Mapping of lowercased token to its frequency
+
+        Returns:
+            Dictionary mapping elements to keyword occurrence counts
+        """
+        element_counts = {element: 0 for element in self.ELEMENTAL_KEYWORDS}
+
+        for keyword, elements in self.keyword_elements.items():
+            count = token_counts.get(keyword, 0)
+            if count:
+                for element in elements:
+                    element_counts[element] += count
+
+        return element_counts
+
+    def find_correspondences(
+        self,
+        text: str = "",
+        detected_symbols: Optional[List[Dict[str, Any]]] = None,
+    ) -> List[Dict[str, Any]]:
         """
         Find hermetic correspondences in text.
 
         Args:
             text: Input text to analyze
+            detected_symbols: Optional output of detect_symbols for the text,
+                skips a second symbol scan
 
         Returns:
             List of correspondences found
         """
         correspondences = []
-        detected_symbols = self.detect_symbols(text)
-
-        # Create correspondence map
-        correspondence_map = {
-            "mercury": ["air", "communication", "transformation"],
-            "sulfur": ["fire", "passion", "spirit"],
-            "salt": ["earth", "body", "material"],
-            "gold": ["sun", "fire", "divine"],
-            "silver": ["moon", "water", "reflection"],
-        }
+        if detected_symbols is None:
+            detected_symbols = self.detect_symbols(text)
 
         for symbol in detected_symbols:
             symbol_name = symbol["symbol"]
-            if symbol_name in correspondence_map:
+            if symbol_name in self.correspondence_map:
                 correspondences.append(
                     {
                         "symbol": symbol_name,
                         "category": symbol["category"],
-                        "correspondences": correspondence_map[symbol_name],
+                        "correspondences": list(self.correspondence_map[symbol_name]),
                     }
                 )
 
@@ -182,51 +309,219 @@ class SemanticAnalyzer:
         analyze_symbols: bool = True,
         analyze_energy: bool = True,
         analyze_correspondences: bool = True,
+        context: Optional[AnalysisContext] = None,
     ) -> Dict[str, Any]:
         """
         Perform complete semantic analysis on text.
 
+        The text is normalized, tokenized and scanned for symbols exactly once;
+        every stage reads those artifacts from a shared AnalysisContext.
+
         Args:
             text: Input text to analyze
             analyze_symbols: Whether to detect hermetic symbols
             analyze_energy: Whether to analyze elemental energy
             analyze_correspondences: Whether to find correspondences
+            context: Optional context to reuse; read its ``timings`` afterwards
+                for a per-stage profile of the call
 
         Returns:
             Complete analysis results
         """
+        if context is None:
+            context = AnalysisContext(text)
         result = {}
 
+        with context.stage("total"):
+            # The symbol scan also yields the token list, so it runs first
+            if analyze_symbols or analyze_correspondences:
+                detected_symbols = self._context_symbols(context)
+
+            if analyze_symbols:
+                result["hermetic_symbols"] = detected_symbols
+
+            if analyze_energy:
+                tokens = self._context_tokens(context)
+                with context.stage("energy"):
+                    result["elemental_energy"] = self.analyze_elemental_energy(tokens=tokens)
+
+            if analyze_correspondences:
+                with context.stage("correspondences"):
+                    result["correspondences"] = self.find_correspondences(
+                        detected_symbols=detected_symbols
+                    )
+
+        result["summary"] = self._summarize(result)
+
+        return result
+
+    def analyze_stream(
+        self,
+        chunks: Iterable[str],
+        analyze_symbols: bool = True,
+        analyze_energy: bool = True,
+        analyze_correspondences: bool = True,
+        overlap: int = STREAM_OVERLAP_CHARS,
+    ) -> Dict[str, Any]:
+        """
+        Perform complete semantic analysis on a text delivered in chunks.
+
+        Only a window of at most ``2 * overlap`` characters plus the current
+        chunk is held at once, so memory stays flat however long the text is.
+        The last ``overlap`` characters of each window, moved back to a word
+        boundary, are carried into the next one, so matches split by a chunk
+        boundary are still found, and symbol positions are absolute offsets
+        into the whole (lowercased) text. A word longer than ``overlap``, far
+        longer than any symbol or proximity span, is split to keep the bound.
+
+        Args:
+            chunks: Iterable of consecutive text chunks
+            analyze_symbols: Whether to detect hermetic symbols
+            analyze_energy: Whether to analyze elemental energy
+            analyze_correspondences: Whether to find correspondences
+            overlap: Characters carried across windows; bounds match length
+
+        Returns:
+            Complete analysis results, in the same shape as analyze_text
+        """
+        scan_symbols = analyze_symbols or analyze_correspondences
+        accumulator = SymbolAccumulator(self.symbol_matcher)
+        element_counts = {element: 0 for element in self.ELEMENTAL_KEYWORDS}
+
+        def commit(window: str, offset: int, cutoff: int) -> None:
+            hits, counts = self.scan_window(window, cutoff, scan_symbols, analyze_energy)
+            accumulator.add(hits, offset)
+            for element, count in counts.items():
+                element_counts[element] += count
+
+        carry = ""
+        offset = 0
+        for chunk in chunks:
+            window = carry + chunk.lower()
+            if len(window) < 2 * overlap:
+                carry = window
+                continue
+
+            cutoff = find_safe_cut(window, len(window) - overlap, len(window) - 2 * overlap)
+            commit(window, offset, cutoff)
+            carry = window[cutoff:]
+            offset += cutoff
+
+        commit(carry, offset, len(carry))
+
+        return self.compose_result(
+            accumulator.results(),
+            element_counts,
+            analyze_symbols=analyze_symbols,
+            analyze_energy=analyze_energy,
+            analyze_correspondences=analyze_correspondences,
+        )
+
+    def scan_window(
+        self,
+        window: str,
+        cutoff: int,
+        scan_symbols: bool = True,
+        count_energy: bool = True,
+    ) -> Tuple[List[List[Hit]], Dict[str, int]]:
+        """
+        Scan one lowercased window, keeping what starts before ``cutoff``.
+
+        Text after the cutoff is only read as lookahead for matches that begin
+        before it; the next window is expected to start at the cutoff.
+
+        Args:
+            window: Lowercased window text
+            cutoff: Window position where the next window starts
+            scan_symbols: Whether to collect symbol hits
+            count_energy: Whether to count elemental keywords
+
+        Returns:
+            Symbol hits per symbol (window positions) and elemental keyword counts
+        """
+        hits: List[List[Hit]] = [[] for _ in self.symbol_matcher.symbols]
+        tokens: Optional[List[str]] = [] if count_energy else None
+
+        if scan_symbols:
+            hits = self.symbol_matcher.find_hits(window, tokens)
+            hits = [[hit for hit in symbol_hits if hit[0] < cutoff] for symbol_hits in hits]
+            if tokens is not None:
+                carried = sum(1 for _ in WORD_PATTERN.finditer(window, cutoff))
+                del tokens[len(tokens) - carried :]
+        elif count_energy:
+            tokens = WORD_PATTERN.findall(window, 0, cutoff)
+
+        element_counts = {element: 0 for element in self.ELEMENTAL_KEYWORDS}
+        if tokens is not None:
+            element_counts = self.count_elements(Counter(tokens))
+
+        return hits, element_counts
+
+    def compose_result(
+        self,
+        detected_symbols: List[Dict[str, Any]],
+        element_counts: Dict[str, int],
+        analyze_symbols: bool = True,
+        analyze_energy: bool = True,
+        analyze_correspondences: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Build an analysis result from merged symbol detections and element counts.
+
+        Args:
+            detected_symbols: Detection result for the whole text
+            element_counts: Elemental keyword counts for the whole text
+            analyze_symbols: Whether to include hermetic symbols
+            analyze_energy: Whether to include elemental energy
+            analyze_correspondences: Whether to include correspondences
+
+        Returns:
+            Complete analysis results, in the same shape as analyze_text
+        """
+        result: Dict[str, Any] = {}
+
         if analyze_symbols:
-            result["hermetic_symbols"] = self.detect_symbols(text)
+            result["hermetic_symbols"] = detected_symbols
 
         if analyze_energy:
-            result["elemental_energy"] = self.analyze_elemental_energy(text)
+            result["elemental_energy"] = self._element_distribution(element_counts)
 
         if analyze_correspondences:
-            result["correspondences"] = self.find_correspondences(text)
+            result["correspondences"] = self.find_correspondences(detected_symbols=detected_symbols)
+
+        result["summary"] = self._summarize(result)
 
-        # Generate summary
+        return result
+
+    @staticmethod
+    def _summarize(result: Dict[str, Any]) -> str:
+        """Generate the one-line summary of an analysis result."""
         symbol_count = len(result.get("hermetic_symbols", []))
         dominant_element = max(
             result.get("elemental_energy", {}).items(), key=lambda x: x[1], default=("none", 0)
         )[0]
 
-        result["summary"] = (
+        return (
             f"Found {symbol_count} hermetic symbols. "
             f"Dominant elemental energy: {dominant_element}."
         )
 
-        return result
-
 
 # Global instance
 _semantic_analyzer: Optional[SemanticAnalyzer] = None
 
 
-def get_semantic_analyzer() -> SemanticAnalyzer:
-    """Get or create the global semantic analyzer instance."""
+def get_semantic_analyzer(lexicon: Optional[Lexicon] = None) -> SemanticAnalyzer:
+    """
+    Get or create the global semantic analyzer instance.
+
+    Args:
+        lexicon: Snapshot the analyzer must use; when it differs from the
+            current one, a new analyzer replaces the global instance
+    """
     global _semantic_analyzer
-    if _semantic_analyzer is None:
-        _semantic_analyzer = SemanticAnalyzer()
+    if _semantic_analyzer is None or (
+        lexicon is not None and lexicon.version != _semantic_analyzer.lexicon.version
+    ):
+        _semantic_analyzer = SemanticAnalyzer(lexicon)
     return _semantic_analyzer
@@ -0,0 +1,124 @@
+"""
+Content-addressed memoization of semantic analysis results.
+
+Results are cached in two tiers: a size-bounded in-process LRU and Redis,
+shared by every worker. Keys combine a hash of the text, the analysis flags
+and the analyzer's lexicon version, so results computed from older symbol
+tables are never served once the tables change.
+"""
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import json
+
+from app.core.config import settings
+from app.services.semantic_analysis.analyzer import get_semantic_analyzer
+from app.services.semantic_analysis.lexicon_store import refresh_lexicon
+from app.services.semantic_analysis.parallel import analyze_text_parallel
+from app.services.two_tier_cache import TwoTierCache
+
+
+class AnalysisCache(TwoTierCache[str]):
+    """Two-tier cache of analysis results: in-process LRU first, then Redis."""
+
+    def __init__(self, max_bytes: int, ttl: int, use_redis: bool = True):
+        super().__init__(ttl, use_redis)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def make_key(text: str, version: str, flags: Tuple[bool, ...]) -> str:
+        """
+        Build the cache key for a text.
+
+        Args:
+            text: Analyzed text
+            version: Lexicon version of the analyzer
+            flags: Analysis flags the result was computed with
+
+        Returns:
+            Cache key
+        """
+        digest = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=20).hexdigest()
+        flag_bits = "".join("1" if flag else "0" for flag in flags)
+        return f"semantic:{version}:{flag_bits}:{digest}"
+
+    # Results are held as ASCII-only JSON, so a payload's length is its size in bytes,
+    # and every get returns a fresh copy
+    def _to_entry(self, value: Dict[str, Any]) -> str:
+        return json.dumps(value)
+
+    def _from_entry(self, entry: str) -> Dict[str, Any]:
+        result: Dict[str, Any] = json.loads(entry)
+        return result
+
+    def _dumps(self, entry: str) -> str:
+        return entry
+
+    def _loads(self, payload: str) -> str:
+        return payload
+
+    def _sizeof(self, entry: str) -> int:
+        return len(entry)
+
+    def _over_capacity(self) -> bool:
+        return self._size > self.max_bytes
+
+    def _put_local(self, key: str, entry: str) -> None:
+        # A result larger than the whole tier would only evict everything else
+        if len(entry) <= self.max_bytes:
+            super()._put_local(key, entry)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {**super().metrics(), "max_bytes": self.max_bytes}
+
+
+async def analyze_text_cached(
+    text: str,
+    analyze_symbols: bool = True,
+    analyze_energy: bool = True,
+    analyze_correspondences: bool = True,
+    parallel: bool = False,
+) -> Dict[str, Any]:
+    """
+    Perform complete semantic analysis on text, memoized by content.
+
+    Args:
+        text: Input text to analyze
+        analyze_symbols: Whether to detect hermetic symbols
+        analyze_energy: Whether to analyze elemental energy
+        analyze_correspondences: Whether to find correspondences
+        parallel: Compute misses on the analysis process pool
+
+    Returns:
+        Complete analysis results
+    """
+    await refresh_lexicon()
+    analyzer = get_semantic_analyzer()
+    cache = get_analysis_cache()
+    flags = (analyze_symbols, analyze_energy, analyze_correspondences)
+    key = cache.make_key(text, analyzer.lexicon_version, flags)
+
+    result = await cache.get(key)
+    if result is None:
+        if parallel:
+            result = await analyze_text_parallel(text, *flags)
+        else:
+            result = analyzer.analyze_text(text, *flags)
+        await cache.set(key, result)
+
+    return result
+
+
+# Global instance
+_analysis_cache: Optional[AnalysisCache] = None
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """Get or create the global analysis cache instance."""
+    global _analysis_cache
+    if _analysis_cache is None:
+        _analysis_cache = AnalysisCache(
+            max_bytes=settings.analysis_cache_max_bytes,
+            ttl=settings.analysis_cache_ttl,
+            use_redis=settings.analysis_cache_redis,
+        )
+    return _analysis_cache
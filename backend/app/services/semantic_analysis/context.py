@@ -0,0 +1,41 @@
+"""
+Per-call analysis context shared by the semantic analysis stages.
+"""
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+import time
+
+
+class AnalysisContext:
+    """
+    Holds the artifacts derived from one text during a single analysis call.
+
+    The normalized text, token list and symbol hits are computed at most once
+    and then read by every stage. Time spent per stage is recorded in
+    ``timings`` (seconds) for profiling.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens: Optional[List[str]] = None
+        self.symbols: Optional[List[Dict[str, Any]]] = None
+        self.timings: Dict[str, float] = {}
+        self._normalized_text: Optional[str] = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Record the wall time of a block under the given stage name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+    @property
+    def normalized_text(self) -> str:
+        """Lowercased text, computed on first access."""
+        if self._normalized_text is None:
+            with self.stage("normalize"):
+                self._normalized_text = self.text.lower()
+        return self._normalized_text
@@ -0,0 +1,80 @@
+"""
+Symbol co-occurrence queries over positional postings.
+
+Passages are found by a k-way merge-join of the sorted position lists of the
+queried symbols, so a query costs O(n log k) in the number of positions,
+whatever the window, and never rescans the book content.
+"""
+from collections import deque
+from heapq import merge
+from itertools import repeat
+from typing import Any, Dict, List, Sequence
+
+
+def find_cooccurrences(
+    postings: Dict[str, Sequence[int]],
+    window: int,
+) -> List[Dict[str, Any]]:
+    """
+    Find passages in which every queried symbol occurs within a window.
+
+    A match is a set of positions, at least one per symbol, spanning at most
+    ``window`` characters. Overlapping matches are merged into one passage.
+
+    Args:
+        postings: Sorted positions per symbol
+        window: Maximum distance in characters between the first and last
+            symbol of a match
+
+    Returns:
+        Passages in text order, each with its start, end and the positions of
+        every symbol inside it
+    """
+    symbols = list(postings)
+    if not symbols or any(not postings[symbol] for symbol in symbols):
+        return []
+
+    streams = [zip(postings[symbol], repeat(index)) for index, symbol in enumerate(symbols)]
+
+    passages: List[Dict[str, Any]] = []
+    in_window: deque = deque()
+    counts = [0] * len(symbols)
+    missing = len(symbols)
+    # Sequence number of the last merged entry attributed to a passage
+    attributed = -1
+
+    for sequence, (position, index) in enumerate(merge(*streams)):
+        in_window.append((sequence, position, index))
+        if counts[index] == 0:
+            missing -= 1
+        counts[index] += 1
+
+        while position - in_window[0][1] > window:
+            _, _, dropped = in_window.popleft()
+            counts[dropped] -= 1
+            if counts[dropped] == 0:
+                missing += 1
+
+        if missing:
+            continue
+
+        start = in_window[0][1]
+        if passages and start <= passages[-1]["end"]:
+            passage = passages[-1]
+            passage["end"] = position
+        else:
+            passage = {"start": start, "end": position, "positions": {s: [] for s in symbols}}
+            passages.append(passage)
+
+        # Only entries merged since the last match are new; walking back to the
+        # first attributed one attributes every position once, so the join stays linear
+        new_entries = []
+        for entry in reversed(in_window):
+            if entry[0] <= attributed:
+                break
+            new_entries.append(entry)
+        for _, entry_position, entry_index in reversed(new_entries):
+            passage["positions"][symbols[entry_index]].append(entry_position)
+        attributed = sequence
+
+    return passages
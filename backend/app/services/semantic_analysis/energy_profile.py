@@ -0,0 +1,153 @@
+"""
+Elemental energy timeline of a book.
+
+At ingest every token is mapped to its elements once and the per-element
+keyword counts are accumulated into a cumulative array sampled every
+``stride`` tokens. Any number of buckets is then answered from the stored
+array in O(buckets), without tokenizing the text again.
+
+Blob layout: a little-endian ``<II`` header (stride, token count) followed by
+little-endian uint32 cumulative counts of shape (samples, elements), in
+``SemanticAnalyzer.ELEMENTAL_KEYWORDS`` order. Sample ``k`` counts the tokens
+before ``min(k * stride, token count)``.
+"""
+from typing import Any, Dict, List, Optional, Tuple, cast
+import math
+import struct
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.models import Book
+from app.services.semantic_analysis.analyzer import SemanticAnalyzer, get_semantic_analyzer
+
+# Upper bound on stored samples per book, ~80 KB for five elements
+ENERGY_PROFILE_SAMPLES = 4096
+
+_HEADER = struct.Struct("<II")
+_COUNT_DTYPE = np.dtype("<u4")
+
+
+def build_energy_profile(text: str, analyzer: Optional[SemanticAnalyzer] = None) -> bytes:
+    """
+    Compute the compact energy timeline of a text.
+
+    Args:
+        text: Full text of the book
+        analyzer: Analyzer providing the elemental keywords, defaults to the
+            global analyzer
+
+    Returns:
+        Encoded cumulative element counts
+    """
+    analyzer = analyzer or get_semantic_analyzer()
+    elements = list(analyzer.ELEMENTAL_KEYWORDS)
+    keywords = list(analyzer.keyword_elements)
+
+    # Row 0 is "no element"; row i + 1 marks the elements of keyword i
+    membership = np.zeros((len(keywords) + 1, len(elements)), dtype=np.uint32)
+    for row, keyword in enumerate(keywords, start=1):
+        for element in analyzer.keyword_elements[keyword]:
+            membership[row, elements.index(element)] += 1
+
+    keyword_rows = {keyword: row for row, keyword in enumerate(keywords, start=1)}
+    tokens = analyzer.tokenize(text)
+    token_count = len(tokens)
+    ids = np.fromiter(
+        (keyword_rows.get(token, 0) for token in tokens), dtype=np.int32, count=token_count
+    )
+
+    stride = max(1, math.ceil(token_count / ENERGY_PROFILE_SAMPLES))
+    blocks = math.ceil(token_count / stride)
+    padded = np.zeros(blocks * stride, dtype=np.int32)
+    padded[:token_count] = ids
+
+    block_counts = membership[padded].reshape(blocks, stride, len(elements)).sum(axis=1)
+    cumulative = np.zeros((blocks + 1, len(elements)), dtype=_COUNT_DTYPE)
+    np.cumsum(block_counts, axis=0, out=cumulative[1:])
+
+    return _HEADER.pack(stride, token_count) + cumulative.tobytes()
+
+
+def decode_energy_profile(blob: bytes, element_count: int) -> Tuple[int, int, np.ndarray]:
+    """
+    Decode a blob produced by build_energy_profile.
+
+    Args:
+        blob: Encoded energy profile
+        element_count: Number of elements the profile was built with
+
+    Returns:
+        Tuple of stride, token count and the (samples, elements) cumulative counts
+    """
+    stride, token_count = _HEADER.unpack_from(blob)
+    cumulative = np.frombuffer(blob, dtype=_COUNT_DTYPE, offset=_HEADER.size)
+    return stride, token_count, cumulative.reshape(-1, element_count)
+
+
+def energy_timeline(
+    blob: bytes,
+    buckets: int,
+    analyzer: Optional[SemanticAnalyzer] = None,
+) -> Dict[str, Any]:
+    """
+    Split a stored energy profile into equal token buckets.
+
+    Args:
+        blob: Encoded energy profile
+        buckets: Number of buckets
+        analyzer: Analyzer providing the elements, defaults to the global analyzer
+
+    Returns:
+        Token count and, per bucket, its token range and element distribution
+    """
+    analyzer = analyzer or get_semantic_analyzer()
+    elements = list(analyzer.ELEMENTAL_KEYWORDS)
+    stride, token_count, cumulative = decode_energy_profile(blob, len(elements))
+
+    # Bucket edges snap to the nearest stored sample
+    samples = np.rint(np.linspace(0, token_count, buckets + 1) / stride).astype(np.int64)
+    samples = np.minimum(samples, len(cumulative) - 1)
+    counts = np.diff(cumulative[samples].astype(np.int64), axis=0)
+    totals = counts.sum(axis=1, keepdims=True)
+    shares = np.round(counts / np.maximum(totals, 1), 3)
+    edges = np.minimum(samples * stride, token_count)
+
+    timeline: List[Dict[str, Any]] = [
+        {
+            "start": int(edges[i]),
+            "end": int(edges[i + 1]),
+            "energy": dict(zip(elements, shares[i].tolist())),
+        }
+        for i in range(buckets)
+    ]
+    return {"token_count": token_count, "buckets": timeline}
+
+
+def backfill_energy_profiles(db: Session) -> int:
+    """
+    Compute energy profiles of books ingested before profiles were stored.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Number of books updated
+    """
+    updated = 0
+    for book in db.query(Book).filter(Book.energy_profile.is_(None)).yield_per(10):
+        book.energy_profile = build_energy_profile(cast(str, book.content) or "")
+        updated += 1
+
+    db.commit()
+    return updated
+
+
+if __name__ == "__main__":
+    from app.db.session import SessionLocal
+
+    session = SessionLocal()
+    try:
+        print(f"✅ Computed energy profiles of {backfill_energy_profiles(session)} books")
+    finally:
+        session.close()
@@ -0,0 +1,85 @@
+"""
+Immutable, versioned snapshots of the hermetic symbol lexicon.
+
+A Lexicon holds the symbol patterns, their correspondences and the matcher
+compiled from them. Snapshots are never modified: a new lexicon is compiled
+alongside the old one and swapped in with a single reference assignment, so
+calls in flight keep reading a consistent snapshot.
+"""
+from types import MappingProxyType
+from typing import Dict, Iterable, Mapping, Sequence, Tuple
+import hashlib
+import json
+
+from app.services.semantic_analysis.matcher import SymbolMatcher
+
+# Snapshots restored in this process, so worker processes receiving a pickled
+# lexicon compile its matcher once per version rather than once per task
+_restored_lexicons: Dict[str, "Lexicon"] = {}
+_RESTORED_LEXICONS_MAX = 4
+
+
+def keywords_pattern(keywords: Iterable[str]) -> str:
+    """Build a symbol pattern matching any of its keyword alternatives."""
+    return r"\b(" + "|".join(keywords) + r")\b"
+
+
+class Lexicon:
+    """
+    Compiled snapshot of the symbol tables.
+
+    Attributes:
+        symbol_tables: Category -> symbol name -> pattern, read-only
+        correspondences: Symbol name -> tuple of correspondences, read-only
+        matcher: SymbolMatcher compiled from symbol_tables
+        version: Content hash identifying the snapshot
+    """
+
+    __slots__ = ("symbol_tables", "correspondences", "matcher", "version")
+
+    def __init__(
+        self,
+        symbol_tables: Mapping[str, Mapping[str, str]],
+        correspondences: Mapping[str, Sequence[str]],
+    ):
+        self.symbol_tables = MappingProxyType(
+            {category: MappingProxyType(dict(table)) for category, table in symbol_tables.items()}
+        )
+        self.correspondences = MappingProxyType(
+            {name: tuple(values) for name, values in correspondences.items()}
+        )
+        self.version = self._compute_version()
+        self.matcher = SymbolMatcher(self.symbol_tables)
+
+    def _compute_version(self) -> str:
+        """Hash the tables; equal tables give equal versions in every process."""
+        tables = {
+            "symbols": {category: dict(table) for category, table in self.symbol_tables.items()},
+            "correspondences": {
+                name: list(values) for name, values in self.correspondences.items()
+            },
+        }
+        encoded = json.dumps(tables, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()[:16]
+
+    def __len__(self) -> int:
+        return sum(len(table) for table in self.symbol_tables.values())
+
+    def __reduce__(self) -> Tuple:
+        tables = {category: dict(table) for category, table in self.symbol_tables.items()}
+        return _restore_lexicon, (self.version, tables, dict(self.correspondences))
+
+
+def _restore_lexicon(
+    version: str,
+    symbol_tables: Mapping[str, Mapping[str, str]],
+    correspondences: Mapping[str, Sequence[str]],
+) -> Lexicon:
+    """Unpickle a lexicon, reusing this process's compiled copy when there is one."""
+    lexicon = _restored_lexicons.get(version)
+    if lexicon is None:
+        lexicon = Lexicon(symbol_tables, correspondences)
+        if len(_restored_lexicons) >= _RESTORED_LEXICONS_MAX:
+            _restored_lexicons.pop(next(iter(_restored_lexicons)))
+        _restored_lexicons[version] = lexicon
+    return lexicon
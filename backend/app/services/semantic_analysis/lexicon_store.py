@@ -0,0 +1,183 @@
+"""
+Database-backed symbol lexicon with hot reloading.
+
+The ``hermetic_symbols`` table is the source of truth for symbol detection.
+Publishing compiles the table into a Lexicon snapshot and writes its version
+to a Redis key. Every worker polls that key at most once per
+``lexicon_refresh_seconds`` and, when the key changes, compiles the table
+and swaps its global analyzer to the new snapshot.
+"""
+from typing import Dict, List, Optional, cast
+import asyncio
+import time
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.redis import get_redis_client
+from app.db.session import SessionLocal
+from app.models.models import HermeticSymbol
+from app.services.semantic_analysis.analyzer import SemanticAnalyzer, get_semantic_analyzer
+from app.services.semantic_analysis.lexicon import Lexicon, keywords_pattern
+from app.services.semantic_analysis.matcher import split_alternatives
+
+LEXICON_VERSION_KEY = "semantic:lexicon:version"
+
+# Category order of the built-in tables; detection output follows it
+CATEGORY_ORDER = ["alchemical", "masonic", "kabbalistic"]
+
+_last_checked = 0.0
+_seen_version: Optional[str] = None
+
+
+def seed_lexicon(db: Session) -> int:
+    """
+    Fill an empty ``hermetic_symbols`` table from the built-in tables.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Number of symbols inserted
+    """
+    if db.query(HermeticSymbol.id).first() is not None:
+        return 0
+
+    builtin = SemanticAnalyzer.builtin_lexicon()
+    inserted = 0
+    for category, symbols in builtin.symbol_tables.items():
+        for name, pattern in symbols.items():
+            db.add(
+                HermeticSymbol(
+                    name=name,
+                    category=category,
+                    keywords=split_alternatives(pattern) or [pattern],
+                    correspondences=list(builtin.correspondences.get(name, ())),
+                )
+            )
+            inserted += 1
+
+    db.commit()
+    return inserted
+
+
+def load_lexicon(db: Session) -> Optional[Lexicon]:
+    """
+    Compile the ``hermetic_symbols`` table into a lexicon snapshot.
+
+    Each symbol matches any of its ``keywords``, which are regex alternatives
+    in the same syntax as the built-in patterns. ``correspondences`` may be a
+    list, or a mapping whose keys are the corresponding names.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Compiled lexicon, or None if the table is empty
+    """
+    rows = db.query(HermeticSymbol).order_by(HermeticSymbol.id).all()
+    if not rows:
+        return None
+
+    tables: Dict[str, Dict[str, str]] = {category: {} for category in CATEGORY_ORDER}
+    correspondences: Dict[str, List[str]] = {}
+    for row in rows:
+        if not row.keywords:
+            continue
+        name = cast(str, row.name)
+        tables.setdefault(cast(str, row.category), {})[name] = keywords_pattern(row.keywords)
+        if row.correspondences:
+            correspondences[name] = list(row.correspondences)
+
+    return Lexicon(
+        {category: table for category, table in tables.items() if table},
+        correspondences,
+    )
+
+
+def _load_lexicon_from_database() -> Optional[Lexicon]:
+    """Compile the table in a short-lived session."""
+    db = SessionLocal()
+    try:
+        return load_lexicon(db)
+    finally:
+        db.close()
+
+
+async def publish_lexicon(db: Session) -> Lexicon:
+    """
+    Compile the table, swap this worker to it and announce it to the others.
+
+    Args:
+        db: Database session
+
+    Returns:
+        The published lexicon
+    """
+    global _seen_version
+
+    lexicon = load_lexicon(db) or SemanticAnalyzer.builtin_lexicon()
+    get_semantic_analyzer(lexicon)
+
+    redis = await get_redis_client()
+    await redis.set(LEXICON_VERSION_KEY, lexicon.version)
+    _seen_version = lexicon.version
+    return lexicon
+
+
+async def refresh_lexicon(force: bool = False) -> None:
+    """
+    Swap to the published lexicon if its version changed since the last check.
+
+    Checks Redis at most once per ``lexicon_refresh_seconds``. On any Redis or
+    database error the current snapshot stays in use.
+
+    Args:
+        force: Check now, ignoring the refresh interval
+    """
+    global _last_checked, _seen_version
+
+    now = time.monotonic()
+    if not force and now - _last_checked < settings.lexicon_refresh_seconds:
+        return
+    # Claimed before awaiting, so concurrent callers skip this check
+    _last_checked = now
+
+    try:
+        redis = await get_redis_client()
+        version = await redis.get(LEXICON_VERSION_KEY)
+    except Exception as e:
+        print(f"Failed to check lexicon version: {e}")
+        return
+
+    if version is None or version == _seen_version:
+        return
+
+    try:
+        lexicon = await asyncio.get_running_loop().run_in_executor(
+            None, _load_lexicon_from_database
+        )
+    except Exception as e:
+        print(f"Failed to load lexicon {version}: {e}")
+        return
+
+    get_semantic_analyzer(lexicon or SemanticAnalyzer.builtin_lexicon())
+    _seen_version = version
+
+
+if __name__ == "__main__":
+    import sys
+
+    session = SessionLocal()
+    try:
+        command = sys.argv[1] if len(sys.argv) > 1 else "seed"
+        if command == "seed":
+            print(f"✅ Seeded {seed_lexicon(session)} hermetic symbols")
+        elif command == "publish":
+            published = asyncio.run(publish_lexicon(session))
+            print(f"✅ Published lexicon {published.version} ({len(published)} symbols)")
+        else:
+            print(f"Unknown command: {command}")
+            print("Usage: python -m app.services.semantic_analysis.lexicon_store [seed|publish]")
+    finally:
+        session.close()
@@ -0,0 +1,399 @@
+"""
+Compiled symbol matching engine for single-pass hermetic symbol detection.
+
+Symbol patterns are split into their alternatives once, at construction time.
+Plain words and whitespace-separated phrases are loaded into a token-level
+Aho-Corasick automaton, and every remaining alternative is folded into one
+precompiled regex alternation, so detection walks the text once per engine
+instead of once per symbol.
+
+Proximity alternatives built by ``proximity_pattern`` ("lead, then trail at
+most N tokens later") are also run on the automaton, with a bounded window of
+pending leads, so their worst case stays linear in the text length.
+"""
+from collections import deque
+from typing import Any, Dict, List, Mapping, Optional, Tuple, cast
+import re
+
+# Tokens fed to the automaton; matches the \b\w+\b tokenization used elsewhere
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# An alternative made only of words joined by \s+ can be matched literally
+_PHRASE_ALTERNATIVE = re.compile(r"\w+(?:\\s\+\w+)*")
+_PHRASE_SEPARATOR = r"\s+"
+
+# lead\W+(?:\w+\W+){0,N}?trail, as generated by proximity_pattern
+_PROXIMITY_ALTERNATIVE = re.compile(
+    r"(?P<lead>.+?)\\W\+\(\?:\\w\+\\W\+\)\{0,(?P<max_tokens>\d+)\}\?(?P<trail>.+)"
+)
+
+# A hit is (start, rank, end); rank is the alternative's order inside its symbol
+Hit = Tuple[int, int, int]
+
+
+def proximity_pattern(lead: str, trail: str, max_tokens: int) -> str:
+    """
+    Build a regex alternative matching ``lead`` followed by ``trail`` nearby.
+
+    The result is an ordinary regex, but SymbolMatcher recognizes its shape
+    and matches it in linear time instead of backtracking.
+
+    Args:
+        lead: Phrase, or ``(?:phrase|phrase)`` group of phrases, opening the match
+        trail: Phrase, or group of phrases, closing the match
+        max_tokens: Maximum number of tokens allowed between lead and trail
+
+    Returns:
+        Regex source for the alternative
+    """
+    return rf"{lead}\W+(?:\w+\W+){{0,{max_tokens}}}?{trail}"
+
+
+def _phrase_options(source: str) -> Optional[List[Tuple[str, ...]]]:
+    """Parse a phrase or a ``(?:phrase|phrase)`` group into word tuples."""
+    if source.startswith("(?:") and source.endswith(")"):
+        options = source[3:-1].split("|")
+    else:
+        options = [source]
+
+    if not all(_PHRASE_ALTERNATIVE.fullmatch(option) for option in options):
+        return None
+    return [tuple(w.lower() for w in option.split(_PHRASE_SEPARATOR)) for option in options]
+
+
+def split_alternatives(pattern: str) -> Optional[List[str]]:
+    """
+    Split a ``\\b(a|b|...)\\b`` pattern into its top-level alternatives.
+
+    Args:
+        pattern: Raw symbol pattern
+
+    Returns:
+        List of alternative sources, or None if the pattern has another shape
+    """
+    if not (pattern.startswith(r"\b(") and pattern.endswith(r")\b")):
+        return None
+
+    body = pattern[3:-3]
+    if body.startswith("?:"):
+        body = body[2:]
+    elif body.startswith("?"):
+        return None
+
+    alternatives: List[str] = []
+    current: List[str] = []
+    depth = 0
+    escaped = False
+    in_class = False
+
+    for char in body:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth < 0:
+                return None
+        elif char == "|" and depth == 0:
+            alternatives.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+
+    if depth or escaped or in_class:
+        return None
+
+    alternatives.append("".join(current))
+    return alternatives
+
+
+class SymbolMatcher:
+    """Matches every symbol of a set of symbol tables in one pass over the text."""
+
+    def __init__(self, symbol_tables: Mapping[str, Mapping[str, str]]):
+        """
+        Compile the matching engine.
+
+        Args:
+            symbol_tables: Mapping of category -> symbol name -> regex pattern
+        """
+        self.symbols: List[Tuple[str, str]] = []
+        phrases: List[Tuple[Tuple[str, ...], int, int]] = []
+        regex_sources: List[Tuple[int, int, str]] = []
+        proximity: List[Tuple[List[Tuple[str, ...]], List[Tuple[str, ...]], int, int, int]] = []
+
+        for category, symbols in symbol_tables.items():
+            for symbol_name, pattern in symbols.items():
+                index = len(self.symbols)
+                self.symbols.append((symbol_name, category))
+
+                alternatives = split_alternatives(pattern)
+                if alternatives is None:
+                    regex_sources.append((index, 0, pattern))
+                    continue
+
+                remaining = []
+                first_rank = len(alternatives)
+                for rank, alternative in enumerate(alternatives):
+                    near = _PROXIMITY_ALTERNATIVE.fullmatch(alternative)
+                    leads = _phrase_options(near.group("lead")) if near else None
+                    trails = _phrase_options(near.group("trail")) if near else None
+
+                    if _PHRASE_ALTERNATIVE.fullmatch(alternative):
+                        words = tuple(w.lower() for w in alternative.split(_PHRASE_SEPARATOR))
+                        phrases.append((words, index, rank))
+                    elif near and leads and trails:
+                        max_tokens = int(near.group("max_tokens"))
+                        proximity.append((leads, trails, index, rank, max_tokens))
+                    else:
+                        remaining.append(alternative)
+                        first_rank = min(first_rank, rank)
+                if remaining:
+                    source = r"\b(?:" + "|".join(remaining) + r")\b"
+                    regex_sources.append((index, first_rank, source))
+
+        # Proximity terms are automaton outputs past the symbol indexes:
+        # trail terms get even ids and lead terms odd ids, per rule
+        self._proximity_rules: List[Tuple[int, int, int]] = []
+        for leads, trails, index, rank, max_tokens in proximity:
+            term = len(self.symbols) + 2 * len(self._proximity_rules)
+            phrases.extend((words, term, rank) for words in trails)
+            phrases.extend((words, term + 1, rank) for words in leads)
+            self._proximity_rules.append((index, rank, max_tokens))
+
+        self._build_automaton(phrases)
+        self._build_regex(regex_sources)
+
+    def _build_automaton(self, phrases: List[Tuple[Tuple[str, ...], int, int]]) -> None:
+        """Build the token-level Aho-Corasick automaton for literal phrases."""
+        goto: List[Dict[str, int]] = [{}]
+        fail: List[int] = [0]
+        output: List[List[Tuple[int, int, int]]] = [[]]
+
+        for words, index, rank in phrases:
+            state = 0
+            for word in words:
+                next_state = goto[state].get(word)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][word] = next_state
+                    goto.append({})
+                    fail.append(0)
+                    output.append([])
+                state = next_state
+            output[state].append((len(words), index, rank))
+
+        # Breadth-first pass to wire failure links and inherit their outputs
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and word not in goto[fallback]:
+                    fallback = fail[fallback]
+                if state:
+                    fail[next_state] = goto[fallback].get(word, 0)
+                output[next_state] = output[next_state] + output[fail[next_state]]
+
+        self._goto = goto
+        self._fail = fail
+        # Sorted by index so a rule's trail is handled before a lead on the same token
+        self._output = [tuple(sorted(entries, key=lambda e: e[1])) for entries in output]
+        self._depth = max((len(words) for words, _, _ in phrases), default=1)
+
+    def _build_regex(self, regex_sources: List[Tuple[int, int, str]]) -> None:
+        """Fold the non-literal alternatives into one lookahead alternation."""
+        self._regex_symbols = [index for index, _, _ in regex_sources]
+        self._regex_ranks = [rank for _, rank, _ in regex_sources]
+        self._regex_patterns = [re.compile(source, re.IGNORECASE) for _, _, source in regex_sources]
+        self._regex_order = {index: order for order, index in enumerate(self._regex_symbols)}
+
+        if not regex_sources:
+            self._combined = None
+            return
+
+        # Symbols match independently of each other, so the alternation sits in a
+        # lookahead: it reports every start position without consuming the text.
+        # A shared leading word boundary is hoisted out so it filters positions early.
+        sources = [(index, source) for index, _, source in regex_sources]
+        prefix = ""
+        if all(source.startswith(r"\b") for _, source in sources):
+            prefix = r"\b"
+            sources = [(index, source[2:]) for index, source in sources]
+        groups = "|".join(f"(?P<s{index}>{source})" for index, source in sources)
+        self._combined = re.compile(f"{prefix}(?={groups})", re.IGNORECASE)
+
+    def _scan_phrases(
+        self,
+        text: str,
+        hits: List[List[Hit]],
+        tokens: Optional[List[str]] = None,
+    ) -> None:
+        """Feed the text's tokens through the automaton, collecting phrase hits."""
+        goto, fail, output = self._goto, self._fail, self._output
+        record_token = tokens.append if tokens is not None else None
+        recent_starts: deque = deque(maxlen=self._depth)
+        symbol_count = len(self.symbols)
+        pending_leads: List[deque] = [deque() for _ in self._proximity_rules]
+        state = 0
+        previous_end = 0
+
+        for position, match in enumerate(TOKEN_PATTERN.finditer(text)):
+            start = match.start()
+            # Phrase words may only be separated by whitespace
+            if state and not text[previous_end:start].isspace():
+                state = 0
+
+            token = match.group()
+            if record_token is not None:
+                record_token(token)
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+
+            previous_end = match.end()
+            recent_starts.append(start)
+
+            if state:
+                for length, index, rank in output[state]:
+                    if index < symbol_count:
+                        hits[index].append((recent_starts[-length], rank, previous_end))
+                        continue
+
+                    rule, is_lead = divmod(index - symbol_count, 2)
+                    symbol, rank, max_tokens = self._proximity_rules[rule]
+                    leads = pending_leads[rule]
+                    if is_lead:
+                        # Leads this old can no longer reach any later trail
+                        horizon = position - self._depth - max_tokens
+                        while leads and leads[0][0] < horizon:
+                            leads.popleft()
+                        leads.append((position, recent_starts[-length]))
+                        continue
+
+                    # Pair the trail with the earliest lead that ends at most
+                    # max_tokens tokens before it, like the lazy regex would
+                    first_token = position - length + 1
+                    while leads and leads[0][0] < first_token - 1 - max_tokens:
+                        leads.popleft()
+                    if leads and leads[0][0] < first_token:
+                        hits[symbol].append((leads[0][1], rank, previous_end))
+                        leads.clear()
+
+    def _scan_regex(self, text: str, hits: List[List[Hit]]) -> None:
+        """Run the combined alternation once, collecting regex hits."""
+        if self._combined is None:
+            return
+
+        for match in self._combined.finditer(text):
+            start = match.start()
+            # Every alternative of the combined pattern is a named group
+            group = cast(str, match.lastgroup)
+            first = self._regex_order[int(group[1:])]
+            hits[self._regex_symbols[first]].append(
+                (start, self._regex_ranks[first], match.end(group))
+            )
+
+            # Later symbols may also match at this very position
+            for order in range(first + 1, len(self._regex_symbols)):
+                other = self._regex_patterns[order].match(text, start)
+                if other:
+                    hits[self._regex_symbols[order]].append(
+                        (start, self._regex_ranks[order], other.end())
+                    )
+
+    def find_hits(self, text: str, tokens: Optional[List[str]] = None) -> List[List[Hit]]:
+        """
+        Collect raw, possibly overlapping hits for every symbol.
+
+        Args:
+            text: Lowercased input text
+            tokens: Optional list that receives the text's word tokens as they
+                are scanned, so callers need not tokenize the text again
+
+        Returns:
+            One list of (start, rank, end) hits per symbol, in symbol order
+        """
+        hits: List[List[Hit]] = [[] for _ in self.symbols]
+        self._scan_phrases(text, hits, tokens)
+        self._scan_regex(text, hits)
+        return hits
+
+    def detect(self, text: str, tokens: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Detect symbols in lowercased text.
+
+        Matches of one symbol never overlap, mirroring ``re.finditer`` on the
+        symbol's own pattern; different symbols may share the same span.
+
+        Args:
+            text: Lowercased input text
+            tokens: Optional list that receives the text's word tokens
+
+        Returns:
+            List of detected symbols with their categories and positions
+        """
+        return self.summarize(self.find_hits(text, tokens))
+
+    def summarize(self, hits: List[List[Hit]]) -> List[Dict[str, Any]]:
+        """Resolve overlapping hits per symbol and format the detection result."""
+        accumulator = SymbolAccumulator(self)
+        accumulator.add(hits)
+        return accumulator.results()
+
+
+class SymbolAccumulator:
+    """
+    Accumulates non-overlapping symbol positions across consecutive windows.
+
+    Windows must be added in text order. Hits are shifted by the window's
+    absolute offset, and a symbol's match that overlaps the previous accepted
+    match of the same symbol is dropped, exactly as ``re.finditer`` would.
+    """
+
+    def __init__(self, matcher: SymbolMatcher):
+        self.matcher = matcher
+        self.positions: List[List[int]] = [[] for _ in matcher.symbols]
+        self._last_ends = [0] * len(matcher.symbols)
+
+    def add(self, hits: List[List[Hit]], offset: int = 0) -> None:
+        """
+        Add the hits of one window.
+
+        Args:
+            hits: Output of SymbolMatcher.find_hits for the window
+            offset: Absolute position of the window's first character
+        """
+        for index, symbol_hits in enumerate(hits):
+            if not symbol_hits:
+                continue
+
+            symbol_hits.sort()
+            positions = self.positions[index]
+            last_end = self._last_ends[index]
+            for start, _, end in symbol_hits:
+                if start + offset >= last_end:
+                    positions.append(start + offset)
+                    last_end = end + offset
+            self._last_ends[index] = last_end
+
+    def results(self) -> List[Dict[str, Any]]:
+        """Format the accumulated positions as a detection result."""
+        return [
+            {
+                "symbol": symbol_name,
+                "category": category,
+                "count": len(positions),
+                "positions": positions,
+            }
+            for (symbol_name, category), positions in zip(self.matcher.symbols, self.positions)
+            if positions
+        ]
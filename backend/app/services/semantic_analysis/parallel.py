@@ -0,0 +1,223 @@
+"""
+Parallel whole-book semantic analysis on a process pool.
+
+Analysis is CPU-bound Python, so large texts are split into shards that are
+scanned by worker processes while the event loop stays free. Each shard reads
+``STREAM_OVERLAP_CHARS`` past its end so no boundary-spanning match is lost,
+and the per-shard results are merged back into a normal analyze_text result.
+"""
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import json
+import multiprocessing
+
+from app.core.config import settings
+from app.services.semantic_analysis.analyzer import (
+    STREAM_OVERLAP_CHARS,
+    find_safe_cut,
+    get_semantic_analyzer,
+)
+from app.services.semantic_analysis.lexicon import Lexicon
+from app.services.semantic_analysis.matcher import Hit, SymbolAccumulator
+
+
+def plan_shards(text: str, shard_count: int) -> List[int]:
+    """
+    Choose shard boundaries for a text.
+
+    Args:
+        text: Lowercased text to split
+        shard_count: Desired number of shards
+
+    Returns:
+        Sorted cut positions, starting with 0 and ending with len(text)
+    """
+    cuts = [0]
+    for shard in range(1, shard_count):
+        cut = find_safe_cut(text, len(text) * shard // shard_count)
+        if cut > cuts[-1]:
+            cuts.append(cut)
+    cuts.append(len(text))
+    return cuts
+
+
+def _analyze_shard(
+    shard: str,
+    cutoff: int,
+    scan_symbols: bool,
+    count_energy: bool,
+    lexicon: Lexicon,
+) -> Tuple[List[List[Hit]], Dict[str, int]]:
+    """Worker entry point: scan one shard with the caller's lexicon snapshot."""
+    analyzer = get_semantic_analyzer(lexicon)
+    return analyzer.scan_window(shard, cutoff, scan_symbols, count_energy)
+
+
+async def analyze_text_parallel(
+    text: str,
+    analyze_symbols: bool = True,
+    analyze_energy: bool = True,
+    analyze_correspondences: bool = True,
+    executor: Optional[Executor] = None,
+) -> Dict[str, Any]:
+    """
+    Perform complete semantic analysis on text without blocking the event loop.
+
+    Args:
+        text: Input text to analyze
+        analyze_symbols: Whether to detect hermetic symbols
+        analyze_energy: Whether to analyze elemental energy
+        analyze_correspondences: Whether to find correspondences
+        executor: Executor to run shards on, defaults to the shared process pool
+
+    Returns:
+        Complete analysis results, identical to analyze_text
+    """
+    analyzer = get_semantic_analyzer()
+    executor = executor or get_analysis_executor()
+    loop = asyncio.get_running_loop()
+
+    normalized = text.lower()
+    shard_count = max(
+        1,
+        min(settings.analysis_workers, len(normalized) // settings.analysis_shard_min_chars),
+    )
+    cuts = plan_shards(normalized, shard_count)
+    scan_symbols = analyze_symbols or analyze_correspondences
+
+    shard_results = await asyncio.gather(
+        *(
+            loop.run_in_executor(
+                executor,
+                _analyze_shard,
+                normalized[start : end + STREAM_OVERLAP_CHARS],
+                end - start,
+                scan_symbols,
+                analyze_energy,
+                analyzer.lexicon,
+            )
+            for start, end in zip(cuts, cuts[1:])
+        )
+    )
+
+    # Merge in text order so per-symbol overlaps across shards resolve correctly
+    accumulator = SymbolAccumulator(analyzer.symbol_matcher)
+    element_counts = {element: 0 for element in analyzer.ELEMENTAL_KEYWORDS}
+    for start, (hits, counts) in zip(cuts, shard_results):
+        accumulator.add(hits, start)
+        for element, count in counts.items():
+            element_counts[element] += count
+
+    return analyzer.compose_result(
+        accumulator.results(),
+        element_counts,
+        analyze_symbols=analyze_symbols,
+        analyze_energy=analyze_energy,
+        analyze_correspondences=analyze_correspondences,
+    )
+
+
+def _analyze_batch(
+    texts: Sequence[str],
+    first_index: int,
+    lexicon: Lexicon,
+    analyze_symbols: bool,
+    analyze_energy: bool,
+    analyze_correspondences: bool,
+) -> str:
+    """Worker entry point: analyze a group of texts into NDJSON lines."""
+    analyzer = get_semantic_analyzer(lexicon)
+    lines = []
+    for index, text in enumerate(texts, start=first_index):
+        result = analyzer.analyze_text(
+            text,
+            analyze_symbols=analyze_symbols,
+            analyze_energy=analyze_energy,
+            analyze_correspondences=analyze_correspondences,
+        )
+        lines.append(json.dumps({"index": index, **result}) + "\n")
+    return "".join(lines)
+
+
+async def iter_batch_analysis(
+    texts: Sequence[str],
+    analyze_symbols: bool = True,
+    analyze_energy: bool = True,
+    analyze_correspondences: bool = True,
+    executor: Optional[Executor] = None,
+) -> AsyncIterator[str]:
+    """
+    Analyze many texts, yielding NDJSON result lines in input order.
+
+    Batches smaller than one shard are analyzed on a thread, off the event
+    loop. Larger batches are cut into groups of about ``analysis_shard_min_chars`` characters that run on
+    the process pool, with a bounded number of groups in flight.
+
+    Args:
+        texts: Texts to analyze
+        analyze_symbols: Whether to detect hermetic symbols
+        analyze_energy: Whether to analyze elemental energy
+        analyze_correspondences: Whether to find correspondences
+        executor: Executor to run groups on, defaults to the shared process pool
+
+    Yields:
+        Blocks of NDJSON lines, one line per text, each tagged with its index
+    """
+    flags = (analyze_symbols, analyze_energy, analyze_correspondences)
+    lexicon = get_semantic_analyzer().lexicon
+
+    if sum(len(text) for text in texts) < settings.analysis_shard_min_chars:
+        yield await asyncio.to_thread(_analyze_batch, texts, 0, lexicon, *flags)
+        return
+
+    executor = executor or get_analysis_executor()
+    loop = asyncio.get_running_loop()
+    pending: deque = deque()
+
+    def submit(first: int, last: int) -> None:
+        pending.append(
+            loop.run_in_executor(
+                executor, _analyze_batch, texts[first:last], first, lexicon, *flags
+            )
+        )
+
+    first = 0
+    group_chars = 0
+    for index, text in enumerate(texts):
+        group_chars += len(text)
+        if group_chars >= settings.analysis_shard_min_chars:
+            submit(first, index + 1)
+            first, group_chars = index + 1, 0
+            if len(pending) >= 2 * settings.analysis_workers:
+                yield await pending.popleft()
+    if first < len(texts):
+        submit(first, len(texts))
+
+    while pending:
+        yield await pending.popleft()
+
+
+# Global instance
+_analysis_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_analysis_executor() -> ProcessPoolExecutor:
+    """Get or create the shared analysis process pool."""
+    global _analysis_executor
+    if _analysis_executor is None:
+        # Spawned workers do not inherit the server's threads and sockets
+        _analysis_executor = ProcessPoolExecutor(
+            max_workers=settings.analysis_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _analysis_executor
+
+
+def shutdown_analysis_executor() -> None:
+    """Shut down the shared analysis process pool."""
+    global _analysis_executor
+    if _analysis_executor is not None:
+        _analysis_executor.shutdown(cancel_futures=True)
+        _analysis_executor = None
@@ -0,0 +1,144 @@
+"""
+Compact positional postings for the symbols detected in a book.
+
+Symbol positions are stored out of line, one ``symbol_postings`` row per book
+and symbol, as delta-encoded little-endian ``array('I')`` blobs. The Book row
+itself only keeps per-symbol counts, and positions are decoded on demand.
+"""
+from array import array
+from itertools import accumulate
+from typing import Any, Dict, Iterable, List, Optional, Sequence, cast
+import sys
+
+from sqlalchemy.orm import Session
+
+from app.models.models import Book, SymbolPosting
+
+
+def encode_positions(positions: Sequence[int]) -> bytes:
+    """
+    Delta-encode sorted positions into a compact blob.
+
+    Args:
+        positions: Ascending character positions
+
+    Returns:
+        Little-endian uint32 deltas
+    """
+    deltas = array("I", (b - a for a, b in zip([0, *positions], positions)))
+    if sys.byteorder == "big":
+        deltas.byteswap()
+    return deltas.tobytes()
+
+
+def decode_positions(blob: bytes) -> List[int]:
+    """
+    Decode a blob produced by encode_positions.
+
+    Args:
+        blob: Little-endian uint32 deltas
+
+    Returns:
+        Ascending character positions
+    """
+    deltas = array("I")
+    deltas.frombytes(blob)
+    if sys.byteorder == "big":
+        deltas.byteswap()
+    return list(accumulate(deltas))
+
+
+def symbol_counts(detected_symbols: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop positions from a detection result, keeping per-symbol counts."""
+    return [
+        {"symbol": s["symbol"], "category": s["category"], "count": s["count"]}
+        for s in detected_symbols
+    ]
+
+
+def build_symbol_postings(detected_symbols: Iterable[Dict[str, Any]]) -> List[SymbolPosting]:
+    """
+    Build postings rows for a detection result.
+
+    Args:
+        detected_symbols: Output of SemanticAnalyzer.detect_symbols
+
+    Returns:
+        Unsaved SymbolPosting rows, to attach to a Book
+    """
+    return [
+        SymbolPosting(
+            symbol=s["symbol"],
+            category=s["category"],
+            count=s["count"],
+            positions=encode_positions(s["positions"]),
+        )
+        for s in detected_symbols
+    ]
+
+
+def load_symbol_positions(
+    db: Session,
+    book_id: int,
+    symbols: Optional[Sequence[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Load decoded symbol positions of a book.
+
+    Args:
+        db: Database session
+        book_id: Book ID
+        symbols: Optional symbol names to restrict to
+
+    Returns:
+        Symbols with their categories, counts and positions
+    """
+    query = db.query(SymbolPosting).filter(SymbolPosting.book_id == book_id)
+    if symbols:
+        query = query.filter(SymbolPosting.symbol.in_(symbols))
+
+    return [
+        {
+            "symbol": posting.symbol,
+            "category": posting.category,
+            "count": posting.count,
+            "positions": decode_positions(cast(bytes, posting.positions)),
+        }
+        for posting in query.order_by(SymbolPosting.id).all()
+    ]
+
+
+def backfill_symbol_postings(db: Session) -> int:
+    """
+    Move positions still stored inline in ``books.hermetic_symbols`` into postings.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Number of books migrated
+    """
+    migrated = 0
+    for book in db.query(Book).yield_per(100):
+        detected: List[Dict[str, Any]] = cast(list, book.hermetic_symbols) or []
+        if not any("positions" in s for s in detected):
+            continue
+
+        book.symbol_postings = build_symbol_postings(
+            {**s, "positions": sorted(s.get("positions", []))} for s in detected
+        )
+        book.hermetic_symbols = cast(Any, symbol_counts(detected))
+        migrated += 1
+
+    db.commit()
+    return migrated
+
+
+if __name__ == "__main__":
+    from app.db.session import SessionLocal
+
+    session = SessionLocal()
+    try:
+        print(f"✅ Migrated symbol positions of {backfill_symbol_postings(session)} books")
+    finally:
+        session.close()
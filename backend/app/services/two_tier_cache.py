@@ -0,0 +1,131 @@
+"""
+Two-tier cache: a bounded in-process LRU in front of Redis.
+
+Lookups try the worker's own LRU first, then Redis, which every worker
+shares; Redis hits are promoted into the LRU. Redis is best effort: its
+errors are counted and treated as misses. Subclasses choose how values are
+held in memory and serialized for Redis, and when the LRU is full.
+"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Optional, TypeVar
+
+from app.db.redis import get_redis_client
+
+Entry = TypeVar("Entry")
+
+
+class TwoTierCache(ABC, Generic[Entry]):
+    """In-process LRU of ``Entry`` objects, mirrored to Redis as strings."""
+
+    def __init__(self, ttl: int, use_redis: bool = True):
+        self.ttl = ttl
+        self.use_redis = use_redis
+        self._entries: "OrderedDict[str, Entry]" = OrderedDict()
+        self._size = 0
+        self.stats = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "redis_errors": 0,
+        }
+
+    @abstractmethod
+    def _to_entry(self, value: Any) -> Entry:
+        """In-memory form of a value given to ``set``."""
+
+    @abstractmethod
+    def _from_entry(self, entry: Entry) -> Any:
+        """Value returned by ``get`` for an entry."""
+
+    @abstractmethod
+    def _dumps(self, entry: Entry) -> str:
+        """Serialize an entry for Redis."""
+
+    @abstractmethod
+    def _loads(self, payload: str) -> Entry:
+        """Deserialize an entry read from Redis."""
+
+    @abstractmethod
+    def _sizeof(self, entry: Entry) -> int:
+        """Bytes an entry takes in memory."""
+
+    @abstractmethod
+    def _over_capacity(self) -> bool:
+        """Whether the LRU must evict its oldest entry."""
+
+    def _put_local(self, key: str, entry: Entry) -> None:
+        """Store an entry, evicting the least recently used ones."""
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= self._sizeof(previous)
+
+        self._entries[key] = entry
+        self._size += self._sizeof(entry)
+
+        while self._entries and self._over_capacity():
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= self._sizeof(evicted)
+            self.stats["evictions"] += 1
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached value.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.stats["local_hits"] += 1
+            return self._from_entry(entry)
+
+        if self.use_redis:
+            try:
+                redis = await get_redis_client()
+                payload = await redis.get(key)
+            except Exception:
+                self.stats["redis_errors"] += 1
+                payload = None
+
+            if payload is not None:
+                entry = self._loads(payload)
+                self._put_local(key, entry)
+                self.stats["redis_hits"] += 1
+                return self._from_entry(entry)
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: Any) -> None:
+        """Store a value in both tiers."""
+        entry = self._to_entry(value)
+        self._put_local(key, entry)
+
+        if self.use_redis:
+            try:
+                redis = await get_redis_client()
+                await redis.setex(key, self.ttl, self._dumps(entry))
+            except Exception:
+                self.stats["redis_errors"] += 1
+
+    def clear(self) -> None:
+        """Drop every in-process entry."""
+        self._entries.clear()
+        self._size = 0
+
+    def metrics(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size of the in-process tier."""
+        lookups = self.stats["local_hits"] + self.stats["redis_hits"] + self.stats["misses"]
+        hits = self.stats["local_hits"] + self.stats["redis_hits"]
+        return {
+            **self.stats,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._size,
+        }
@@ -0,0 +1,112 @@
+"""
+Interface of the vector stores behind the embedding service.
+
+A store holds one collection of points: an ID, a vector and a payload dict.
+Filters are ``{field: value}`` dicts; a point matches when every field
+equals its value, or contains it when the payload value is a list. Hits are
+dicts with the point's ``id``, ``score`` (cosine similarity) and ``payload``.
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence
+import asyncio
+
+Filters = Optional[Dict[str, Any]]
+
+# Payload fields searches filter on, indexed by every store, and their types
+PAYLOAD_INDEXES = {
+    "book_id": "integer",
+    "author": "keyword",
+    "source": "keyword",
+    "language": "keyword",
+}
+
+
+class VectorStore(ABC):
+    """A collection of vectors with payloads, searchable by cosine similarity."""
+
+    #: Name reported by health checks
+    name = "vector store"
+
+    @abstractmethod
+    def ensure_collection(self, size: int) -> None:
+        """Create the collection for vectors of ``size`` dimensions if it does not exist."""
+
+    @abstractmethod
+    def upsert(
+        self,
+        ids: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        payloads: Sequence[Dict[str, Any]],
+    ) -> None:
+        """Insert points, replacing any with the same IDs."""
+
+    @abstractmethod
+    def search(self, vector: Sequence[float], limit: int, filters: Filters = None) -> List[Dict]:
+        """
+        Find the points most similar to a vector.
+
+        Args:
+            vector: Query vector
+            limit: Maximum number of hits
+            filters: Optional payload filters
+
+        Returns:
+            Hits, best first
+        """
+
+    @abstractmethod
+    def search_groups(
+        self,
+        vector: Sequence[float],
+        group_by: str,
+        limit: int,
+        filters: Filters = None,
+    ) -> List[Dict]:
+        """
+        Find the best point of each of the groups most similar to a vector.
+
+        Args:
+            vector: Query vector
+            group_by: Payload field whose value groups points
+            limit: Maximum number of groups
+            filters: Optional payload filters
+
+        Returns:
+            The best hit of each group, best first, with its ``group`` value
+        """
+
+    @abstractmethod
+    def delete(self, ids: Sequence[str]) -> None:
+        """Delete points by ID."""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of points in the collection."""
+
+    # Stores without a native async client run the blocking calls in a thread
+
+    async def upsert_async(
+        self,
+        ids: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        payloads: Sequence[Dict[str, Any]],
+    ) -> None:
+        """Awaitable upsert."""
+        await asyncio.to_thread(self.upsert, ids, vectors, payloads)
+
+    async def search_groups_async(
+        self,
+        vector: Sequence[float],
+        group_by: str,
+        limit: int,
+        filters: Filters = None,
+    ) -> List[Dict]:
+        """Awaitable search_groups."""
+        return await asyncio.to_thread(self.search_groups, vector, group_by, limit, filters)
+
+    async def check(self) -> None:
+        """Raise if the store cannot serve requests."""
+        await asyncio.to_thread(self.count)
+
+    async def close(self) -> None:
+        """Release connections and files."""
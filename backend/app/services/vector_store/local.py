@@ -0,0 +1,320 @@
+"""
+In-process NumPy vector store.
+
+Vectors are normalized on insert and kept as rows of one float32 matrix, so
+cosine search is a matrix-vector product followed by an ``argpartition``
+top-k. Filters are answered from per-field postings, a set of row numbers
+per payload value, built for the indexed fields at setup and for any other
+field the first time it is filtered on, then kept up to date on every upsert.
+Only the matching rows are then scored.
+
+With a ``path``, the matrix is a memory-mapped file and points are replayed
+from an append-only JSON lines log, so the collection survives restarts.
+Without one, everything lives in memory. Either way it needs nothing beyond
+NumPy and serves a single process: it is the development and test backend,
+and the fallback when Qdrant is unreachable.
+"""
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    TextIO,
+    Tuple,
+    Union,
+)
+import json
+import threading
+
+import numpy as np
+
+from app.services.vector_store.base import PAYLOAD_INDEXES, Filters, VectorStore
+
+# Rows allocated at least, and the matrix doubles whenever it is full
+MIN_CAPACITY = 1024
+
+
+def _payload_values(value: Any) -> Iterator[Hashable]:
+    """Values a filter can match: the value itself, or each element of a list."""
+    if isinstance(value, (list, tuple)):
+        for element in value:
+            if isinstance(element, Hashable):
+                yield element
+    elif value is not None and isinstance(value, Hashable):
+        yield value
+
+
+def _top(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` highest scores, highest first."""
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+class LocalVectorStore(VectorStore):
+    """Brute-force cosine search over a NumPy matrix, optionally memory-mapped."""
+
+    name = "local"
+
+    def __init__(self, collection_name: str, path: Optional[str] = None):
+        self.collection_name = collection_name
+        self.path = Path(path) if path else None
+        self.dimension: Optional[int] = None
+        # A memmap when persisted; rows past _size are spare capacity
+        self._matrix: Optional[Union[np.memmap, np.ndarray]] = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._size = 0
+        self._rows: Dict[str, int] = {}
+        self._ids: List[Any] = []
+        self._payloads: List[Optional[Dict[str, Any]]] = []
+        self._postings: Dict[str, Dict[Hashable, Set[int]]] = {}
+        self._log: Optional[TextIO] = None
+        self._lock = threading.RLock()
+
+    def _file(self, suffix: str) -> Path:
+        if self.path is None:
+            raise RuntimeError("An in-memory store has no files")
+        return self.path / f"{self.collection_name}{suffix}"
+
+    @property
+    def _vectors_path(self) -> Path:
+        return self._file(".vectors")
+
+    @property
+    def _log_path(self) -> Path:
+        return self._file(".points.jsonl")
+
+    def _dimension(self) -> int:
+        if self.dimension is None:
+            raise RuntimeError(f"Collection {self.collection_name} has not been created")
+        return self.dimension
+
+    def ensure_collection(self, size: int) -> None:
+        with self._lock:
+            if self.dimension is not None:
+                if self.dimension != size:
+                    raise ValueError(f"Collection has {self.dimension}-dimensional vectors")
+                return
+
+            self.dimension = size
+            if self.path is not None:
+                self.path.mkdir(parents=True, exist_ok=True)
+                self._vectors_path.touch(exist_ok=True)
+                self._replay_log()
+                self._log = open(self._log_path, "a", encoding="utf-8")
+            self._reserve(self._size)
+            for row in self._rows.values():
+                self._alive[row] = True
+            for field in PAYLOAD_INDEXES:
+                self._field_postings(field)
+
+    def _replay_log(self) -> None:
+        """Restore IDs and payloads from the points log, and map the vectors file."""
+        points: Dict[str, Tuple[int, Any, Dict[str, Any]]] = {}
+        if self._log_path.exists():
+            with open(self._log_path, encoding="utf-8") as log:
+                for line in log:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # Torn final write
+                    if record.get("deleted"):
+                        points.pop(str(record["id"]), None)
+                    else:
+                        points[str(record["id"])] = (record["row"], record["id"], record["payload"])
+                        self._size = max(self._size, record["row"] + 1)
+
+        self._ids = [None] * self._size
+        self._payloads = [None] * self._size
+        for key, (row, point_id, payload) in points.items():
+            self._rows[key] = row
+            self._ids[row] = point_id
+            self._payloads[row] = payload
+
+        dimension = self._dimension()
+        capacity = self._vectors_path.stat().st_size // (dimension * 4)
+        if capacity:
+            self._matrix = np.memmap(
+                self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, dimension)
+            )
+            self._alive = np.zeros(capacity, dtype=bool)
+
+    def _reserve(self, rows: int) -> Union[np.memmap, np.ndarray]:
+        """Grow the matrix, doubling it, until it holds ``rows`` rows, and return it."""
+        previous = self._matrix
+        capacity = 0 if previous is None else len(previous)
+        if previous is not None and rows <= capacity:
+            return previous
+
+        dimension = self._dimension()
+        capacity = max(rows, capacity * 2, MIN_CAPACITY)
+        matrix: Union[np.memmap, np.ndarray]
+        if self.path is not None:
+            if isinstance(previous, np.memmap):
+                previous.flush()
+            with open(self._vectors_path, "r+b") as vectors:
+                vectors.truncate(capacity * dimension * 4)
+            matrix = np.memmap(
+                self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, dimension)
+            )
+        else:
+            matrix = np.zeros((capacity, dimension), dtype=np.float32)
+            if previous is not None:
+                matrix[: len(previous)] = previous
+        self._matrix = matrix
+
+        alive = np.zeros(capacity, dtype=bool)
+        alive[: len(self._alive)] = self._alive
+        self._alive = alive
+        return matrix
+
+    def _index(self, row: int, add: bool) -> None:
+        """Add a row to, or remove it from, the postings of its payload values."""
+        payload = self._payloads[row] or {}
+        for field, postings in self._postings.items():
+            for value in _payload_values(payload.get(field)):
+                if add:
+                    postings.setdefault(value, set()).add(row)
+                else:
+                    postings.get(value, set()).discard(row)
+
+    def _field_postings(self, field: str) -> Dict[Hashable, Set[int]]:
+        """Postings of a payload field, built on its first use."""
+        postings = self._postings.get(field)
+        if postings is None:
+            postings = {}
+            for row in self._rows.values():
+                for value in _payload_values((self._payloads[row] or {}).get(field)):
+                    postings.setdefault(value, set()).add(row)
+            self._postings[field] = postings
+        return postings
+
+    def _write_log(self, records: List[Dict[str, Any]]) -> None:
+        if self._log is None:
+            return
+        self._log.write("".join(json.dumps(record, default=str) + "\n" for record in records))
+        self._log.flush()
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        payloads: Sequence[Dict[str, Any]],
+    ) -> None:
+        normalized = np.array(vectors, dtype=np.float32).reshape(len(ids), -1)
+        norms = np.linalg.norm(normalized, axis=1, keepdims=True)
+        normalized /= np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            rows = []
+            for point_id, payload in zip(ids, payloads):
+                key = str(point_id)
+                row = self._rows.get(key)
+                if row is None:
+                    row = self._size
+                    self._size += 1
+                    self._rows[key] = row
+                    self._ids.append(point_id)
+                    self._payloads.append(None)
+                else:
+                    self._index(row, add=False)
+                self._payloads[row] = payload
+                self._index(row, add=True)
+                rows.append(row)
+
+            matrix = self._reserve(self._size)
+            matrix[rows] = normalized
+            self._alive[rows] = True
+
+            # Vectors reach the file before the log records that point at them
+            if isinstance(matrix, np.memmap):
+                matrix.flush()
+            self._write_log(
+                [
+                    {"id": point_id, "row": row, "payload": payload}
+                    for point_id, row, payload in zip(ids, rows, payloads)
+                ]
+            )
+
+    def _scores(self, vector: Sequence[float], filters: Filters) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows matching the filters and their cosine similarity to a vector."""
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1)
+        matrix = self._reserve(self._size)
+
+        if filters:
+            matches = [
+                self._field_postings(field).get(value, set()) for field, value in filters.items()
+            ]
+            matches.sort(key=len)
+            matching = set(matches[0]).intersection(*matches[1:])
+            rows = np.fromiter(sorted(matching), dtype=np.int64, count=len(matching))
+            return rows, matrix[rows] @ query
+
+        scores = matrix[: self._size] @ query
+        rows = np.flatnonzero(self._alive[: self._size])
+        return rows, scores[rows]
+
+    def _hit(self, row: int, score: float) -> Dict[str, Any]:
+        return {"id": self._ids[row], "score": float(score), "payload": self._payloads[row]}
+
+    def search(self, vector: Sequence[float], limit: int, filters: Filters = None) -> List[Dict]:
+        with self._lock:
+            rows, scores = self._scores(vector, filters)
+            return [self._hit(rows[i], scores[i]) for i in _top(scores, limit)]
+
+    def search_groups(
+        self,
+        vector: Sequence[float],
+        group_by: str,
+        limit: int,
+        filters: Filters = None,
+    ) -> List[Dict]:
+        with self._lock:
+            rows, scores = self._scores(vector, filters)
+
+            # Widen the top-k until it spans enough groups, or every row
+            k = limit * 4
+            while True:
+                best: Dict[Hashable, Dict[str, Any]] = {}
+                for i in _top(scores, k):
+                    group = (self._payloads[rows[i]] or {}).get(group_by)
+                    if not isinstance(group, Hashable) or group is None or group in best:
+                        continue
+                    best[group] = {"group": group, **self._hit(rows[i], scores[i])}
+                    if len(best) == limit:
+                        break
+                if len(best) == limit or k >= len(scores):
+                    return list(best.values())
+                k *= 4
+
+    def delete(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            deleted = []
+            for point_id in ids:
+                row = self._rows.pop(str(point_id), None)
+                if row is None:
+                    continue
+                self._index(row, add=False)
+                self._alive[row] = False
+                self._payloads[row] = None
+                deleted.append({"id": point_id, "deleted": True})
+            self._write_log(deleted)
+
+    def count(self) -> int:
+        return len(self._rows)
+
+    async def close(self) -> None:
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+            if isinstance(self._matrix, np.memmap):
+                self._matrix.flush()
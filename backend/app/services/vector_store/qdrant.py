@@ -0,0 +1,307 @@
+"""
+Qdrant vector store.
+
+Blocking calls go through a QdrantClient and awaitable ones through an
+AsyncQdrantClient, both reusing their connections across requests. The
+collection is created and searched under the configured collection profile.
+
+The configured collection name is normally an alias of a versioned
+collection, one per embedding model and dimension, so a reindex can build
+the next version beside it and switch the alias atomically. A collection
+from before aliases is served as is until ``python -m app.services.reindex
+--version-legacy`` moves it behind an alias; switching aliases never
+deletes a collection.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Union, cast
+import hashlib
+
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import (
+    Batch,
+    Condition,
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    FieldCondition,
+    Filter,
+    GroupsResult,
+    MatchValue,
+    PayloadSchemaType,
+    SearchParams,
+)
+
+from app.core.config import settings
+from app.services.collection_profiles import quantization_config, search_params, vector_params
+from app.services.vector_store.base import PAYLOAD_INDEXES, Filters, VectorStore
+
+
+def versioned_collection_name(alias: str, model: str, dimension: int) -> str:
+    """Name of the collection holding ``model``'s vectors behind an alias."""
+    version = hashlib.blake2b(f"{model}:{dimension}".encode("utf-8"), digest_size=4).hexdigest()
+    return f"{alias}__{version}"
+
+
+class QdrantVectorStore(VectorStore):
+    """Collection on a Qdrant server, or in a local Qdrant for tests."""
+
+    name = "qdrant"
+
+    def __init__(
+        self,
+        collection_name: str,
+        client: QdrantClient,
+        async_client: Optional[AsyncQdrantClient] = None,
+        versioned_name: Optional[str] = None,
+    ):
+        self.collection_name = collection_name
+        self.client = client
+        self.async_client = async_client
+        # Collection created behind the ``collection_name`` alias when neither exists
+        self.versioned_name = versioned_name
+
+    @classmethod
+    def from_settings(
+        cls, collection_name: str, versioned_name: Optional[str] = None
+    ) -> "QdrantVectorStore":
+        """Connect to the configured Qdrant server."""
+        options: Dict[str, Any] = {
+            "host": settings.qdrant_host,
+            "port": settings.qdrant_port,
+            "grpc_port": settings.qdrant_grpc_port,
+            "prefer_grpc": settings.qdrant_prefer_grpc,
+            "timeout": settings.qdrant_timeout,
+        }
+        return cls(
+            collection_name,
+            QdrantClient(**options),
+            AsyncQdrantClient(**options),
+            versioned_name,
+        )
+
+    def aliases(self) -> Dict[str, str]:
+        """Collection each alias points to."""
+        return {
+            alias.alias_name: alias.collection_name for alias in self.client.get_aliases().aliases
+        }
+
+    def ensure_collection(self, size: int) -> None:
+        """
+        Resolve or create the collection.
+
+        An alias is pinned to the collection it points to now, so this store
+        keeps searching the index it started on after a reindex switches the
+        alias; workers started after the switch pick up the new index. A
+        collection of another dimension, built by another model, is refused.
+        """
+        aliases = self.aliases()
+        if self.collection_name in aliases:
+            self.collection_name = aliases[self.collection_name]
+
+        collections = [col.name for col in self.client.get_collections().collections]
+        if self.collection_name in collections:
+            vectors = self.client.get_collection(self.collection_name).config.params.vectors
+            stored = getattr(vectors, "size", size)
+            if stored != size:
+                raise ValueError(
+                    f"Collection {self.collection_name} holds {stored}-dimensional vectors, "
+                    f"not {size}; reindex, then restart with the new model"
+                )
+        else:
+            alias = None
+            if self.versioned_name and self.versioned_name != self.collection_name:
+                alias, self.collection_name = self.collection_name, self.versioned_name
+            if self.collection_name not in collections:
+                self.client.create_collection(
+                    collection_name=self.collection_name,
+                    vectors_config=vector_params(settings.qdrant_collection_profile, size),
+                    quantization_config=quantization_config(settings.qdrant_collection_profile),
+                )
+            if alias:
+                self.switch_alias(alias)
+        self.ensure_payload_indexes()
+
+    def is_unversioned(self, alias: str) -> bool:
+        """Whether ``alias`` names a collection from before aliases rather than an alias."""
+        return alias in [col.name for col in self.client.get_collections().collections]
+
+    def switch_alias(self, alias: str) -> Optional[str]:
+        """
+        Point an alias at this store's collection in one atomic update.
+
+        Args:
+            alias: Alias name
+
+        Returns:
+            The collection the alias pointed to before, if any
+
+        Raises:
+            RuntimeError: If ``alias`` is the name of a collection from before aliases
+        """
+        if self.is_unversioned(alias):
+            raise RuntimeError(
+                f"{alias} is a collection, not an alias; move it behind one with "
+                "python -m app.services.reindex --version-legacy"
+            )
+
+        operations: List[Union[CreateAliasOperation, DeleteAliasOperation]] = []
+        previous = self.aliases().get(alias)
+        if previous is not None:
+            operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+
+        operations.append(
+            CreateAliasOperation(
+                create_alias=CreateAlias(collection_name=self.collection_name, alias_name=alias)
+            )
+        )
+        self.client.update_collection_aliases(change_aliases_operations=operations)
+        return previous
+
+    def ensure_payload_indexes(self) -> None:
+        """Index the filterable payload fields, so filtered searches do not scan."""
+        indexed = self.client.get_collection(self.collection_name).payload_schema or {}
+        for field, schema in PAYLOAD_INDEXES.items():
+            if field not in indexed:
+                self.client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field,
+                    field_schema=PayloadSchemaType(schema),
+                )
+
+    @staticmethod
+    def _search_params() -> Optional[SearchParams]:
+        """Search parameters of the configured collection profile."""
+        return search_params(
+            settings.qdrant_collection_profile, settings.qdrant_quantization_oversampling
+        )
+
+    @staticmethod
+    def _build_filter(filters: Filters) -> Optional[Filter]:
+        """Build a Qdrant filter matching every metadata value."""
+        if not filters:
+            return None
+
+        conditions: List[Condition] = [
+            FieldCondition(
+                key=key,
+                match=MatchValue(value=value),
+            )
+            for key, value in filters.items()
+        ]
+        return Filter(must=conditions)
+
+    @staticmethod
+    def _points(
+        ids: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        payloads: Sequence[Dict[str, Any]],
+    ) -> Batch:
+        return Batch(
+            ids=list(ids),
+            vectors=cast(List[List[float]], list(vectors)),
+            payloads=list(payloads),
+        )
+
+    @staticmethod
+    def _best_of_groups(groups: GroupsResult) -> List[Dict]:
+        return [
+            {
+                "group": group.id,
+                "id": group.hits[0].id,
+                "score": group.hits[0].score,
+                "payload": group.hits[0].payload,
+            }
+            for group in groups.groups
+        ]
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        payloads: Sequence[Dict[str, Any]],
+    ) -> None:
+        self.client.upsert(
+            collection_name=self.collection_name,
+            points=self._points(ids, vectors, payloads),
+        )
+
+    async def upsert_async(
+        self,
+        ids: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        payloads: Sequence[Dict[str, Any]],
+    ) -> None:
+        if self.async_client is None:
+            return await super().upsert_async(ids, vectors, payloads)
+
+        await self.async_client.upsert(
+            collection_name=self.collection_name,
+            points=self._points(ids, vectors, payloads),
+        )
+
+    def search(self, vector: Sequence[float], limit: int, filters: Filters = None) -> List[Dict]:
+        results = self.client.search(
+            collection_name=self.collection_name,
+            query_vector=vector,
+            limit=limit,
+            query_filter=self._build_filter(filters),
+            search_params=self._search_params(),
+        )
+        return [
+            {"id": result.id, "score": result.score, "payload": result.payload}
+            for result in results
+        ]
+
+    def search_groups(
+        self,
+        vector: Sequence[float],
+        group_by: str,
+        limit: int,
+        filters: Filters = None,
+    ) -> List[Dict]:
+        groups = self.client.search_groups(
+            collection_name=self.collection_name,
+            query_vector=vector,
+            group_by=group_by,
+            limit=limit,
+            group_size=1,
+            query_filter=self._build_filter(filters),
+            search_params=self._search_params(),
+        )
+        return self._best_of_groups(groups)
+
+    async def search_groups_async(
+        self,
+        vector: Sequence[float],
+        group_by: str,
+        limit: int,
+        filters: Filters = None,
+    ) -> List[Dict]:
+        if self.async_client is None:
+            return await super().search_groups_async(vector, group_by, limit, filters)
+
+        groups = await self.async_client.search_groups(
+            collection_name=self.collection_name,
+            query_vector=vector,
+            group_by=group_by,
+            limit=limit,
+            group_size=1,
+            query_filter=self._build_filter(filters),
+            search_params=self._search_params(),
+        )
+        return self._best_of_groups(groups)
+
+    def delete(self, ids: Sequence[str]) -> None:
+        self.client.delete(collection_name=self.collection_name, points_selector=list(ids))
+
+    def count(self) -> int:
+        return self.client.count(self.collection_name).count
+
+    async def check(self) -> None:
+        if self.async_client is None:
+            return await super().check()
+        await self.async_client.get_collections()
+
+    async def close(self) -> None:
+        if self.async_client is not None:
+            await self.async_client.close()
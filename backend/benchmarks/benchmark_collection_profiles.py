@@ -0,0 +1,133 @@
+"""
+Recall-vs-memory benchmark of the Qdrant collection profiles.
+
+Loads the same vectors into one collection per profile on the configured
+Qdrant server (e.g. ``docker compose up qdrant``), then measures each
+profile's recall@k against exact float32 search, its search latency and the
+vector memory it keeps in RAM. Vectors are random points clustered around a
+few hundred centroids, which is closer to passage embeddings than uniform
+noise, so no embedding model is needed.
+
+Usage:
+    python benchmarks/benchmark_collection_profiles.py [num_points] [num_queries]
+"""
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_path))
+
+from qdrant_client import QdrantClient  # noqa: E402
+from qdrant_client.models import Batch, SearchParams  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.services.collection_profiles import (  # noqa: E402
+    COLLECTION_PROFILES,
+    get_profile,
+    quantization_config,
+    search_params,
+    vector_params,
+)
+
+TOP_K = 10
+UPSERT_BATCH = 512
+
+
+def make_vectors(count: int, dimension: int, rng) -> np.ndarray:
+    centroids = rng.standard_normal((max(count // 50, 1), dimension), dtype=np.float32)
+    points = centroids[rng.integers(len(centroids), size=count)]
+    points += 0.35 * rng.standard_normal((count, dimension), dtype=np.float32)
+    return points / np.linalg.norm(points, axis=1, keepdims=True)
+
+
+def ram_bytes(profile_name: str, count: int, dimension: int) -> int:
+    """Vector bytes a profile keeps resident in RAM (excluding the HNSW graph)."""
+    profile = get_profile(profile_name)
+    if profile["quantized"]:
+        return count * dimension  # int8 codes; originals are on disk
+    if profile["on_disk"]:
+        return 0  # Page cache only
+    return count * dimension * (2 if profile["datatype"] == "float16" else 4)
+
+
+def wait_until_indexed(client: QdrantClient, collection: str) -> None:
+    while client.get_collection(collection).status.value != "green":
+        time.sleep(0.5)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    num_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    dimension = settings.embedding_dimension
+
+    rng = np.random.default_rng(0)
+    vectors = make_vectors(count, dimension, rng)
+    queries = make_vectors(num_queries, dimension, rng)
+
+    client = QdrantClient(
+        host=settings.qdrant_host, port=settings.qdrant_port, timeout=settings.qdrant_timeout
+    )
+    try:
+        client.get_collections()
+    except Exception as e:
+        print(f"Qdrant not available at {settings.qdrant_host}:{settings.qdrant_port}: {e}")
+        return
+
+    print("=" * 78)
+    print(f"🔥 Collection profile benchmark - {count} x {dimension} vectors, recall@{TOP_K}")
+    print("=" * 78)
+
+    truth = None
+    for name in COLLECTION_PROFILES:
+        collection = f"benchmark_profile_{name}"
+        client.recreate_collection(
+            collection,
+            vectors_config=vector_params(name, dimension),
+            quantization_config=quantization_config(name),
+        )
+        for offset in range(0, count, UPSERT_BATCH):
+            rows = vectors[offset : offset + UPSERT_BATCH]
+            client.upsert(
+                collection,
+                Batch(ids=list(range(offset, offset + len(rows))), vectors=rows.tolist()),
+            )
+        wait_until_indexed(client, collection)
+
+        if truth is None:
+            # Exact float32 search is the ground truth
+            truth = [
+                {
+                    hit.id
+                    for hit in client.search(
+                        collection,
+                        query.tolist(),
+                        limit=TOP_K,
+                        search_params=SearchParams(exact=True),
+                    )
+                }
+                for query in queries
+            ]
+
+        params = search_params(name, settings.qdrant_quantization_oversampling)
+        latencies, recalls = [], []
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            hits = client.search(collection, query.tolist(), limit=TOP_K, search_params=params)
+            latencies.append(time.perf_counter() - start)
+            recalls.append(len({hit.id for hit in hits} & expected) / TOP_K)
+
+        print(
+            f"  {name:<9} recall {statistics.mean(recalls):6.3f}"
+            f"  p50 {statistics.median(latencies) * 1000:6.2f} ms"
+            f"  vectors in RAM {ram_bytes(name, count, dimension) / 1024 / 1024:8.1f} MiB"
+        )
+        client.delete_collection(collection)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+CPU inference benchmark of the embedding backends.
+
+Encodes the same texts with the PyTorch model and with its ONNX Runtime
+exports, float32 and int8 dynamically quantized, and reports texts per
+second and the cosine similarity of each export's vectors to PyTorch's.
+Exports are written under ``EMBEDDING_ONNX_PATH`` and reused by the service.
+
+Usage:
+    python benchmarks/benchmark_embedding_backends.py [num_texts] [threads]
+"""
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_path))
+
+import torch  # noqa: E402
+from sentence_transformers import SentenceTransformer  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.services.onnx_encoder import cosine_similarities, load_onnx_encoder  # noqa: E402
+
+SAMPLE_PASSAGE = (
+    "The philosopher's stone represents the perfect union of mercury, sulfur, and salt. "
+    "Through the process of alchemical transformation, the prima materia is purified "
+    "by the sacred fire, ascending through the elemental stages from earth to ether."
+)
+
+
+def make_texts(count: int):
+    """Texts of varied length, like book excerpts and queries."""
+    words = SAMPLE_PASSAGE.split()
+    return [" ".join(words[: 8 + (i * 7) % len(words)]) + f" ({i})" for i in range(count)]
+
+
+def throughput(model, texts, batch_size: int):
+    """Texts per second of encoding ``texts``, and the vectors."""
+    model.encode(texts[:batch_size], batch_size=batch_size, convert_to_numpy=True)  # Warm up
+    start = time.perf_counter()
+    vectors = model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+    return len(texts) / (time.perf_counter() - start), vectors
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else settings.embedding_threads
+    texts = make_texts(count)
+    batch_size = settings.embedding_batch_size
+
+    if threads:
+        torch.set_num_threads(threads)
+    try:
+        backends = {"pytorch": SentenceTransformer(settings.embedding_model, device="cpu")}
+        for name, quantize in [("onnx float32", False), ("onnx int8", True)]:
+            backends[name] = load_onnx_encoder(
+                settings.embedding_model,
+                Path(settings.embedding_onnx_path) / ("int8" if quantize else "float32"),
+                quantize=quantize,
+                min_cosine=settings.embedding_onnx_min_cosine,
+                threads=threads,
+            )
+    except Exception as e:
+        print(f"Embedding model not available; cannot run the benchmark: {e}")
+        return
+
+    print("=" * 78)
+    print(
+        f"🔥 Embedding backend benchmark - {count} texts, {settings.embedding_model}, "
+        f"{threads or 'all'} threads"
+    )
+    print("=" * 78)
+
+    baseline, expected = throughput(backends.pop("pytorch"), texts, batch_size)
+    print(f"  {'pytorch':<13} {baseline:10.1f} texts/s")
+    for name, encoder in backends.items():
+        rate, vectors = throughput(encoder, texts, batch_size)
+        similarity = cosine_similarities(expected, vectors)
+        graph = "int8" if encoder.quantized else "float32"
+        print(
+            f"  {name:<13} {rate:10.1f} texts/s  ({rate / baseline:.1f}x)"
+            f"  cosine to pytorch min {similarity.min():.5f} mean {similarity.mean():.5f}"
+            f"  [{graph} graph]"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Throughput benchmark for embedding generation and storage.
+
+Compares the single-item path (generate_embedding / store_embedding, one
+forward pass and one upsert per text) with the batched path
+(generate_embeddings / store_embeddings) in texts per second. Storage runs
+against an in-memory Qdrant so only client-side work is measured.
+
+Usage:
+    python benchmarks/benchmark_embedding_throughput.py [num_texts]
+"""
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_path))
+
+from qdrant_client import QdrantClient  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.services.embedding_service import EmbeddingService  # noqa: E402
+from app.services.vector_store.qdrant import QdrantVectorStore  # noqa: E402
+
+SAMPLE_PASSAGE = (
+    "The philosopher's stone represents the perfect union of mercury, sulfur, and salt. "
+    "Through the process of alchemical transformation, the prima materia is purified "
+    "by the sacred fire, ascending through the elemental stages from earth to ether."
+)
+
+BATCH_SIZES = [16, 32, 64, 128]
+
+
+def make_texts(count: int):
+    """Texts of varied length, like book excerpts and queries."""
+    words = SAMPLE_PASSAGE.split()
+    return [" ".join(words[: 8 + (i * 7) % len(words)]) + f" ({i})" for i in range(count)]
+
+
+def throughput(count: int, func, *args) -> float:
+    """Texts per second of one call processing ``count`` texts."""
+    start = time.perf_counter()
+    func(*args)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 512
+    texts = make_texts(count)
+    items = [{"text": text, "metadata": {"book_id": i}} for i, text in enumerate(texts)]
+
+    service = EmbeddingService()
+    service._initialize()
+    if not service.model:
+        print("Embedding model not available; cannot run the benchmark")
+        return
+
+    # Local in-memory collection instead of the configured server
+    service.collection_name = "benchmark_embeddings"
+    service.vector_store = QdrantVectorStore(service.collection_name, QdrantClient(":memory:"))
+    service.vector_store.ensure_collection(settings.embedding_dimension)
+
+    # Warm up the model
+    service.generate_embeddings(texts[:32])
+
+    print("=" * 70)
+    print(f"🔥 Embedding throughput benchmark - {count} texts, {settings.embedding_model}")
+    print("=" * 70)
+
+    single = throughput(count, lambda: [service.generate_embedding(t) for t in texts])
+    print(f"  generate_embedding (one by one):   {single:10.1f} texts/s")
+    for batch_size in BATCH_SIZES:
+        batched = throughput(count, service.generate_embeddings, texts, batch_size)
+        print(
+            f"  generate_embeddings (batch {batch_size:3}):  {batched:10.1f} texts/s"
+            f"  ({batched / single:.1f}x)"
+        )
+
+    single = throughput(count, lambda: [service.store_embedding(**item) for item in items])
+    batched = throughput(count, service.store_embeddings, items)
+    print(f"  store_embedding (one by one):      {single:10.1f} texts/s")
+    print(
+        f"  store_embeddings (bulk upserts):   {batched:10.1f} texts/s  ({batched / single:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
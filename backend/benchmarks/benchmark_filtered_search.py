@@ -0,0 +1,149 @@
+"""
+Filtered-search latency benchmark.
+
+Loads the same passage-like points into two collections on the configured
+Qdrant server (e.g. ``docker compose up qdrant``): one with the payload
+indexes the service creates on ``book_id``, ``author``, ``source`` and
+``language`` and lean payloads, one unindexed with the passage text in every
+payload, as points were stored before. Then it times searches filtered by
+book and by author in both, and in the local NumPy store for reference.
+
+Usage:
+    python benchmarks/benchmark_filtered_search.py [num_points] [num_queries]
+"""
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_path))
+
+from qdrant_client import QdrantClient  # noqa: E402
+from qdrant_client.models import Distance, VectorParams  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.services.embedding_service import LEAN_PAYLOAD_FIELDS  # noqa: E402
+from app.services.vector_store.local import LocalVectorStore  # noqa: E402
+from app.services.vector_store.qdrant import QdrantVectorStore  # noqa: E402
+
+PASSAGES_PER_BOOK = 200
+BOOKS_PER_AUTHOR = 5
+UPSERT_BATCH = 512
+PASSAGE_TEXT = "The philosopher's stone is the union of mercury, sulfur and salt. " * 16
+
+
+def make_payloads(count: int):
+    payloads = []
+    for i in range(count):
+        book_id = i // PASSAGES_PER_BOOK
+        payloads.append(
+            {
+                "text": PASSAGE_TEXT,
+                "book_id": book_id,
+                "title": f"Book {book_id}",
+                "author": f"Author {book_id // BOOKS_PER_AUTHOR}",
+                "source": "gutenberg",
+                "language": "en",
+                "chunk_index": i % PASSAGES_PER_BOOK,
+                "start": 0,
+                "end": len(PASSAGE_TEXT),
+            }
+        )
+    return payloads
+
+
+def load(store, vectors, payloads):
+    for offset in range(0, len(vectors), UPSERT_BATCH):
+        end = offset + UPSERT_BATCH
+        store.upsert(
+            list(range(offset, offset + len(vectors[offset:end]))),
+            vectors[offset:end].tolist(),
+            payloads[offset:end],
+        )
+
+
+def time_searches(store, queries, filters):
+    latencies = []
+    for query, query_filter in zip(queries, filters):
+        start = time.perf_counter()
+        store.search_groups(query.tolist(), "book_id", 10, query_filter)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return statistics.median(latencies) * 1000, latencies[int(len(latencies) * 0.95)] * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    num_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    dimension = settings.embedding_dimension
+    books = max(count // PASSAGES_PER_BOOK, 1)
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((count, dimension), dtype=np.float32)
+    queries = rng.standard_normal((num_queries, dimension), dtype=np.float32)
+    full = make_payloads(count)
+    lean = [{key: value for key, value in p.items() if key in LEAN_PAYLOAD_FIELDS} for p in full]
+    filter_sets = {
+        "book_id": [{"book_id": int(b)} for b in rng.integers(books, size=num_queries)],
+        "author": [
+            {"author": f"Author {a}"}
+            for a in rng.integers(max(books // BOOKS_PER_AUTHOR, 1), size=num_queries)
+        ],
+    }
+
+    client = QdrantClient(
+        host=settings.qdrant_host, port=settings.qdrant_port, timeout=settings.qdrant_timeout
+    )
+    try:
+        client.get_collections()
+    except Exception as e:
+        print(f"Qdrant not available at {settings.qdrant_host}:{settings.qdrant_port}: {e}")
+        return
+
+    print("=" * 78)
+    print(f"🔥 Filtered search benchmark - {count} points, {books} books, {num_queries} queries")
+    print("=" * 78)
+    print(
+        f"  payload per point: full {statistics.mean(len(json.dumps(p)) for p in full):.0f} B,"
+        f" lean {statistics.mean(len(json.dumps(p)) for p in lean):.0f} B"
+    )
+
+    indexed = QdrantVectorStore("benchmark_filtered_indexed", client)
+    client.recreate_collection(
+        indexed.collection_name,
+        vectors_config=VectorParams(size=dimension, distance=Distance.COSINE),
+    )
+    indexed.ensure_payload_indexes()
+    load(indexed, vectors, lean)
+
+    unindexed = QdrantVectorStore("benchmark_filtered_unindexed", client)
+    client.recreate_collection(
+        unindexed.collection_name,
+        vectors_config=VectorParams(size=dimension, distance=Distance.COSINE),
+    )
+    load(unindexed, vectors, full)
+
+    local = LocalVectorStore("benchmark_filtered")
+    local.ensure_collection(dimension)
+    load(local, vectors, lean)
+
+    for field, filters in filter_sets.items():
+        for name, store in [
+            ("qdrant, full payloads, no index", unindexed),
+            ("qdrant, lean payloads, indexed", indexed),
+            ("local store", local),
+        ]:
+            p50, p95 = time_searches(store, queries, filters)
+            print(f"  {field:<8} {name:<34} p50 {p50:7.2f} ms  p95 {p95:7.2f} ms")
+
+    client.delete_collection(indexed.collection_name)
+    client.delete_collection(unindexed.collection_name)
+
+
+if __name__ == "__main__":
+    main()
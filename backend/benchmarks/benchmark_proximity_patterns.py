@@ -0,0 +1,78 @@
+"""
+Regression benchmark for the proximity symbol patterns.
+
+Feeds adversarial text - many "serpent" / "pillars of" tokens and no closing
+"tail" / "temple" - to the former unbounded ``.*`` patterns and to the
+compiled SymbolMatcher. Doubling the input should roughly quadruple the
+legacy time but only double the compiled time.
+
+Usage:
+    python benchmarks/benchmark_proximity_patterns.py
+"""
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_path))
+
+from app.services.semantic_analysis.analyzer import SemanticAnalyzer  # noqa: E402
+
+LEGACY_PATTERNS = {
+    "ouroboros": r"\b(ouroboros|serpent.*tail)\b",
+    "pillars": r"\b(boaz|jachin|pillars?\s+of.*temple)\b",
+}
+
+ADVERSARIAL_UNITS = {
+    "ouroboros": "serpent ",
+    "pillars": "pillars of ",
+}
+
+SIZES = [10_000, 20_000, 40_000, 80_000]
+
+
+def timed(func, *args) -> float:
+    """Return the wall time of one call."""
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def legacy_scan(pattern: str, text: str) -> int:
+    """Count matches of a legacy pattern the way the old detector did."""
+    return len(list(re.finditer(pattern, text.lower(), re.IGNORECASE)))
+
+
+def main():
+    analyzer = SemanticAnalyzer()
+
+    print("=" * 70)
+    print("🐍 Proximity pattern benchmark - adversarial input on a single line")
+    print("=" * 70)
+
+    for symbol, unit in ADVERSARIAL_UNITS.items():
+        print(f"\n{symbol}: repeated {unit.strip()!r}, never closed")
+        print(f"  {'chars':>8} {'legacy .*':>12} {'compiled':>12}")
+        previous = None
+        for size in SIZES:
+            text = unit * (size // len(unit))
+            legacy_time = timed(legacy_scan, LEGACY_PATTERNS[symbol], text)
+            compiled_time = timed(analyzer.detect_symbols, text)
+            growth = ""
+            if previous:
+                legacy_growth = legacy_time / previous[0]
+                compiled_growth = compiled_time / previous[1]
+                growth = f"   growth x{legacy_growth:.1f} / x{compiled_growth:.1f}"
+            print(f"  {size:>8} {legacy_time:>10.4f} s {compiled_time:>10.4f} s{growth}")
+            previous = (legacy_time, compiled_time)
+
+    # The compiled matcher alone, at book scale
+    text = "serpent " * 1_000_000
+    compiled_time = timed(analyzer.detect_symbols, text)
+    print(f"\nCompiled matcher on {len(text) / 1e6:.0f} MB of 'serpent': {compiled_time:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Latency benchmark for Qdrant access from async code.
+
+Compares the blocking QdrantClient over HTTP, called from coroutines as the
+endpoints used to (before), with the AsyncQdrantClient over HTTP and over
+gRPC (after). Each mode runs the same concurrent searches and bulk upserts
+against the configured Qdrant server, e.g. the one from docker-compose.yml,
+on a throwaway collection of random vectors, so no embedding model is needed.
+
+Usage:
+    python benchmarks/benchmark_qdrant_latency.py [num_points] [concurrency]
+"""
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_path))
+
+from qdrant_client import AsyncQdrantClient, QdrantClient  # noqa: E402
+from qdrant_client.models import Batch, Distance, VectorParams  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+
+COLLECTION = "benchmark_qdrant_latency"
+SEARCHES = 400
+UPSERT_BATCH = 256
+
+
+def client_options(prefer_grpc: bool):
+    return {
+        "host": settings.qdrant_host,
+        "port": settings.qdrant_port,
+        "grpc_port": settings.qdrant_grpc_port,
+        "prefer_grpc": prefer_grpc,
+        "timeout": settings.qdrant_timeout,
+    }
+
+
+async def timed(call):
+    start = time.perf_counter()
+    await call()
+    return time.perf_counter() - start
+
+
+async def run_mode(name, search, upsert, vectors, queries, concurrency):
+    """Concurrent search latencies and bulk upsert throughput of one mode."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_search(query):
+        async with semaphore:
+            return await timed(lambda: search(query))
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one_search(query) for query in queries))
+    elapsed = time.perf_counter() - start
+
+    upsert_start = time.perf_counter()
+    for offset in range(0, len(vectors), UPSERT_BATCH):
+        await upsert(offset, vectors[offset : offset + UPSERT_BATCH])
+    upsert_rate = len(vectors) / (time.perf_counter() - upsert_start)
+
+    latencies = sorted(latencies)
+    print(
+        f"  {name:<22} p50 {statistics.median(latencies) * 1000:7.2f} ms"
+        f"  p95 {latencies[int(len(latencies) * 0.95)] * 1000:7.2f} ms"
+        f"  {len(queries) / elapsed:8.1f} searches/s  {upsert_rate:9.1f} upserts/s"
+    )
+
+
+def batch(offset, rows):
+    return Batch(ids=list(range(offset, offset + len(rows))), vectors=rows.tolist())
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    dimension = settings.embedding_dimension
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((count, dimension), dtype=np.float32)
+    queries = rng.standard_normal((SEARCHES, dimension), dtype=np.float32).tolist()
+
+    sync_client = QdrantClient(**client_options(prefer_grpc=False))
+    try:
+        sync_client.recreate_collection(
+            COLLECTION, vectors_config=VectorParams(size=dimension, distance=Distance.COSINE)
+        )
+    except Exception as e:
+        print(f"Qdrant not available at {settings.qdrant_host}:{settings.qdrant_port}: {e}")
+        return
+
+    for offset in range(0, count, UPSERT_BATCH):
+        sync_client.upsert(COLLECTION, batch(offset, vectors[offset : offset + UPSERT_BATCH]))
+
+    print("=" * 90)
+    print(
+        f"🔥 Qdrant latency benchmark - {count} points, {SEARCHES} searches, {concurrency} in flight"
+    )
+    print("=" * 90)
+
+    async def sync_search(query):
+        sync_client.search(COLLECTION, query_vector=query, limit=10)
+
+    async def sync_upsert(offset, rows):
+        sync_client.upsert(COLLECTION, batch(offset, rows))
+
+    await run_mode("sync HTTP (before)", sync_search, sync_upsert, vectors, queries, concurrency)
+
+    for name, prefer_grpc in [("async HTTP", False), ("async gRPC", True)]:
+        client = AsyncQdrantClient(**client_options(prefer_grpc))
+
+        async def async_search(query, client=client):
+            await client.search(COLLECTION, query_vector=query, limit=10)
+
+        async def async_upsert(offset, rows, client=client):
+            await client.upsert(COLLECTION, batch(offset, rows))
+
+        await run_mode(name, async_search, async_upsert, vectors, queries, concurrency)
+        await client.close()
+
+    sync_client.delete_collection(COLLECTION)
+    sync_client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+"""
+Benchmark for hermetic symbol detection on a full book.
+
+Compares the legacy one-scan-per-pattern detection with the compiled
+single-pass SymbolMatcher and checks that both report the same symbols.
+
+Usage:
+    python benchmarks/benchmark_symbol_detection.py [path/to/book.txt | gutenberg_id]
+"""
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_path))
+
+from app.services.semantic_analysis.analyzer import SemanticAnalyzer  # noqa: E402
+
+SAMPLE_PASSAGE = """
+The philosopher's stone represents the perfect union of mercury, sulfur, and salt.
+Through the process of alchemical transformation, the prima materia is purified
+by the sacred fire, ascending through the elemental stages from earth to ether.
+The all-seeing eye watches over the work, as the serpent consumes its own tail.
+The Tree of Life connects Kether, the Crown, to Malkuth, the Kingdom, while the
+square and compass teach the lessons of the master mason in the 3 degree.
+"""
+
+
+def load_book(source: str) -> str:
+    """Load a book from a local file or fetch it from Project Gutenberg."""
+    if source.isdigit():
+        import httpx
+
+        url = f"https://www.gutenberg.org/cache/epub/{source}/pg{source}.txt"
+        response = httpx.get(url, timeout=60.0, follow_redirects=True)
+        response.raise_for_status()
+        return response.text
+    return Path(source).read_text(encoding="utf-8", errors="replace")
+
+
+def legacy_detect_symbols(analyzer: SemanticAnalyzer, text: str):
+    """Reference implementation: one regex scan per symbol pattern."""
+    text_lower = text.lower()
+    detected = []
+    for category, symbols in analyzer.all_symbols.items():
+        for symbol_name, pattern in symbols.items():
+            matches = list(re.finditer(pattern, text_lower, re.IGNORECASE))
+            if matches:
+                detected.append(
+                    {
+                        "symbol": symbol_name,
+                        "category": category,
+                        "count": len(matches),
+                        "positions": [match.start() for match in matches],
+                    }
+                )
+    return detected
+
+
+def best_of(runs: int, func, *args):
+    """Return the best wall time over several runs and the last result."""
+    best = float("inf")
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    if len(sys.argv) > 1:
+        text = load_book(sys.argv[1])
+        label = sys.argv[1]
+    else:
+        # Roughly the size of a large Gutenberg book
+        text = SAMPLE_PASSAGE * (5_000_000 // len(SAMPLE_PASSAGE))
+        label = "synthetic corpus"
+
+    analyzer = SemanticAnalyzer()
+
+    print("=" * 70)
+    print(f"🔥 Symbol detection benchmark - {label} ({len(text) / 1e6:.1f} MB)")
+    print("=" * 70)
+
+    legacy_time, legacy_result = best_of(3, legacy_detect_symbols, analyzer, text)
+    compiled_time, compiled_result = best_of(3, analyzer.detect_symbols, text)
+
+    print(f"  Legacy (one scan per pattern): {legacy_time:8.3f} s")
+    print(f"  Compiled single pass:          {compiled_time:8.3f} s")
+    print(f"  Speedup:                       {legacy_time / compiled_time:8.2f}x")
+    print(f"  Identical output:              {legacy_result == compiled_result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+-- Migration: Add symbol postings table
+-- Date: 2026-10-17
+-- Description: Stores per-book symbol positions out of line as delta-encoded postings
+
+CREATE TABLE IF NOT EXISTS symbol_postings (
+    id SERIAL PRIMARY KEY,
+    book_id INTEGER NOT NULL REFERENCES books(id) ON DELETE CASCADE,
+    symbol VARCHAR NOT NULL,
+    category VARCHAR NOT NULL,
+    count INTEGER NOT NULL,
+    positions BYTEA NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW(),
+    CONSTRAINT uq_symbol_postings_book_symbol UNIQUE (book_id, symbol)
+);
+
+-- Create indexes for better query performance
+CREATE INDEX IF NOT EXISTS idx_symbol_postings_book_id ON symbol_postings(book_id);
+
+-- Comments for documentation
+COMMENT ON COLUMN symbol_postings.positions IS 'Delta-encoded little-endian uint32 character positions';
+
+-- Existing rows keep inline positions until backfilled with:
+--   python -m app.services.semantic_analysis.postings
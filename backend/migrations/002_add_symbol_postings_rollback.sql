@@ -0,0 +1,7 @@
+-- Migration Rollback: Remove symbol postings table
+-- Date: 2026-10-17
+-- Description: Reverts the symbol postings table
+-- Note: positions are not copied back into books.hermetic_symbols; re-ingest to restore them
+
+DROP INDEX IF EXISTS idx_symbol_postings_book_id;
+DROP TABLE IF EXISTS symbol_postings;
@@ -0,0 +1,11 @@
+-- Migration: Add energy profile to books table
+-- Date: 2026-10-17
+-- Description: Stores the precomputed elemental energy timeline of each book
+
+ALTER TABLE books ADD COLUMN IF NOT EXISTS energy_profile BYTEA;
+
+-- Comments for documentation
+COMMENT ON COLUMN books.energy_profile IS 'Cumulative elemental keyword counts: <II header (stride, token count) + little-endian uint32 (samples, elements)';
+
+-- Existing rows stay NULL until backfilled with:
+--   python -m app.services.semantic_analysis.energy_profile
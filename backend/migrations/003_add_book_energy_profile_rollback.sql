@@ -0,0 +1,5 @@
+-- Migration Rollback: Remove energy profile from books table
+-- Date: 2026-10-17
+-- Description: Reverts the book energy profile column
+
+ALTER TABLE books DROP COLUMN IF EXISTS energy_profile;
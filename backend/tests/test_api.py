@@ -1,6 +1,8 @@
 """
 Basic tests for the backend API endpoints.
 """
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -30,6 +32,22 @@ def test_health_endpoint():
     assert "qdrant" in data
 
 
+def test_ready_endpoint_without_warmup(monkeypatch):
+    """Without warmup the model loads on first use, so the instance is ready unless it failed."""
+    from app.core.config import settings
+    from app.services.embedding_service import get_embedding_service
+
+    service = get_embedding_service()
+    monkeypatch.setattr(settings, "embedding_warmup", False)
+    monkeypatch.setattr(service, "readiness", "cold")
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["embedding"] == "cold"
+
+    monkeypatch.setattr(settings, "embedding_warmup", True)
+    assert client.get("/ready").status_code == 503
+
+
 def test_semantic_symbols_endpoint():
     """Test listing hermetic symbols."""
     response = client.get("/api/semantic/symbols")
@@ -92,3 +110,29 @@ def test_search_filters_endpoint():
     assert "languages" in data
     assert "elements" in data
     assert "symbols" in data
+
+
+def test_semantic_batch_analysis():
+    """Test batch analysis streams one NDJSON result per text, in order."""
+    texts = ["The sun and the moon.", "Mercury, sulfur, and salt.", "Nothing here."]
+
+    response = client.post("/api/semantic/analyze/batch", json={"texts": texts})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert {"hermetic_symbols", "elemental_energy", "correspondences", "summary"} <= set(results[0])
+    assert "mercury" in [s["symbol"] for s in results[1]["hermetic_symbols"]]
+
+
+def test_semantic_batch_analysis_limits():
+    """Batches with too many texts, or too long a text, are rejected before any analysis."""
+    from app.core.config import settings
+
+    too_many = ["fire"] * (settings.analysis_batch_max_texts + 1)
+    too_long = ["a" * (settings.analysis_batch_max_text_chars + 1)]
+
+    for texts in (too_many, too_long, []):
+        response = client.post("/api/semantic/analyze/batch", json={"texts": texts})
+        assert response.status_code == 422
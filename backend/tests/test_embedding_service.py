@@ -0,0 +1,717 @@
+"""
+Unit tests for the embedding service.
+"""
+import asyncio
+import hashlib
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import Batch, Distance, VectorParams
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import settings
+from app.models.models import Base, Book
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services import collection_profiles, embedding_service, reindex, two_tier_cache
+from app.services.embedding_service import EmbeddingService
+from app.services.embedding_store import EmbeddingStore
+from app.services.vector_store.local import LocalVectorStore
+from app.services.vector_store.qdrant import QdrantVectorStore, versioned_collection_name
+from app.services.passages import iter_passages, regex_token_spans
+from app.services.query_embedding_cache import QueryEmbeddingCache
+
+
+class FakeModel:
+    """Deterministic stand-in for a SentenceTransformer."""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        single = isinstance(texts, str)
+        batch = [texts] if single else texts
+        self.calls.append(len(batch))
+        vectors = np.array([[len(text), text.count("a"), 1.0] for text in batch], dtype=np.float32)
+        return vectors[0] if single else vectors
+
+
+class HashModel(FakeModel):
+    """Stand-in whose vectors are pseudo-random per text, so scores rarely tie."""
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        single = isinstance(texts, str)
+        vectors = np.array(
+            [
+                np.random.default_rng(list(hashlib.blake2b(text.encode()).digest())).random(3)
+                for text in ([texts] if single else texts)
+            ]
+        )
+        return vectors[0] if single else vectors
+
+
+def make_service(model, store=None):
+    service = EmbeddingService()
+    service.model = model
+    service.collection_name = "test_books"
+    service.vector_store = store or QdrantVectorStore(
+        "test_books", QdrantClient(":memory:"), versioned_name="test_books__old"
+    )
+    service.vector_store.ensure_collection(3)
+    service._initialized = True
+    return service
+
+
+def test_batched_embeddings_match_single_path_and_upsert_in_chunks():
+    """Batch encoding equals per-text encoding and stores every item."""
+    model = FakeModel()
+    service = make_service(model)
+    texts = [f"text {'a' * i}" for i in range(10)]
+
+    batched = service.generate_embeddings(texts, batch_size=4)
+    assert batched == [service.generate_embedding(text) for text in texts]
+
+    items = [{"text": text, "metadata": {"book_id": i}} for i, text in enumerate(texts)]
+    model.calls.clear()
+    ids = service.store_embeddings(items, batch_size=4)
+
+    assert model.calls == [4, 4, 2]
+    assert len(set(ids)) == len(texts)
+    assert service.vector_store.count() == len(texts)
+    stored = service.vector_store.client.retrieve("test_books", [ids[3]])[0]
+    assert stored.payload == {"book_id": 3}
+
+
+def test_passages_cover_text_with_overlap_across_segments():
+    """Passages have the requested token count and overlap, however the text is segmented."""
+    text = " ".join(f"word{i}" for i in range(50))
+
+    passages = list(iter_passages(text, regex_token_spans, 8, 2, segment_chars=16))
+
+    assert [p["chunk_index"] for p in passages] == list(range(len(passages)))
+    assert passages[0]["text"] == " ".join(f"word{i}" for i in range(8))
+    assert passages[1]["text"].startswith("word6 word7 word8")
+    assert passages[-1]["end"] == len(text)
+    assert all(text[p["start"] : p["end"]] == p["text"] for p in passages)
+
+
+def test_search_books_returns_best_passage_per_book(monkeypatch):
+    """Passage hits aggregate to one result per book with the best passage's offsets."""
+    monkeypatch.setattr(settings, "passage_chunk_tokens", 4)
+    monkeypatch.setattr(settings, "passage_overlap_tokens", 1)
+    service = make_service(FakeModel())
+    books = {1: "one two three four five six seven aaaa", 2: "b b b b b b b b b b"}
+
+    for book_id, text in books.items():
+        service.store_embeddings(service.iter_passage_items(book_id, text, {"title": "t"}))
+
+    results = service.search_books("aaaa", limit=5)
+
+    assert sorted(r["book_id"] for r in results) == [1, 2]
+    best = next(r for r in results if r["book_id"] == 1)
+    assert books[1][best["start"] : best["end"]] == "seven aaaa"
+
+
+def test_batcher_groups_concurrent_queries_into_bounded_batches():
+    """Queries arriving together share encode calls, and each caller gets its own vector."""
+    batches = []
+
+    def encode(texts):
+        batches.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    batcher = EmbeddingBatcher(encode, max_batch_size=4, window_ms=50)
+    texts = ["a" * i for i in range(1, 11)]
+
+    async def query_all():
+        return await asyncio.gather(*(batcher.embed(text) for text in texts))
+
+    try:
+        vectors = asyncio.run(query_all())
+    finally:
+        batcher.shutdown()
+
+    assert vectors == [[float(len(text))] for text in texts]
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+    assert batcher.metrics()["mean_batch_size"] == 3.33
+
+
+def test_query_embeddings_are_cached_by_normalized_text():
+    """Repeated and trivially different queries are encoded once."""
+    model = FakeModel()
+    service = make_service(model)
+    service.query_cache.use_redis = False
+
+    async def search_twice():
+        first = await service.embed_query("Philosopher's  Stone")
+        second = await service.embed_query("  philosopher's stone ")
+        return first, second
+
+    try:
+        first, second = asyncio.run(search_twice())
+    finally:
+        asyncio.run(service.shutdown())
+
+    assert first == second == service.generate_embedding("philosopher's stone")
+    assert model.calls == [1, 1]  # One batched miss, one direct reference call
+    metrics = service.query_cache.metrics()
+    assert (metrics["local_hits"], metrics["misses"], metrics["hit_rate"]) == (1, 1, 0.5)
+    assert metrics["bytes"] == 3 * 4
+
+
+def test_query_cache_shares_vectors_between_workers_through_redis(monkeypatch):
+    """A vector cached by one worker is a Redis hit for another, then a local hit."""
+    stored = {}
+
+    class FakeRedis:
+        async def get(self, key):
+            return stored.get(key)
+
+        async def setex(self, key, ttl, value):
+            stored[key] = value
+
+    async def fake_redis_client():
+        return FakeRedis()
+
+    monkeypatch.setattr(two_tier_cache, "get_redis_client", fake_redis_client)
+    writer = QueryEmbeddingCache(max_entries=1, ttl=60)
+    reader = QueryEmbeddingCache(max_entries=1, ttl=60)
+    key = writer.make_key("solve et coagula", "model")
+
+    async def share():
+        await writer.set(key, [0.5, -1.0, 2.0])
+        await writer.set(writer.make_key("other", "model"), [1.0, 1.0, 1.0])
+        return await reader.get(key), await reader.get(key), await writer.get(key)
+
+    assert asyncio.run(share()) == ([0.5, -1.0, 2.0],) * 3
+    assert reader.metrics()["redis_hits"] == reader.metrics()["local_hits"] == 1
+    assert (writer.metrics()["evictions"], writer.metrics()["redis_hits"]) == (2, 1)
+
+
+def test_query_vectors_are_not_shared_between_inference_backends(monkeypatch):
+    """A worker on the int8 ONNX backend never serves a PyTorch worker's cached vector."""
+    stored = {}
+
+    class FakeRedis:
+        async def get(self, key):
+            return stored.get(key)
+
+        async def setex(self, key, ttl, value):
+            stored[key] = value
+
+    async def fake_redis_client():
+        return FakeRedis()
+
+    monkeypatch.setattr(two_tier_cache, "get_redis_client", fake_redis_client)
+    onnx_model = FakeModel()
+    onnx_model.backend = "onnx-int8"
+    pytorch, onnx = make_service(FakeModel()), make_service(onnx_model)
+
+    async def embed_on_both():
+        try:
+            await pytorch.embed_query("as above, so below")
+            await onnx.embed_query("as above, so below")
+        finally:
+            await pytorch.shutdown()
+            await onnx.shutdown()
+
+    asyncio.run(embed_on_both())
+
+    assert onnx.encoder_name == f"{settings.embedding_model}.onnx-int8"
+    assert onnx.query_cache.metrics()["misses"] == 1
+    assert onnx_model.calls == [1]
+    assert len(stored) == 2
+
+
+def test_two_tier_cache_without_every_hook_fails_at_construction():
+    """A cache missing a serialization hook cannot be built, rather than failing on a hit."""
+
+    class JsonOnly(two_tier_cache.TwoTierCache[str]):
+        def _to_entry(self, value):
+            return value
+
+        def _from_entry(self, entry):
+            return entry
+
+    with pytest.raises(TypeError, match="abstract"):
+        JsonOnly(ttl=60)
+
+
+def test_embedding_store_reuses_vectors_across_services(tmp_path):
+    """Re-storing known texts reads their vectors from disk instead of the model."""
+    texts = ["aaa", "banana", "cab"]
+    items = [{"text": text, "metadata": {"book_id": i}} for i, text in enumerate(texts)]
+
+    first = make_service(FakeModel())
+    first.embedding_store = EmbeddingStore(str(tmp_path), "fake-model", 3)
+    first.store_embeddings(items)
+
+    model = FakeModel()
+    second = make_service(model)
+    second.embedding_store = EmbeddingStore(str(tmp_path), "fake-model", 3)
+    vectors = second.embed_documents(texts + ["abba"])
+
+    assert model.calls == [1]  # Only the unseen text was encoded
+    assert vectors == [first.generate_embedding(text) for text in texts + ["abba"]]
+    assert len(second.embedding_store) == 4
+    assert EmbeddingStore(str(tmp_path), "other-model", 3).get_many(texts) == [None] * 3
+
+
+def test_embedding_store_overwrites_rows_orphaned_by_a_crash(tmp_path):
+    """Rows written without their index records are reused by the next append."""
+    store = EmbeddingStore(str(tmp_path), "fake-model", 3)
+    store.put_many(["aaa"], [[1.0, 2.0, 3.0]])
+    with open(store.vectors_path, "ab") as vectors:
+        vectors.write(np.full((2, 3), 9.0, dtype="<f4").tobytes())  # Crash before indexing
+
+    store.put_many(["bbb", "ccc"], [[4.0, 5.0, 6.0], [7.0, 8.0, 9.0]])
+
+    assert store.vectors_path.stat().st_size == 3 * store.row_bytes
+    reopened = EmbeddingStore(str(tmp_path), "fake-model", 3)
+    assert [v.tolist() for v in reopened.get_many(["aaa", "bbb", "ccc"])] == [
+        [1.0, 2.0, 3.0],
+        [4.0, 5.0, 6.0],
+        [7.0, 8.0, 9.0],
+    ]
+
+
+def test_concurrent_initialization_loads_the_model_once(monkeypatch):
+    """First callers racing to initialize share one model load, and warmup marks readiness."""
+    loads = []
+
+    def load_model(name):
+        loads.append(name)
+        time.sleep(0.05)
+        return FakeModel()
+
+    monkeypatch.setattr(embedding_service, "SentenceTransformer", load_model)
+    monkeypatch.setattr(settings, "vector_store_backend", "local")
+    service = EmbeddingService()
+    service.collection_name = "test_books"
+
+    threads = [threading.Thread(target=service._initialize) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert service.readiness == "ready"
+    assert service.warmup()
+    assert service.readiness == "ready"
+    assert service.cold_start_seconds is not None
+
+
+def test_readiness_recovers_when_a_failed_load_is_retried(monkeypatch):
+    """A failed warmup leaves the service failed only until a later load succeeds."""
+    attempts = []
+
+    def load_model(name):
+        attempts.append(name)
+        if len(attempts) <= 2:  # Warmup loads, then retries once on its first encode
+            raise OSError("model download interrupted")
+        return FakeModel()
+
+    monkeypatch.setattr(embedding_service, "SentenceTransformer", load_model)
+    monkeypatch.setattr(settings, "vector_store_backend", "local")
+    service = EmbeddingService()
+    service.collection_name = "test_books"
+
+    assert not service.warmup()
+    assert service.readiness == "failed"
+
+    service._initialize()
+    assert service.readiness == "ready"
+    assert service.generate_embedding("aaaa") == [4.0, 4.0, 1.0]
+
+
+def test_async_store_and_search_match_the_sync_path(monkeypatch):
+    """Awaitable upserts and grouped search return what the blocking client returns."""
+    monkeypatch.setattr(settings, "passage_chunk_tokens", 4)
+    monkeypatch.setattr(settings, "passage_overlap_tokens", 1)
+    service = make_service(FakeModel())
+    books = {1: "one two three four five six seven aaaa", 2: "b b b b b b b b b b"}
+
+    async def store_and_search():
+        service.vector_store.async_client = AsyncQdrantClient(":memory:")
+        await service.vector_store.async_client.create_collection(
+            service.vector_store.collection_name,
+            vectors_config=VectorParams(size=3, distance=Distance.COSINE),
+        )
+        for book_id, text in books.items():
+            items = service.iter_passage_items(book_id, text, {"title": "t"})
+            await service.store_embeddings_async(items, batch_size=2)
+        try:
+            return await service.search_books_async(service.generate_embedding("aaaa"), limit=5)
+        finally:
+            await service.shutdown()
+
+    results = asyncio.run(store_and_search())
+
+    for book_id, text in books.items():
+        service.store_embeddings(service.iter_passage_items(book_id, text, {"title": "t"}))
+    assert results == service.search_books("aaaa", limit=5)
+
+
+def test_point_copy_catches_up_points_added_during_the_copy(monkeypatch):
+    """Points a worker adds behind the scroll position are copied by a later pass."""
+    client = QdrantClient(":memory:")
+    for name in ("source", "target"):
+        client.create_collection(
+            name, vectors_config=VectorParams(size=3, distance=Distance.COSINE)
+        )
+    even = list(range(0, 2000, 2))
+    client.upsert("source", points=Batch(ids=even, vectors=[[1.0, i, 0.0] for i in even]))
+    scroll = client.scroll
+    ingested = []
+
+    def scroll_while_ingesting(*args, **kwargs):
+        records, offset = scroll(*args, **kwargs)
+        if offset is not None and not ingested:
+            # Ids below the scroll position, which this pass has already gone past
+            ingested.extend(range(offset - 1, offset - 11, -2))
+            vectors = [[1.0, i, 0.0] for i in ingested]
+            client.upsert("source", points=Batch(ids=ingested, vectors=vectors))
+        return records, offset
+
+    monkeypatch.setattr(client, "scroll", scroll_while_ingesting)
+
+    collection_profiles.copy_points(client, "source", "target")
+
+    assert client.count("target").count == len(even) + len(ingested)
+
+
+def test_profile_migration_keeps_a_collection_an_alias_still_serves():
+    """A leftover rebuild target is replaced only if no alias points to it."""
+    service = make_service(FakeModel())
+    client = service.vector_store.client
+    service.store_embedding("aaaa", {"book_id": 1})
+    client.create_collection(
+        "test_books__old__float16", vectors_config=VectorParams(size=3, distance=Distance.COSINE)
+    )
+    QdrantVectorStore("test_books__old__float16", client).switch_alias("other_books")
+
+    with pytest.raises(RuntimeError, match="still served by other_books"):
+        collection_profiles.migrate_collection(client, "test_books", "float16", 3)
+    assert service.vector_store.aliases()["test_books"] == "test_books__old"
+
+
+def test_async_search_initializes_off_the_event_loop():
+    """A search arriving before the model is loaded does not block the loop on it."""
+    service = make_service(FakeModel())
+    service._initialized = False
+    init_threads = []
+
+    def initialize():
+        init_threads.append(threading.get_ident())
+        service._initialized = True
+
+    service._initialize = initialize
+
+    async def search():
+        return threading.get_ident(), await service.search_books_async([1.0, 0.0, 0.0])
+
+    loop_thread, results = asyncio.run(search())
+
+    assert results == []
+    assert init_threads and init_threads[0] != loop_thread
+
+
+def test_profile_migration_rebuilds_beside_the_live_collection_and_switches_the_alias(
+    monkeypatch,
+):
+    """A datatype change fills a new collection, then moves the alias to it."""
+    service = make_service(FakeModel())
+    client = service.vector_store.client
+    texts = [f"passage {'a' * i}" for i in range(1200)]
+    service.store_embeddings(
+        [{"text": text, "metadata": {"book_id": i}} for i, text in enumerate(texts)]
+    )
+    copied_while_live = []
+    copy_points = collection_profiles.copy_points
+
+    def copy_and_check(client, source, target):
+        copied = copy_points(client, source, target)
+        copied_while_live.append(client.count("test_books").count)
+        return copied
+
+    monkeypatch.setattr(collection_profiles, "copy_points", copy_and_check)
+    first = collection_profiles.migrate_collection(client, "test_books", "float16", 3)
+    second = collection_profiles.migrate_collection(client, "test_books", "int8", 3)
+
+    assert (first, second) == ("rebuilt", "rebuilt")
+    assert copied_while_live == [len(texts), len(texts)]  # The alias never served a partial copy
+    assert {a.alias_name: a.collection_name for a in client.get_aliases().aliases} == {
+        "test_books": "test_books__old__int8"
+    }
+    assert collection_profiles._stored_datatype(client.get_collection("test_books")) == "float32"
+    assert client.count("test_books").count == len(texts)
+    hits = client.search(
+        "test_books",
+        service.generate_embedding(texts[7]),
+        limit=1,
+        search_params=collection_profiles.search_params("int8", 2.0),
+    )
+    assert hits[0].payload == {"book_id": 7}
+
+
+def test_local_store_matches_qdrant_results_with_filters(monkeypatch):
+    """The NumPy store ranks, groups and filters passages as Qdrant does."""
+    monkeypatch.setattr(settings, "passage_chunk_tokens", 3)
+    monkeypatch.setattr(settings, "passage_overlap_tokens", 1)
+    rng = np.random.default_rng(7)
+    words = ["a", "aa", "b", "cab", "banana", "abba", "c"]
+    books = {i: " ".join(rng.choice(words, size=40)) for i in range(1, 9)}
+    qdrant = make_service(HashModel())
+    local = make_service(HashModel(), LocalVectorStore("test_books"))
+
+    for service in (qdrant, local):
+        for book_id, text in books.items():
+            metadata = {"author": "even" if book_id % 2 == 0 else "odd"}
+            service.store_embeddings(service.iter_passage_items(book_id, text, metadata))
+
+    for query, filters in [("abba", None), ("cab c", {"author": "even"}), ("b", {"book_id": 3})]:
+        expected = qdrant.search_books(query, limit=5, filters=filters)
+        results = local.search_books(query, limit=5, filters=filters)
+        assert [r["book_id"] for r in results] == [r["book_id"] for r in expected]
+        assert [r["score"] for r in results] == pytest.approx([r["score"] for r in expected])
+
+    assert local.vector_store.count() == qdrant.vector_store.count()
+
+
+def test_local_store_persists_upserts_and_deletes(tmp_path):
+    """A memory-mapped local store reopens with its points, overwrites and deletions."""
+    store = LocalVectorStore("books", str(tmp_path))
+    store.ensure_collection(3)
+    store.upsert(["x", "y", "z"], [[1, 0, 0], [0, 1, 0], [0, 0, 1]], [{"k": 1}, {"k": 2}, {"k": 2}])
+    store.upsert(["y"], [[1, 1, 0]], [{"k": 1}])
+    store.delete(["x"])
+    asyncio.run(store.close())
+
+    reopened = LocalVectorStore("books", str(tmp_path))
+    reopened.ensure_collection(3)
+
+    assert reopened.count() == 2
+    hits = reopened.search([1, 0, 0], limit=5, filters={"k": 1})
+    assert [(hit["id"], hit["payload"]) for hit in hits] == [("y", {"k": 1})]
+    assert hits[0]["score"] == pytest.approx(2**-0.5)
+    assert [hit["id"] for hit in reopened.search([0, 0, 1], limit=1)] == ["z"]
+
+
+def test_unreachable_qdrant_falls_back_to_the_local_store(monkeypatch):
+    """Search keeps working, on the local store, when Qdrant is down at startup."""
+
+    def unreachable(self, size):
+        raise ConnectionError("connection refused")
+
+    monkeypatch.setattr(embedding_service, "SentenceTransformer", lambda name: FakeModel())
+    monkeypatch.setattr(QdrantVectorStore, "ensure_collection", unreachable)
+    monkeypatch.setattr(settings, "embedding_dimension", 3)
+    service = EmbeddingService()
+
+    service.store_embedding("aaaa", {"book_id": 1, "chunk_index": 0, "start": 0, "end": 4})
+
+    assert isinstance(service.vector_store, LocalVectorStore)
+    assert [r["book_id"] for r in service.search_books("aaaa")] == [1]
+
+
+def test_lean_payloads_keep_only_filterable_and_reference_fields(monkeypatch):
+    """Lean points reference their text by offsets; full points carry it."""
+    metadata = {"book_id": 4, "title": "Kybalion", "author": "Three Initiates", "language": "en"}
+    passage = {**metadata, "chunk_index": 2, "start": 10, "end": 14}
+    item = {"text": "aaaa", "metadata": passage}
+
+    lean = make_service(FakeModel(), LocalVectorStore("test_books"))
+    lean.store_embedding(**item, embedding_id="p")
+    monkeypatch.setattr(settings, "lean_payloads", False)
+    full = make_service(FakeModel(), LocalVectorStore("test_books"))
+    full.store_embedding(**item, embedding_id="p")
+
+    lean_hit = lean.search_similar("aaaa", filters={"author": "Three Initiates"})[0]
+    assert lean_hit["metadata"] == {k: v for k, v in passage.items() if k != "title"}
+    assert full.search_similar("aaaa")[0]["metadata"] == {"text": "aaaa", **passage}
+    assert set(lean.vector_store._postings) >= {"book_id", "author", "source", "language"}
+
+
+def test_reindex_resumes_from_checkpoint_and_switches_the_alias(monkeypatch):
+    """A resumed reindex embeds unfinished and newly ingested books, then switches the alias."""
+    monkeypatch.setattr(settings, "embedding_dimension", 3)
+    monkeypatch.setattr(settings, "passage_chunk_tokens", 4)
+    monkeypatch.setattr(settings, "passage_overlap_tokens", 1)
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine, tables=[Book.__table__])
+    db = sessionmaker(bind=engine)()
+    for i in range(1, 8):
+        db.add(Book(id=i, title=f"Book {i}", source="gutenberg", content="aaaa b " * (i + 2)))
+    db.commit()
+
+    checkpoints = {}
+
+    class FakeRedis:
+        async def hgetall(self, key):
+            return dict(checkpoints.get(key, {}))
+
+        async def hset(self, key, mapping):
+            checkpoints.setdefault(key, {}).update(mapping)
+
+        async def delete(self, key):
+            checkpoints.pop(key, None)
+
+    async def fake_redis_client():
+        return FakeRedis()
+
+    monkeypatch.setattr(reindex, "get_redis_client", fake_redis_client)
+
+    # The service serves the collection of an older model
+    service = make_service(HashModel())
+    client = service.vector_store.client
+    target = versioned_collection_name("test_books", settings.embedding_model, 3)
+    checkpoints[reindex.REINDEX_KEY_PREFIX + target] = {"last_book_id": "3", "status": "running"}
+    checkpoints[reindex.REINDEX_KEY_PREFIX + "test_books__old"] = {"last_book_id": "7"}
+
+    # A book is ingested, into the old collection, while the job runs
+    store_embeddings_async = service.store_embeddings_async
+
+    async def ingest_during_first_batch(items, store):
+        if not db.get(Book, 8):
+            db.add(Book(id=8, title="Book 8", source="gutenberg", content="aaaa b " * 10))
+            db.commit()
+        return await store_embeddings_async(items, store=store)
+
+    monkeypatch.setattr(service, "store_embeddings_async", ingest_during_first_batch)
+
+    stats = asyncio.run(reindex.reindex_books(db, service, batch_books=2, concurrency=2))
+
+    assert stats["collection"] == target
+    assert stats["books"] == 5
+    points = client.scroll(target, limit=100)[0]
+    assert {hit.payload["book_id"] for hit in points} == {4, 5, 6, 7, 8}
+    assert checkpoints[reindex.REINDEX_KEY_PREFIX + target] == {
+        "last_book_id": "8",
+        "status": "complete",
+        "model": settings.embedding_model,
+    }
+    # Old workers keep their index, which stops receiving books, so its checkpoint goes
+    assert stats["previous"] == service.vector_store.collection_name == "test_books__old"
+    assert reindex.REINDEX_KEY_PREFIX + "test_books__old" not in checkpoints
+
+    # New workers resolve the alias to the reindexed collection
+    fresh = QdrantVectorStore("test_books", client)
+    fresh.ensure_collection(3)
+    assert fresh.collection_name == target
+    assert fresh.count() == stats["passages"]
+
+    # Running a finished reindex again embeds the books ingested since
+    db.add(Book(id=9, title="Book 9", source="gutenberg", content="aaaa b " * 3))
+    db.commit()
+    again = asyncio.run(reindex.reindex_books(db, service))
+    assert (again["books"], again["previous"]) == (1, target)
+    assert checkpoints[reindex.REINDEX_KEY_PREFIX + target]["last_book_id"] == "9"
+
+    # Switching to another model and back embeds the whole library again, as the
+    # collection switched away from stops receiving new books
+    model = settings.embedding_model
+    monkeypatch.setattr(settings, "embedding_model", "other-model")
+    other = asyncio.run(reindex.reindex_books(db, service))
+    assert (other["books"], other["previous"]) == (9, target)
+    assert reindex.REINDEX_KEY_PREFIX + target not in checkpoints
+
+    monkeypatch.setattr(settings, "embedding_model", model)
+    back = asyncio.run(reindex.reindex_books(db, service))
+    assert (back["books"], back["previous"]) == (9, other["collection"])
+
+
+def test_legacy_collection_is_versioned_before_any_alias_switch():
+    """A collection from before aliases is copied behind one, never dropped by a switch."""
+    client = QdrantClient(":memory:")
+    legacy = QdrantVectorStore("test_books", client)
+    legacy.ensure_collection(3)
+    legacy.upsert([1, 2], [[1, 0, 0], [0, 1, 0]], [{"book_id": 1}, {"book_id": 2}])
+
+    target = QdrantVectorStore("test_books__new", client)
+    target.ensure_collection(3)
+    with pytest.raises(RuntimeError, match="version-legacy"):
+        target.switch_alias("test_books")
+    assert legacy.count() == 2
+
+    with pytest.raises(ValueError, match="3-dimensional"):
+        reindex.version_legacy_collection(client, "test_books", 4)
+
+    versioned = reindex.version_legacy_collection(client, "test_books", 3)
+
+    assert versioned == versioned_collection_name("test_books", settings.embedding_model, 3)
+    assert legacy.aliases() == {"test_books": versioned}
+    assert client.count("test_books").count == 2
+    assert reindex.version_legacy_collection(client, "test_books", 3) is None
+
+
+def make_tiny_sentence_transformer(path):
+    """A small random BERT with mean pooling and normalization, saved locally."""
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+    import torch
+
+    torch.manual_seed(0)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "fire", "water", "stone", "salt"]
+    vocab += [*letters, *(f"##{letter}" for letter in letters)]
+    (path / "bert").mkdir()
+    (path / "bert" / "vocab.txt").write_text("\n".join(vocab))
+    BertTokenizerFast(str(path / "bert" / "vocab.txt")).save_pretrained(str(path / "bert"))
+    config = BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=64,
+        max_position_embeddings=64,
+    )
+    BertModel(config).save_pretrained(str(path / "bert"))
+    transformer = models.Transformer(str(path / "bert"), max_seq_length=32)
+    model = SentenceTransformer(modules=[transformer, models.Pooling(32), models.Normalize()])
+    model.save(str(path / "model"))
+    return model
+
+
+def test_onnx_encoder_stays_within_cosine_tolerance_of_pytorch(tmp_path, monkeypatch):
+    """The int8 ONNX export encodes like the PyTorch model, and later loads reuse it."""
+    onnx_encoder = pytest.importorskip("app.services.onnx_encoder")
+    model = make_tiny_sentence_transformer(tmp_path)
+    texts = ["fire", "water over stone", "salt " * 40, "", "the stone of the wise"] * 3
+
+    encoder = onnx_encoder.load_onnx_encoder(str(tmp_path / "model"), tmp_path / "onnx", threads=1)
+
+    assert encoder.quantized
+    assert encoder.max_seq_length == 32 and encoder.tokenizer.is_fast
+    similarity = onnx_encoder.cosine_similarities(model.encode(texts), encoder.encode(texts, 4))
+    assert similarity.min() >= 0.99
+    # Activation scales are dynamic per batch, so a lone text differs slightly
+    assert np.allclose(encoder.encode("fire"), encoder.encode(texts, 4)[0], atol=1e-3)
+
+    def export_again(*args):
+        raise AssertionError("exported twice")
+
+    monkeypatch.setattr(onnx_encoder, "export_model", export_again)
+    onnx_encoder.load_onnx_encoder(str(tmp_path / "model"), tmp_path / "onnx")
+
+
+def test_onnx_backend_falls_back_to_pytorch_with_configured_threads(monkeypatch):
+    """Without ONNX Runtime the service loads the PyTorch model, on the configured threads."""
+    thread_counts = []
+    monkeypatch.setitem(sys.modules, "app.services.onnx_encoder", None)
+    monkeypatch.setattr(embedding_service.torch, "set_num_threads", thread_counts.append)
+    monkeypatch.setattr(embedding_service, "SentenceTransformer", lambda name: FakeModel())
+    monkeypatch.setattr(settings, "embedding_backend", "onnx")
+    monkeypatch.setattr(settings, "embedding_threads", 2)
+
+    model = EmbeddingService()._load_model()
+
+    assert isinstance(model, FakeModel)
+    assert thread_counts == [2]
@@ -0,0 +1,48 @@
+"""
+Unit tests for the book ingestion pipeline.
+"""
+import codecs
+
+from app.services.ingest.cleaning import GutenbergTextCleaner, clean_gutenberg_text
+
+RAW_BOOK = (
+    "﻿The Project Gutenberg eBook of The Kybalion\r\n"
+    "This eBook is for the use of anyone anywhere.\r\n"
+    "*** START OF THE PROJECT GUTENBERG EBOOK THE KYBALION ***\r\n"
+    "\r\n\r\n"
+    "THE   KYBALION\r\n"
+    "\tby Three Initiates\r\n"
+    "\r\n\r\n\r\n"
+    "The Principle of Mentalism. Café\r\n"
+    "\r\n"
+    "*** END OF THE PROJECT GUTENBERG EBOOK THE KYBALION ***\r\n"
+    "Full license text.\r\n"
+).encode("utf-8")
+
+
+def test_cleaner_strips_boilerplate_and_normalizes_text():
+    """Only the book between the markers remains, normalized, however it is chunked."""
+    expected = "THE KYBALION\nby Three Initiates\n\nThe Principle of Mentalism. Café\n"
+    cleaner = GutenbergTextCleaner("utf-8")
+
+    # One byte at a time splits CRLF pairs and multi-byte characters
+    cleaned = "".join(cleaner.feed(RAW_BOOK[i : i + 1]) for i in range(len(RAW_BOOK)))
+    cleaned += cleaner.finish()
+
+    assert cleaned == expected
+    assert cleaner.bytes_saved == len(RAW_BOOK) - len(expected.encode("utf-8"))
+
+
+def test_cleaner_keeps_unmarked_text_and_falls_back_to_cp1252():
+    """Files without markers are kept whole; undeclared non-UTF-8 bytes decode as cp1252."""
+    raw = "Café — no markers\r\n".encode("cp1252")
+
+    assert clean_gutenberg_text(raw) == "Café — no markers\n"
+
+
+def test_cleaner_keeps_utf8_before_the_first_cp1252_byte_in_a_chunk():
+    """A chunk switching encodings midway keeps its valid UTF-8 prefix."""
+    raw = codecs.BOM_UTF8 + "Café ok\n".encode("utf-8") + "café\n".encode("cp1252")
+    cleaner = GutenbergTextCleaner()
+
+    assert cleaner.feed(raw) + cleaner.finish() == "Café ok\ncafé\n"
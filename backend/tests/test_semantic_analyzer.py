@@ -0,0 +1,296 @@
+"""
+Unit tests for the semantic analysis service.
+"""
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import pickle
+import re
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import settings
+from app.db.session import Base
+from app.models.models import HermeticSymbol
+from app.services.semantic_analysis.analyzer import (
+    PROXIMITY_MAX_TOKENS,
+    STREAM_OVERLAP_CHARS,
+    SemanticAnalyzer,
+    get_semantic_analyzer,
+    iter_text_chunks,
+)
+from app.services.semantic_analysis.cache import AnalysisCache
+from app.services.semantic_analysis.context import AnalysisContext
+from app.services.semantic_analysis.cooccurrence import find_cooccurrences
+from app.services.semantic_analysis.energy_profile import build_energy_profile, energy_timeline
+from app.services.semantic_analysis import lexicon_store, parallel
+from app.services.semantic_analysis.parallel import analyze_text_parallel
+from app.services.semantic_analysis.postings import (
+    build_symbol_postings,
+    decode_positions,
+    encode_positions,
+    symbol_counts,
+)
+
+SAMPLE_TEXT = """
+The philosopher's stone represents the perfect union of Mercury, sulfur, and salt.
+The all-seeing eye watches over the work, as the serpent consumes its own tail.
+The Tree of Life connects Kether, the Crown, while the square and compass and
+square again teach the lessons of the master mason in the 3 degree and 33°x.
+"""
+
+
+def legacy_detect_symbols(analyzer, text):
+    """Reference detection running one regex scan per symbol pattern."""
+    text_lower = text.lower()
+    detected = []
+    for category, symbols in analyzer.all_symbols.items():
+        for symbol_name, pattern in symbols.items():
+            matches = list(re.finditer(pattern, text_lower, re.IGNORECASE))
+            if matches:
+                detected.append(
+                    {
+                        "symbol": symbol_name,
+                        "category": category,
+                        "count": len(matches),
+                        "positions": [match.start() for match in matches],
+                    }
+                )
+    return detected
+
+
+def test_detect_symbols_matches_per_pattern_scan():
+    """The compiled matcher reports exactly what per-pattern scanning reports."""
+    analyzer = SemanticAnalyzer()
+    assert analyzer.detect_symbols(SAMPLE_TEXT) == legacy_detect_symbols(analyzer, SAMPLE_TEXT)
+
+
+def test_detect_symbols_phrase_matches_do_not_overlap():
+    """Overlapping phrases of one symbol are resolved like re.finditer."""
+    analyzer = SemanticAnalyzer()
+    detected = {s["symbol"]: s for s in analyzer.detect_symbols("square and compass and square")}
+    assert detected["square_compass"]["positions"] == [0]
+
+
+def test_detect_symbols_phrase_words_need_whitespace():
+    """Phrase words separated by punctuation are not matched as a phrase."""
+    analyzer = SemanticAnalyzer()
+    detected = {s["symbol"] for s in analyzer.detect_symbols("tree, of life")}
+    assert "tree_of_life" not in detected
+
+
+def test_elemental_energy_accepts_pre_tokenized_input():
+    """Scoring from tokens gives the same distribution as scoring from text."""
+    analyzer = SemanticAnalyzer()
+    text = "Fire and flame meet the water of the moon under the sun."
+    energy = analyzer.analyze_elemental_energy(text)
+    assert energy == {"fire": 0.6, "water": 0.4, "air": 0.0, "earth": 0.0, "ether": 0.0}
+    assert analyzer.analyze_elemental_energy(tokens=analyzer.tokenize(text)) == energy
+
+
+def test_analyze_text_scans_once_and_records_timings():
+    """analyze_text shares one context: a single symbol scan feeds every stage."""
+    analyzer = SemanticAnalyzer()
+    context = AnalysisContext(SAMPLE_TEXT)
+    result = analyzer.analyze_text(SAMPLE_TEXT, context=context)
+
+    assert context.tokens == analyzer.tokenize(SAMPLE_TEXT)
+    assert result["hermetic_symbols"] is context.symbols
+    assert "tokenize" not in context.timings
+    assert {"normalize", "symbols", "energy", "correspondences", "total"} <= set(context.timings)
+
+
+def test_analyze_stream_matches_whole_text_analysis():
+    """Streaming small chunks finds boundary-spanning phrases at absolute positions."""
+    analyzer = SemanticAnalyzer()
+    chunks = iter_text_chunks(SAMPLE_TEXT * 5, chunk_size=7)
+    streamed = analyzer.analyze_stream(chunks, overlap=64)
+    assert streamed == analyzer.analyze_text(SAMPLE_TEXT * 5)
+
+
+def test_streaming_memory_stays_bounded_without_word_boundaries(monkeypatch):
+    """A run of word characters longer than the overlap is cut, not carried whole."""
+    analyzer = SemanticAnalyzer()
+    scan_window = analyzer.scan_window
+    windows = []
+
+    def record_window(window, *args):
+        windows.append(len(window))
+        return scan_window(window, *args)
+
+    monkeypatch.setattr(analyzer, "scan_window", record_window)
+    chunk = 100_000
+    chunks = ["The fire burns. "] + ["x" * chunk] * 30 + [" water and fire"]
+
+    result = analyzer.analyze_stream(chunks, analyze_symbols=False)
+
+    assert max(windows) <= 2 * STREAM_OVERLAP_CHARS + chunk
+    assert (
+        result["elemental_energy"] == analyzer.analyze_text("fire water fire")["elemental_energy"]
+    )
+
+
+def test_analyze_text_parallel_merges_shards(monkeypatch):
+    """Sharded analysis merges back into exactly the analyze_text result."""
+    monkeypatch.setattr(settings, "analysis_shard_min_chars", 64)
+    text = SAMPLE_TEXT * 5
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        result = asyncio.run(analyze_text_parallel(text, executor=executor))
+
+    assert result == SemanticAnalyzer().analyze_text(text)
+
+
+def test_small_batches_are_analyzed_off_the_event_loop(monkeypatch):
+    """A batch below one shard still runs on a thread, so it never stalls other requests."""
+    analyze_batch = parallel._analyze_batch
+    threads = []
+
+    def record_thread(*args):
+        threads.append(threading.get_ident())
+        return analyze_batch(*args)
+
+    monkeypatch.setattr(parallel, "_analyze_batch", record_thread)
+
+    async def collect():
+        lines = [block async for block in parallel.iter_batch_analysis(["fire", "water"])]
+        return threading.get_ident(), lines
+
+    loop_thread, lines = asyncio.run(collect())
+
+    assert len("".join(lines).splitlines()) == 2
+    assert threads and threads[0] != loop_thread
+
+
+def test_analysis_cache_evicts_by_size_and_keys_by_version():
+    """The in-process tier evicts least recently used results past its byte budget."""
+    cache = AnalysisCache(max_bytes=800, ttl=60, use_redis=False)
+    result = SemanticAnalyzer().analyze_text("The sun and the moon.")
+    flags = (True, True, True)
+    first = cache.make_key("first", "v1", flags)
+    second = cache.make_key("second", "v1", flags)
+
+    async def exercise():
+        await cache.set(first, result)
+        await cache.set(second, result)
+        return await cache.get(first), await cache.get(second)
+
+    evicted, kept = asyncio.run(exercise())
+
+    assert evicted is None
+    assert kept == result
+    assert cache.make_key("first", "v2", flags) != first
+    assert cache.metrics()["evictions"] == 1
+
+
+def test_proximity_symbols_are_bounded_by_token_distance():
+    """Proximity symbols match within the token window, across lines, and never beyond it."""
+    analyzer = SemanticAnalyzer()
+    near = "the serpent\nswallowing its own tail"
+    far = "the serpent " + "word " * (PROXIMITY_MAX_TOKENS + 1) + "tail"
+
+    assert [s["symbol"] for s in analyzer.detect_symbols(near)] == ["ouroboros"]
+    assert analyzer.detect_symbols(far) == []
+    assert analyzer.detect_symbols("serpent " * 10000) == []
+
+
+def test_symbol_postings_round_trip_positions():
+    """Postings keep positions compactly and decode them back exactly."""
+    detected = SemanticAnalyzer().detect_symbols(SAMPLE_TEXT * 50)
+    postings = build_symbol_postings(detected)
+
+    for symbol, posting in zip(detected, postings):
+        assert decode_positions(posting.positions) == symbol["positions"]
+        assert len(posting.positions) == 4 * symbol["count"]
+
+    assert encode_positions([]) == b""
+    assert all("positions" not in s for s in symbol_counts(detected))
+
+
+def test_cooccurrence_merges_overlapping_windows():
+    """Passages need every symbol within the window and merge when they overlap."""
+    postings = {"mercury": [10, 110, 130, 500], "sulfur": [40, 160, 900]}
+
+    passages = find_cooccurrences(postings, window=50)
+
+    assert [(p["start"], p["end"]) for p in passages] == [(10, 40), (110, 160)]
+    assert passages[1]["positions"] == {"mercury": [110, 130], "sulfur": [160]}
+    assert find_cooccurrences({**postings, "salt": []}, window=50) == []
+
+
+def test_cooccurrence_is_linear_in_positions_for_wide_windows():
+    """Dense postings with the widest window attribute each position once, quickly."""
+    postings = {"mercury": list(range(0, 120_000, 2)), "sulfur": list(range(1, 120_000, 2))}
+
+    start = time.perf_counter()
+    passages = find_cooccurrences(postings, window=100_000)
+    elapsed = time.perf_counter() - start
+
+    assert [(p["start"], p["end"]) for p in passages] == [(0, 119_999)]
+    assert passages[0]["positions"] == postings
+    assert elapsed < 1.0
+
+
+def test_energy_timeline_matches_per_bucket_analysis():
+    """Each timeline bucket has the energy of its own token range."""
+    analyzer = SemanticAnalyzer()
+    text = SAMPLE_TEXT + "fire and flame " * 20 + "water flows to the sea " * 20
+    tokens = analyzer.tokenize(text)
+
+    timeline = energy_timeline(build_energy_profile(text, analyzer), 4, analyzer)
+
+    assert timeline["token_count"] == len(tokens)
+    assert timeline["buckets"][-1]["end"] == len(tokens)
+    for bucket in timeline["buckets"]:
+        counts = analyzer.count_elements(Counter(tokens[bucket["start"] : bucket["end"]]))
+        assert bucket["energy"] == analyzer._element_distribution(counts)
+
+
+def test_database_lexicon_hot_swaps_on_published_version(monkeypatch):
+    """A seeded table reproduces the built-in lexicon; a published edit is picked up."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine, tables=[HermeticSymbol.__table__])
+    session_factory = sessionmaker(bind=engine)
+    db = session_factory()
+
+    published = {}
+
+    class FakeRedis:
+        async def get(self, key):
+            return published.get(key)
+
+        async def set(self, key, value):
+            published[key] = value
+
+    async def fake_redis_client():
+        return FakeRedis()
+
+    monkeypatch.setattr(lexicon_store, "get_redis_client", fake_redis_client)
+    monkeypatch.setattr(lexicon_store, "SessionLocal", session_factory)
+
+    builtin = SemanticAnalyzer.builtin_lexicon()
+    assert lexicon_store.seed_lexicon(db) == len(builtin)
+    assert lexicon_store.load_lexicon(db).version == builtin.version
+
+    original = get_semantic_analyzer()
+    try:
+        mercury = db.query(HermeticSymbol).filter(HermeticSymbol.name == "mercury").one()
+        mercury.keywords = [*mercury.keywords, "azoth"]
+        db.commit()
+        # Another worker publishes; this one notices on its next check
+        published[lexicon_store.LEXICON_VERSION_KEY] = lexicon_store.load_lexicon(db).version
+        asyncio.run(lexicon_store.refresh_lexicon(force=True))
+
+        analyzer = get_semantic_analyzer()
+        assert analyzer is not original
+        assert analyzer.lexicon.version == published[lexicon_store.LEXICON_VERSION_KEY]
+        assert [s["symbol"] for s in analyzer.detect_symbols("the azoth")] == ["mercury"]
+        assert pickle.loads(pickle.dumps(analyzer.lexicon)).matcher is not None
+    finally:
+        get_semantic_analyzer(original.lexicon)
@@ -181,13 +181,13 @@ export default function EnhancedSearch() {
                 <div className="space-y-2 text-xs">
                   {book.hermetic_symbols && book.hermetic_symbols.length > 0 && (
                     <div className="flex flex-wrap gap-1">
-                      {book.hermetic_symbols.slice(0, 3).map((symbol: string, idx: number) => (
+                      {book.hermetic_symbols.slice(0, 3).map((symbol, idx: number) => (
                         <span
                           key={idx}
                           className="px-2 py-1 rounded bg-purple-100 dark:bg-purple-900/30 
                                    text-purple-700 dark:text-purple-300"
                         >
-                          {symbol}
+                          {symbol.symbol}
                         </span>
                       ))}
                     </div>
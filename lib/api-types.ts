@@ -22,21 +22,36 @@ export interface Book {
   description?: string;
   language?: string;
   publication_year?: number;
-  hermetic_symbols: string[];
+  hermetic_symbols: SymbolCount[];
   elemental_energy: Record<string, number>;
   correspondences: string[];
   created_at: string;
 }
 
+export interface SymbolCount {
+  symbol: string;
+  category: string;
+  count: number;
+}
+
 export interface BookDetail extends Book {
   content: string;
 }
 
 // Search interfaces
+export interface PassageMatch {
+  book_id: number;
+  score: number;
+  chunk_index?: number;
+  start?: number;
+  end?: number;
+}
+
 export interface SearchResponse {
   results: Book[];
   total: number;
   query: string;
+  matches: PassageMatch[];
 }
 
 export interface SearchFiltersResponse {